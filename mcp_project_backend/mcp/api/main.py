@@ -8,6 +8,7 @@ variables, and defines global application event handlers and basic health check
 # This section MUST be at the very top of the file
 import os
 import sys
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
 import logging
@@ -62,6 +63,10 @@ os.environ['TESTING'] = 'true'
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from mcp.core.pubsub.redis_pubsub_manager import redis_pubsub_manager
+from mcp.core.cache import start_cache_tasks, close_cache
+from mcp.core.cache_warmer import cache_warmer
+from mcp.core.event_loop_monitor import event_loop_lag_monitor
+from mcp.core.security.middleware import setup_traffic_middleware
 from mcp.api.routers import (
     mcp_crud_routes,
     workflow_execution_routes,
@@ -285,12 +290,28 @@ async def lifespan(app: FastAPI):
         logger.warning(
             "REDIS_URL not configured. Real-time Pub/Sub features will be disabled.")
 
+    # Keep this worker's in-process response cache coherent with other workers
+    # and sample Redis memory usage in the background
+    start_cache_tasks()
+
+    # Warm the hottest cache entries before this worker starts serving traffic
+    if settings.CACHE_WARMUP_ON_STARTUP:
+        try:
+            await asyncio.wait_for(cache_warmer.warm(), timeout=settings.CACHE_WARMUP_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("Cache warmup timed out; starting with a partially warm cache.")
+        except Exception as e:
+            logger.error(f"Cache warmup failed: {e}")
+
     yield
     # Shutdown
     logger.info("MCP Backend shutting down...")
+    await event_loop_lag_monitor.stop()
+    await close_cache()
     # Disconnect Redis Pub/Sub publisher
     if redis_pubsub_manager._publisher_client:  # Check if client was initialized
         await redis_pubsub_manager.disconnect_publisher()
+    await redis_pubsub_manager.disconnect_subscriber()
     
     # Clean up database
     try:
@@ -318,6 +339,10 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+# Rate limiting and load shedding: added last so they run first and turn requests away
+# before any other work
+setup_traffic_middleware(app)
+
 # Custom RequestValidationError handler
 
 
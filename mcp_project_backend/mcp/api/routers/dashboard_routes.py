@@ -10,6 +10,8 @@ from datetime import datetime
 from mcp.db.session import get_db
 from mcp.core.services.dashboard_service import DashboardService
 from mcp.core.settings import settings
+from mcp.core.cache import cache_response
+from mcp.core.cache_warmer import cache_warmer, warmup_request
 from mcp.monitoring.performance import performance_monitor
 from pydantic import BaseModel
 from mcp.api.services.data_visualization_service import router as data_visualization_router
@@ -18,6 +20,10 @@ import uuid
 
 logger = logging.getLogger(__name__)
 
+# Summary aggregates are served from cache and refreshed in the background once stale
+summary_cache_timeout = 60  # seconds
+summary_stale_ttl = 240  # seconds
+
 class DashboardSummaryResponse(BaseModel):
     total_mcp_definitions: int
     total_mcp_versions: int
@@ -58,6 +64,7 @@ def get_dashboard_service(db: Session = Depends(get_db)) -> DashboardService:
         )
 
 @router.get("/summary", response_model=DashboardSummaryResponse)
+@cache_response(timeout=summary_cache_timeout, key_prefix="dashboard", stale_ttl=summary_stale_ttl)
 async def get_dashboard_summary(
     request: Request,
     service: DashboardService = Depends(get_dashboard_service)
@@ -214,4 +221,10 @@ async def dashboard_updates(websocket: WebSocket):
         await websocket.close()
 
 # Include visualization endpoints under the dashboard API
+# Pre-populate the summary on startup so the first dashboard load after a deploy is fast
+cache_warmer.register_endpoint(
+    get_dashboard_summary,
+    lambda db: {"request": warmup_request(), "service": DashboardService(db)}
+)
+
 router.include_router(data_visualization_router, prefix="/visualization", tags=["Visualization"])
@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session
 
 from mcp.db.session import get_db
 from mcp.core.settings import settings
+from mcp.core.cache import cache_not_found, not_found_tag
 
 # Import relevant Pydantic Read schemas and Service classes
 from mcp.schemas.mcp import MCPVersionRead, MCPDefinitionRead, MCPDefinitionCreate, MCPDefinitionUpdate, MCPVersionCreate, MCPVersionUpdate
@@ -53,7 +54,10 @@ router = APIRouter(
     tags=["Entities"],
 )
 
+# Entity IDs are server-generated uuid4s, so no 404 can have been cached for an ID before
+# it is created; creates therefore do not need to call invalidate_not_found.
 @router.get("/{entity_type}/{entity_id}", response_model=AnyEntityRead)
+@cache_not_found(key_prefix="entity", tags=[not_found_tag("{entity_id}")])
 async def get_entity_details(
     entity_type: EntityType = Path(...,
                                    description="The type of the entity to fetch."),
@@ -66,6 +70,7 @@ async def get_entity_details(
     Fetch details for any supported entity by its type and ID.
 
     The response model will vary based on the `entity_type` provided.
+    A 404 for an unknown ID is cached briefly; creating the entity clears it.
     """
     item: Optional[Any] = None
 
@@ -264,13 +269,13 @@ def create_workflow_definition(wf_def_create: WorkflowDefinitionCreate = Body(..
         db.add(wf_def)
         db.commit()
         db.refresh(wf_def)
-        return WorkflowDefinitionRead.model_validate(wf_def)
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=400, detail="WorkflowDefinition with this name already exists.")
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Internal error: {e}")
+    return WorkflowDefinitionRead.model_validate(wf_def)
 
 @router.get("/workflow-definitions/", response_model=List[WorkflowDefinitionRead])
 def list_workflow_definitions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
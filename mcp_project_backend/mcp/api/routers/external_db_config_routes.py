@@ -33,7 +33,7 @@ def create_external_db_config(
 ):
     """Create a new External Database Configuration."""
     try:
-        return service.create_config(config_create)
+        config = service.create_config(config_create)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -41,6 +41,7 @@ def create_external_db_config(
         # Log _e
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                             detail="Error creating external DB config.")
+    return config
 
 
 @router.get("/", response_model=ExternalDbConfigList)
@@ -17,9 +17,19 @@ from mcp.schemas.mcp import (
     MCPVersionCreate, MCPVersionRead, MCPVersionUpdate
 )
 from mcp.core.services.mcp_service import MCPService
+from mcp.core.cache import cache_response, invalidate_tags
+from mcp.core.cache_warmer import cache_warmer
 
 logger = logging.getLogger(__name__)
 
+# Cache timeout in seconds
+mcp_cache_timeout = 300  # 5 minutes
+
+# Cache tags; writes invalidate exactly the cached views they affect
+MCP_DEFINITIONS_LIST_TAG = "mcp_definitions"
+MCP_DEFINITION_TAG = "mcp_definition:{mcp_def_id}"
+MCP_VERSION_TAG = "mcp_version:{mcp_version_id}"
+
 router = APIRouter(
     prefix=f"{settings.API_V1_STR}/mcp-definitions",
     tags=["MCP Definitions & Versions"],
@@ -103,6 +113,7 @@ async def create_mcp_definition(
         
         # Log successful creation
         logger.info(f"Created MCP definition: {db_mcp_def.name}")
+        await invalidate_tags(MCP_DEFINITIONS_LIST_TAG)
         
         return db_mcp_def
         
@@ -143,6 +154,7 @@ async def create_mcp_definition(
 
 
 @router.get("/definitions/", response_model=MCPDefinitionList)
+@cache_response(timeout=mcp_cache_timeout, key_prefix="mcp", tags=[MCP_DEFINITIONS_LIST_TAG])
 def list_mcp_definitions(
     skip: int = Query(0, ge=0, description="Number of items to skip"),
     limit: int = Query(100, ge=1, le=200,
@@ -151,10 +163,11 @@ def list_mcp_definitions(
 ):
     """List MCP Definitions with pagination."""
     definitions, total = service.list_mcp_definitions(skip=skip, limit=limit)
-    return {"items": definitions, "total": total}
+    return {"items": [MCPDefinitionRead.model_validate(d) for d in definitions], "total": total}
 
 
 @router.get("/definitions/{mcp_def_id}", response_model=MCPDefinitionRead)
+@cache_response(timeout=mcp_cache_timeout, key_prefix="mcp", tags=[MCP_DEFINITION_TAG])
 def get_mcp_definition(
     mcp_def_id: uuid.UUID,
     service: MCPService = Depends(get_mcp_service)
@@ -164,7 +177,7 @@ def get_mcp_definition(
     if db_mcp_def is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="MCPDefinition not found")
-    return db_mcp_def
+    return MCPDefinitionRead.model_validate(db_mcp_def)
 
 
 @router.put("/{definition_id}", response_model=MCPDefinitionRead)
@@ -191,6 +204,7 @@ async def update_mcp_definition(
     if updated_def is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="MCPDefinition not found")
+    await invalidate_tags(MCP_DEFINITIONS_LIST_TAG, MCP_DEFINITION_TAG.format(mcp_def_id=definition_id))
     return MCPDefinitionRead.model_validate(updated_def)
 
 
@@ -215,6 +229,7 @@ async def delete_mcp_definition(
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="MCPDefinition not found")
+    await invalidate_tags(MCP_DEFINITIONS_LIST_TAG, MCP_DEFINITION_TAG.format(mcp_def_id=definition_id))
     return
 
 # --- MCPVersion Endpoints (nested under definitions) ---
@@ -250,6 +265,10 @@ async def create_mcp_version_for_definition(
     if db_mcp_version is None:  # Should be caught by service raising HTTPException for not found definition
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="MCPDefinition not found to create version for.")
+    await invalidate_tags(
+        MCP_DEFINITIONS_LIST_TAG,
+        MCP_DEFINITION_TAG.format(mcp_def_id=definition_id)
+    )
     return MCPVersionRead.model_validate(db_mcp_version)
 
 
@@ -273,6 +292,7 @@ def list_mcp_versions_for_definition(
 
 # Independent endpoint to get any version by its ID
 @router.get("/versions/{mcp_version_id}", response_model=MCPVersionRead)
+@cache_response(timeout=mcp_cache_timeout, key_prefix="mcp", tags=[MCP_VERSION_TAG])
 def get_mcp_version(
     mcp_version_id: uuid.UUID,
     service: MCPService = Depends(get_mcp_service)
@@ -282,7 +302,7 @@ def get_mcp_version(
     if db_mcp_ver is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="MCPVersion not found")
-    return db_mcp_ver
+    return MCPVersionRead.model_validate(db_mcp_ver)
 
 
 @router.put("/{definition_id}/versions/{version_id}", response_model=MCPVersionRead)
@@ -324,6 +344,11 @@ async def update_mcp_version(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail=f"Version {version_id} does not belong to definition {definition_id}. Update not allowed through this path.")
 
+    await invalidate_tags(
+        MCP_DEFINITIONS_LIST_TAG,
+        MCP_DEFINITION_TAG.format(mcp_def_id=definition_id),
+        MCP_VERSION_TAG.format(mcp_version_id=version_id)
+    )
     return MCPVersionRead.model_validate(updated_version)
 
 
@@ -357,4 +382,14 @@ async def delete_mcp_version(
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="MCPVersion not found or already deleted")
+    await invalidate_tags(
+        MCP_DEFINITIONS_LIST_TAG,
+        MCP_DEFINITION_TAG.format(mcp_def_id=definition_id),
+        MCP_VERSION_TAG.format(mcp_version_id=version_id)
+    )
     return
+
+
+# Pre-populate the most-read definitions and versions on startup
+cache_warmer.register_endpoint(get_mcp_definition, lambda db: {"service": MCPService(db)})
+cache_warmer.register_endpoint(get_mcp_version, lambda db: {"service": MCPService(db)})
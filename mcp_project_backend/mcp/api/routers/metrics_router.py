@@ -4,6 +4,7 @@ from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from prometheus_client.multiprocess import MultiProcessCollector
 from prometheus_client import CollectorRegistry
 from mcp.core.settings import settings
+from mcp.core.auth import get_current_active_admin
 from fastapi import Response
 
 # Set TESTING environment variable before any imports
@@ -108,3 +109,30 @@ async def performance_dashboard():
             "active_alerts": len(alerts)
         }
     }
+
+@router.get("/llm-cache", response_model=dict)
+async def llm_cache_report():
+    """
+    Get hit ratio and size of the persistent LLM prompt/response cache for this process.
+    """
+    from mcp.core.llm import llm_response_cache
+    return llm_response_cache.get_stats()
+
+@router.get("/cache", response_model=dict)
+async def cache_report():
+    """
+    Get response cache hit ratio, miss latency, bytes written and evictions by key prefix
+    and endpoint for this process.
+    """
+    from mcp.core.cache import cache_analytics
+    return cache_analytics.report()
+
+@router.post("/cache/warm", response_model=dict, dependencies=[Depends(get_current_active_admin)])
+async def warm_cache():
+    """
+    Re-warm the response cache with the most-accessed entries (e.g. after a bulk invalidation).
+
+    Replaying the hottest calls is DB-heavy, so only admins may trigger it.
+    """
+    from mcp.core.cache_warmer import cache_warmer
+    return {"warmed": await cache_warmer.warm()}
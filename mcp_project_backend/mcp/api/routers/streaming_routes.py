@@ -17,6 +17,7 @@ Workflow Run Streaming:
 import asyncio
 import json
 import os
+from contextlib import aclosing
 from fastapi import APIRouter, Request, HTTPException, Path, Depends
 try:
     from sse_starlette.sse import EventSourceResponse
@@ -66,21 +67,23 @@ async def workflow_event_generator(run_id: str, request: Request, pubsub_manager
         # Yield a connection confirmation event (optional)
         # yield json.dumps({"event": "connection_established", "data": {"run_id": run_id}})
 
-        async for message in pubsub_manager.subscribe_to_channel(channel_name):
-            if await request.is_disconnected():
-                print(f"SSE Client for run_id {run_id} disconnected.")
-                break # Exit the generator if client disconnects
-
-            # Format as SSE event:
-            # event: <event_type from message>
-            # data: <payload from message>
-            # id: <optional_event_id>
-            event_type = message.get("event_type", "message") # Default to "message" if no specific type
-            payload = message.get("payload", {})
-
-            sse_event = f"event: {event_type}\ndata: {json.dumps(payload)}\n\n"
-            yield sse_event
-            await asyncio.sleep(0.01) # Small sleep to allow other tasks to run
+        # aclosing releases this client's share of the subscription as soon as the loop ends
+        async with aclosing(pubsub_manager.subscribe_to_channel(channel_name)) as messages:
+            async for message in messages:
+                if await request.is_disconnected():
+                    print(f"SSE Client for run_id {run_id} disconnected.")
+                    break # Exit the generator if client disconnects
+
+                # Format as SSE event:
+                # event: <event_type from message>
+                # data: <payload from message>
+                # id: <optional_event_id>
+                event_type = message.get("event_type", "message") # Default to "message" if no specific type
+                payload = message.get("payload", {})
+
+                sse_event = f"event: {event_type}\ndata: {json.dumps(payload)}\n\n"
+                yield sse_event
+                await asyncio.sleep(0.01) # Small sleep to allow other tasks to run
 
     except asyncio.CancelledError:
         print(f"SSE subscription for run_id {run_id} cancelled (client likely disconnected).")
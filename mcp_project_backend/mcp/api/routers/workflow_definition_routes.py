@@ -46,6 +46,10 @@ T = TypeVar('T', bound=Any)
 definition_cache_timeout = 300  # 5 minutes
 steps_cache_timeout = 3600  # 1 hour
 
+# Cache tags; writes invalidate exactly the cached views they affect
+DEFINITIONS_LIST_TAG = "workflow_definitions"
+DEFINITION_TAG = "workflow_definition:{wf_def_id}"
+
 # Request ID middleware
 async def request_id_middleware(request: Request, call_next):
     request_id = request.headers.get('X-Request-ID', None)
@@ -152,10 +156,13 @@ if os.getenv('TESTING'):
     workflow_circuit_breaker = mock_decorator
     workflow_rate_limiter = mock_decorator
     cache_response = mock_decorator
+
+    async def invalidate_tags(*tags):
+        return 0
 else:
     from mcp.core.circuit_breaker import workflow_circuit_breaker
     from mcp.core.rate_limiter import workflow_rate_limiter
-    from mcp.core.cache import cache_response
+    from mcp.core.cache import cache_response, cache_key_exists, invalidate_tags, build_cache_key
 
 # Add rate limiting
 @router.on_event("startup")
@@ -167,7 +174,6 @@ def startup_event():
 @router.post("/", response_model=WorkflowDefinitionRead, status_code=status.HTTP_201_CREATED)
 @workflow_circuit_breaker
 @workflow_rate_limiter
-@cache_response(timeout=definition_cache_timeout)
 async def create_workflow_definition(
     wf_def_in: WorkflowDefinitionCreate,
     request: Request,
@@ -216,6 +222,7 @@ async def create_workflow_definition(
         )
         
         logger.info(f"[Request {request.state.request_id}] Workflow created: {wf_def.name} (ID: {wf_def.id})")
+        await invalidate_tags(DEFINITIONS_LIST_TAG)
         
         return wf_def
 
@@ -272,7 +279,7 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=WorkflowDefinitionRead, status_code=status.HTTP_201_CREATED)
-def create_workflow_definition(
+async def create_workflow_definition(
     wf_def_in: WorkflowDefinitionCreate,
     db: Session = Depends(get_db)
 ):
@@ -308,6 +315,7 @@ def create_workflow_definition(
         
         # Log creation
         logger.info(f"Workflow created: {wf_def.name} (ID: {wf_def.id})")
+        await invalidate_tags(DEFINITIONS_LIST_TAG)
         
         return wf_def
 
@@ -333,7 +341,7 @@ def create_workflow_definition(
 @router.get("/", response_model=List[WorkflowDefinitionRead])
 @workflow_circuit_breaker
 @workflow_rate_limiter
-@cache_response(timeout=definition_cache_timeout)
+@cache_response(timeout=definition_cache_timeout, tags=[DEFINITIONS_LIST_TAG], stale_ttl=definition_cache_timeout)
 async def list_workflow_definitions(
     request: Request,
     skip: int = Query(0, ge=0),
@@ -385,10 +393,14 @@ async def list_workflow_definitions(
             method="GET",
             status=200,
             duration=(datetime.now() - start_time).total_seconds(),
-            cache_hit=cache_key_exists(f"workflow:list:{skip}:{limit}:{search}:{mcp_type}:{include_archived}")
+            cache_hit=await cache_key_exists(build_cache_key("workflow", "list_workflow_definitions", {
+                "skip": skip, "limit": limit, "search": search,
+                "mcp_type": mcp_type, "include_archived": include_archived
+            }))
         )
         
-        return result
+        # Cached as plain JSON; ORM objects would need the pickle codec
+        return [WorkflowDefinitionRead.model_validate(d, from_attributes=True) for d in result]
     
     except RateLimitExceededError as e:
         logger.warning(f"[Request {request.state.request_id}] Rate limit exceeded: {str(e)}")
@@ -579,10 +591,10 @@ async def list_workflow_definitions(
 @router.get("/{wf_def_id}", response_model=WorkflowDefinitionRead)
 @workflow_circuit_breaker
 @workflow_rate_limiter
-@cache_response(timeout=definition_cache_timeout)
+@cache_response(timeout=definition_cache_timeout, tags=[DEFINITION_TAG])
 async def get_workflow_definition(
-    wf_def_id: int = Path(..., description="Workflow Definition ID"),
     request: Request,
+    wf_def_id: int = Path(..., description="Workflow Definition ID"),
     db: Session = Depends(get_db)
 ):
     """
@@ -616,7 +628,8 @@ async def get_workflow_definition(
             )
         
         logger.info(f"[Request {request.state.request_id}] Retrieved workflow {wf_def_id}")
-        return definition
+        # Cached as plain JSON; ORM objects would need the pickle codec
+        return WorkflowDefinitionRead.model_validate(definition, from_attributes=True)
     
     except Exception as e:
         logger.error(f"[Request {request.state.request_id}] Error fetching workflow: {str(e)}")
@@ -648,12 +661,11 @@ async def get_workflow_definition(
 @router.put("/{wf_def_id}", response_model=WorkflowDefinitionRead)
 @workflow_circuit_breaker
 @workflow_rate_limiter
-@cache_response(timeout=definition_cache_timeout)
 async def update_workflow_definition(
-    wf_def_id: int = Path(..., description="Workflow Definition ID"),
-    db: Session = Depends(get_db),
     wf_def_update: WorkflowDefinitionUpdate,
-    request: Request
+    request: Request,
+    wf_def_id: int = Path(..., description="Workflow Definition ID"),
+    db: Session = Depends(get_db)
 ):
     """
     Update a Workflow Definition.
@@ -679,6 +691,7 @@ async def update_workflow_definition(
             db_obj=wf_def,
             obj_in=wf_def_update
         )
+        await invalidate_tags(DEFINITIONS_LIST_TAG, DEFINITION_TAG.format(wf_def_id=wf_def_id))
         return updated_wf_def
 
     except Exception as e:
@@ -691,11 +704,10 @@ async def update_workflow_definition(
 @router.delete("/{wf_def_id}", response_model=WorkflowDefinitionRead)
 @workflow_circuit_breaker
 @workflow_rate_limiter
-@cache_response(timeout=definition_cache_timeout)
 async def delete_workflow_definition(
+    request: Request,
     wf_def_id: int = Path(..., description="Workflow Definition ID"),
-    db: Session = Depends(get_db),
-    request: Request
+    db: Session = Depends(get_db)
 ):
     """
     Delete a Workflow Definition and all its steps.
@@ -717,6 +729,7 @@ async def delete_workflow_definition(
 
         deleted_wf_def = crud_workflow_definition.remove(db=db, id=wf_def_id)
         logger.info(f"Workflow deleted: {deleted_wf_def.name} (ID: {deleted_wf_def.id})")
+        await invalidate_tags(DEFINITIONS_LIST_TAG, DEFINITION_TAG.format(wf_def_id=wf_def_id))
         return deleted_wf_def
 
     except Exception as e:
@@ -731,12 +744,11 @@ async def delete_workflow_definition(
 @router.post("/{wf_def_id}/steps", response_model=WorkflowStepRead, status_code=status.HTTP_201_CREATED)
 @workflow_circuit_breaker
 @workflow_rate_limiter
-@cache_response(timeout=steps_cache_timeout)
 async def add_workflow_step(
     wf_def_id: int,
-    db: Session = Depends(get_db),
     step_in: WorkflowStepCreate,
-    request: Request
+    request: Request,
+    db: Session = Depends(get_db)
 ):
     """
     Add a new step to a Workflow Definition.
@@ -763,6 +775,7 @@ async def add_workflow_step(
             obj_in={**step_in.model_dump(), "workflow_definition_id": wf_def_id}
         )
         logger.info(f"Step added to workflow {wf_def_id}: {step.id}")
+        await invalidate_tags(DEFINITIONS_LIST_TAG, DEFINITION_TAG.format(wf_def_id=wf_def_id))
         return step
 
     except Exception as e:
@@ -773,7 +786,7 @@ async def add_workflow_step(
         )
 
 @router.delete("/{wf_def_id}/steps/{step_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_workflow_step(
+async def delete_workflow_step(
     wf_def_id: int = Path(..., description="Workflow Definition ID"),
     db: Session = Depends(get_db),
     step_id: int = Path(..., description="Step ID")
@@ -785,14 +798,15 @@ def delete_workflow_step(
     if not step or step.workflow_definition_id != wf_def_id:
         raise HTTPException(status_code=404, detail="Workflow Step not found for this Workflow Definition")
     crud_workflow_step.remove(db, id=step_id)
+    await invalidate_tags(DEFINITIONS_LIST_TAG, DEFINITION_TAG.format(wf_def_id=wf_def_id))
     return
 
 @router.put("/{wf_def_id}/steps/{step_id}", response_model=WorkflowStepRead)
-def update_workflow_step(
+async def update_workflow_step(
+    step_update: WorkflowStepCreate,
     wf_def_id: int = Path(..., description="Workflow Definition ID"),
     db: Session = Depends(get_db),
-    step_id: int = Path(..., description="Step ID"),
-    step_update: WorkflowStepCreate
+    step_id: int = Path(..., description="Step ID")
 ):
     """
     Update a step in a Workflow Definition.
@@ -801,11 +815,13 @@ def update_workflow_step(
     if not step or step.workflow_definition_id != wf_def_id:
         raise HTTPException(status_code=404, detail="Workflow Step not found for this Workflow Definition")
     updated = crud_workflow_step.update(db, db_obj=step, obj_in=step_update)
+    await invalidate_tags(DEFINITIONS_LIST_TAG, DEFINITION_TAG.format(wf_def_id=wf_def_id))
     return updated
 
 @router.get("/{wf_def_id}/steps", response_model=List[WorkflowStepRead])
-@cache_response(timeout=steps_cache_timeout)
+@cache_response(timeout=steps_cache_timeout, tags=[DEFINITION_TAG])
 async def list_workflow_steps(
+    request: Request,
     wf_def_id: int = Path(..., description="Workflow Definition ID"),
     db: Session = Depends(get_db)
 ):
@@ -842,7 +858,8 @@ async def list_workflow_steps(
             )
         
         logger.info(f"[Request {request.state.request_id}] Retrieved {len(steps)} steps for workflow {wf_def_id}")
-        return steps
+        # Cached as plain JSON; ORM objects would need the pickle codec
+        return [WorkflowStepRead.model_validate(step, from_attributes=True) for step in steps]
     
     except Exception as e:
         logger.error(f"[Request {request.state.request_id}] Error fetching workflow steps: {str(e)}")
@@ -860,3 +877,18 @@ async def list_workflow_steps(
     if not wf_def:
         raise HTTPException(status_code=404, detail="Workflow Definition not found")
     return wf_def.steps
+
+
+# Pre-populate the most-read workflow definitions on startup; the list's registration also
+# lets its stale entries be refreshed in the background with a fresh session
+if not os.getenv('TESTING'):
+    from mcp.core.cache_warmer import cache_warmer, warmup_request
+
+    cache_warmer.register_endpoint(
+        "workflow:get_workflow_definition",
+        lambda db: {"request": warmup_request(), "db": db}
+    )
+    cache_warmer.register_endpoint(
+        "workflow:list_workflow_definitions",
+        lambda db: {"request": warmup_request(), "db": db}
+    )
@@ -7,11 +7,13 @@ from mcp.db.models.user import User
 from mcp.schemas.mcp import MCPDefinitionRead, MCPVersionRead
 from mcp.schemas.workflow import WorkflowDefinitionRead, WorkflowRunRead
 from mcp.schemas.user import UserResponse
+from mcp.core.cache import cache_not_found, not_found_tag
 import uuid
 
 router = APIRouter()
 
 @router.get("/definitions/{definition_id}", response_model=MCPDefinitionRead)
+@cache_not_found(key_prefix="data", tags=[not_found_tag("{definition_id}")])
 def get_mcp_definition(definition_id: uuid.UUID, db: Session = Depends(get_db)):
     """
     Retrieve an MCPDefinition by its ID, including its versions.
@@ -22,6 +24,7 @@ def get_mcp_definition(definition_id: uuid.UUID, db: Session = Depends(get_db)):
     return MCPDefinitionRead.model_validate(definition)
 
 @router.get("/versions/{version_id}", response_model=MCPVersionRead)
+@cache_not_found(key_prefix="data", tags=[not_found_tag("{version_id}")])
 def get_mcp_version(version_id: uuid.UUID, db: Session = Depends(get_db)):
     """
     Retrieve an MCPVersion by its ID.
@@ -32,6 +35,7 @@ def get_mcp_version(version_id: uuid.UUID, db: Session = Depends(get_db)):
     return MCPVersionRead.model_validate(version)
 
 @router.get("/workflows/{workflow_id}", response_model=WorkflowDefinitionRead)
+@cache_not_found(key_prefix="data", tags=[not_found_tag("{workflow_id}")])
 def get_workflow_definition(workflow_id: uuid.UUID, db: Session = Depends(get_db)):
     """
     Retrieve a WorkflowDefinition by its ID.
@@ -42,6 +46,7 @@ def get_workflow_definition(workflow_id: uuid.UUID, db: Session = Depends(get_db
     return WorkflowDefinitionRead.model_validate(workflow)
 
 @router.get("/workflow-runs/{run_id}", response_model=WorkflowRunRead)
+@cache_not_found(key_prefix="data", tags=[not_found_tag("{run_id}")])
 def get_workflow_run(run_id: uuid.UUID, db: Session = Depends(get_db)):
     """
     Retrieve a WorkflowRun by its ID.
@@ -52,6 +57,7 @@ def get_workflow_run(run_id: uuid.UUID, db: Session = Depends(get_db)):
     return WorkflowRunRead.model_validate(run)
 
 @router.get("/users/{user_id}", response_model=UserResponse)
+@cache_not_found(key_prefix="data", tags=[not_found_tag("{user_id}")])
 def get_user(user_id: int, db: Session = Depends(get_db)):
     """
     Retrieve a User by their ID.
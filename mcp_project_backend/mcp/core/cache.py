@@ -1,11 +1,47 @@
 from functools import wraps
-from typing import Callable, Any, Optional, TypeVar, Generic
-from datetime import datetime, timedelta
+from typing import Callable, Any, Optional, TypeVar, Generic, Dict, Tuple, List, Sequence, NamedTuple, Set
+from datetime import date, datetime, timedelta
+from enum import Enum
 from mcp.core.settings import settings
-import redis
+import abc
+import asyncio
+import contextvars
+import hashlib
+import inspect
+import json
+import random
+import threading
+import time
+import uuid
 import pickle
 import logging
-from prometheus_client import Counter, Gauge
+import zlib
+from decimal import Decimal
+import orjson
+from prometheus_client import Counter, Gauge, Histogram
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from mcp.core.circuit_breaker import CircuitBreakerOpenError
+from mcp.core.cache_backends import (
+    CacheBackend,
+    LocalLRUCache,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    RedisError,
+    TieredCacheBackend,
+    _MISS,
+    create_cache_backend,
+)
+
+try:
+    import msgpack
+except ImportError:  # Optional codec
+    msgpack = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # Optional compression
+    lz4_frame = None
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -26,115 +62,1054 @@ CACHE_SIZE = Gauge(
     'Current cache size in bytes'
 )
 
-# Initialize Redis client with connection pool
-redis_pool = redis.ConnectionPool(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
-    db=settings.REDIS_DB,
-    max_connections=settings.REDIS_MAX_CONNECTIONS,
-    socket_timeout=settings.REDIS_TIMEOUT
+CACHE_COALESCED = Counter(
+    'cache_coalesced_requests_total',
+    'Total number of cache misses served by another request\'s computation'
+)
+
+CACHE_STALE_HIT = Counter(
+    'cache_stale_hits_total',
+    'Total number of stale cache entries served while being refreshed'
 )
 
-redis_client = redis.Redis(connection_pool=redis_pool, decode_responses=True)
+CACHE_REFRESHES = Counter(
+    'cache_background_refreshes_total',
+    'Total number of stale cache entries refreshed in the background'
+)
 
-# Export cache_manager for external use
-cache_manager = redis_client
+CACHE_LOOKUPS = Counter(
+    'cache_lookups_total',
+    'Cache lookups by key prefix, endpoint and result (hit, stale_hit, miss)',
+    ['prefix', 'endpoint', 'result']
+)
+
+CACHE_MISS_LATENCY = Histogram(
+    'cache_miss_latency_seconds',
+    'Time callers spent waiting for a missing cache entry to be computed',
+    ['prefix', 'endpoint']
+)
+
+CACHE_BYTES_WRITTEN = Counter(
+    'cache_bytes_written_total',
+    'Bytes of serialized cache entries written, by key prefix and endpoint',
+    ['prefix', 'endpoint']
+)
+
+CACHE_L1_EVICTIONS = Counter(
+    'cache_l1_evictions_total',
+    'In-process cache entries evicted to stay within the byte budget',
+    ['prefix', 'endpoint']
+)
 
 T = TypeVar('T')
 
+# Backend counter sets recording how often each endpoint is called with each parameter set.
+ACCESS_KEY_PREFIX = "cache:access:"
+
+# Argument types that identify what a response depends on (path and query parameters).
+_KEY_SCALAR_TYPES = (str, int, float, bool, uuid.UUID, Enum, date)
+
+# Identifies this worker so it can ignore its own invalidation broadcasts.
+_WORKER_ID = uuid.uuid4().hex
+
+
+class CacheSerializationError(Exception):
+    """Raised when a cached payload cannot be encoded or decoded."""
+    pass
+
+
+def _encode_default(value: Any) -> Any:
+    """Converts values the codecs cannot encode natively, notably Pydantic response models."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type {type(value).__name__} is not serializable")
+
+
+class CacheCodec(abc.ABC):
+    """
+    Encodes cached values to bytes.
+
+    Each codec has a unique one-byte `codec_id` stored in the payload header, so entries
+    stay readable after the configured codec changes.
+    """
+    codec_id: int
+    name: str
+
+    @abc.abstractmethod
+    def encode(self, value: Any) -> bytes:
+        pass
+
+    @abc.abstractmethod
+    def decode(self, data: bytes) -> Any:
+        pass
+
+
+class OrjsonCodec(CacheCodec):
+    """JSON via orjson. Pydantic models are stored as their JSON dump and read back as dicts."""
+    codec_id = 1
+    name = "orjson"
+
+    def encode(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=_encode_default, option=orjson.OPT_NON_STR_KEYS)
+
+    def decode(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec(CacheCodec):
+    """MessagePack; more compact than JSON for numeric-heavy payloads. Requires `msgpack`."""
+    codec_id = 2
+    name = "msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("The msgpack cache codec requires the 'msgpack' package.")
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=_encode_default, use_bin_type=True)
+
+    def decode(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+class PickleCodec(CacheCodec):
+    """Pickle; round-trips arbitrary objects but must only read payloads written by trusted workers."""
+    codec_id = 3
+    name = "pickle"
+
+    def encode(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+_CODECS: Dict[str, Callable[[], CacheCodec]] = {
+    OrjsonCodec.name: OrjsonCodec,
+    MsgpackCodec.name: MsgpackCodec,
+    PickleCodec.name: PickleCodec,
+}
+
+_COMPRESS_NONE = 0
+_COMPRESS_ZLIB = 1
+_COMPRESS_LZ4 = 2
+
+
+class CacheSerializer:
+    """
+    Turns cached values into compact payloads: a two-byte header (codec id, compression)
+    followed by the encoded value, compressed when it exceeds `compression_threshold` bytes.
+
+    Values the primary codec cannot encode (e.g. ORM objects) are written with the
+    `fallback` codec when one is configured; otherwise they raise CacheSerializationError.
+
+    Args:
+        codec: Primary codec.
+        compression: "zlib", "lz4" or "none".
+        compression_threshold: Minimum encoded size, in bytes, worth compressing.
+        fallback: Codec for values the primary codec rejects.
+    """
+    def __init__(
+        self,
+        codec: CacheCodec,
+        compression: str = "zlib",
+        compression_threshold: int = 1024,
+        fallback: Optional[CacheCodec] = None
+    ):
+        self.codec = codec
+        self.fallback = fallback
+        self.compression_threshold = compression_threshold
+        if compression == "lz4" and lz4_frame is None:
+            logger.warning("lz4 is not installed; compressing cached values with zlib instead.")
+            compression = "zlib"
+        self.compression = {"none": _COMPRESS_NONE, "zlib": _COMPRESS_ZLIB, "lz4": _COMPRESS_LZ4}[compression]
+        # Only codecs we are configured with are trusted for decoding.
+        self._decoders = {c.codec_id: c for c in (codec, fallback) if c is not None}
+
+    def dumps(self, value: Any) -> bytes:
+        codec = self.codec
+        try:
+            data = codec.encode(value)
+        except TypeError as e:
+            if self.fallback is None:
+                raise CacheSerializationError(f"{codec.name} cannot encode cached value: {str(e)}") from e
+            codec = self.fallback
+            data = codec.encode(value)
+
+        compression = _COMPRESS_NONE
+        if self.compression != _COMPRESS_NONE and len(data) >= self.compression_threshold:
+            compression = self.compression
+            data = zlib.compress(data, 1) if compression == _COMPRESS_ZLIB else lz4_frame.compress(data)
+        return bytes((codec.codec_id, compression)) + data
+
+    def loads(self, payload: bytes) -> Any:
+        if len(payload) < 2 or payload[0] not in self._decoders:
+            raise CacheSerializationError("Cached payload has an unknown or untrusted format")
+        codec, compression, data = self._decoders[payload[0]], payload[1], payload[2:]
+        if compression == _COMPRESS_ZLIB:
+            data = zlib.decompress(data)
+        elif compression == _COMPRESS_LZ4:
+            if lz4_frame is None:
+                raise CacheSerializationError("Cached payload is lz4-compressed but lz4 is not installed")
+            data = lz4_frame.decompress(data)
+        elif compression != _COMPRESS_NONE:
+            raise CacheSerializationError(f"Unknown cache compression {compression}")
+        return codec.decode(data)
+
+
+def _build_serializer() -> CacheSerializer:
+    fallback = _CODECS[settings.CACHE_FALLBACK_SERIALIZER]() if settings.CACHE_FALLBACK_SERIALIZER else None
+    return CacheSerializer(
+        codec=_CODECS[settings.CACHE_SERIALIZER](),
+        compression=settings.CACHE_COMPRESSION,
+        compression_threshold=settings.CACHE_COMPRESSION_THRESHOLD,
+        fallback=fallback
+    )
+
+
+cache_serializer = _build_serializer()
+
+
+def _endpoint_of(cache_key: str) -> str:
+    """Maps "<prefix>:<name>:<digest>" to "<prefix>:<name>"."""
+    return cache_key.rsplit(":", 1)[0]
+
+
+class _EndpointCacheStats:
+    __slots__ = ("hits", "stale_hits", "misses", "miss_seconds", "writes", "bytes_written", "evictions")
+
+    def __init__(self):
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.miss_seconds = 0.0
+        self.writes = 0
+        self.bytes_written = 0
+        self.evictions = 0
+
+    def add(self, other: "_EndpointCacheStats") -> None:
+        for field in self.__slots__:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "avg_miss_latency_ms": self.miss_seconds / self.misses * 1000 if self.misses else 0.0,
+            "writes": self.writes,
+            "bytes_written": self.bytes_written,
+            "avg_entry_bytes": self.bytes_written / self.writes if self.writes else 0.0,
+            "l1_evictions": self.evictions,
+        }
+
+
+class CacheAnalytics:
+    """
+    Per-endpoint cache statistics for this process, mirrored into labeled Prometheus metrics.
+
+    Endpoints are identified as "<key_prefix>:<function name>"; the report also rolls them
+    up by key prefix so the memory spent on each family of cached responses can be
+    weighed against its hit ratio.
+    """
+    def __init__(self):
+        self._stats: Dict[str, _EndpointCacheStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, endpoint: str) -> _EndpointCacheStats:
+        stats = self._stats.get(endpoint)
+        if stats is None:
+            stats = self._stats.setdefault(endpoint, _EndpointCacheStats())
+        return stats
+
+    @staticmethod
+    def _labels(endpoint: str) -> Dict[str, str]:
+        return {"prefix": endpoint.split(":", 1)[0], "endpoint": endpoint}
+
+    def record_hit(self, endpoint: str, stale: bool = False) -> None:
+        with self._lock:
+            stats = self._get(endpoint)
+            stats.hits += 1
+            stats.stale_hits += int(stale)
+        CACHE_LOOKUPS.labels(result="stale_hit" if stale else "hit", **self._labels(endpoint)).inc()
+
+    def record_miss(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            stats = self._get(endpoint)
+            stats.misses += 1
+            stats.miss_seconds += seconds
+        CACHE_LOOKUPS.labels(result="miss", **self._labels(endpoint)).inc()
+        CACHE_MISS_LATENCY.labels(**self._labels(endpoint)).observe(seconds)
+
+    def record_write(self, endpoint: str, size: int) -> None:
+        with self._lock:
+            stats = self._get(endpoint)
+            stats.writes += 1
+            stats.bytes_written += size
+        CACHE_BYTES_WRITTEN.labels(**self._labels(endpoint)).inc(size)
+
+    def record_eviction(self, endpoint: str) -> None:
+        with self._lock:
+            self._get(endpoint).evictions += 1
+        CACHE_L1_EVICTIONS.labels(**self._labels(endpoint)).inc()
+
+    def report(self) -> Dict[str, Any]:
+        """Returns statistics by endpoint and by key prefix, plus the local tier's occupancy."""
+        with self._lock:
+            endpoints = dict(self._stats)
+            prefixes: Dict[str, _EndpointCacheStats] = {}
+            for endpoint, stats in endpoints.items():
+                prefixes.setdefault(endpoint.split(":", 1)[0], _EndpointCacheStats()).add(stats)
+            return {
+                "endpoints": {name: stats.as_dict() for name, stats in sorted(endpoints.items())},
+                "prefixes": {name: stats.as_dict() for name, stats in sorted(prefixes.items())},
+                "l1": {
+                    "entries": len(local_cache),
+                    "size_bytes": local_cache.size_bytes,
+                    "max_bytes": local_cache.max_bytes,
+                    "evictions": local_cache.evictions,
+                } if local_cache is not None else None,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+cache_analytics = CacheAnalytics()
+
+cache_backend: CacheBackend = create_cache_backend(
+    cache_serializer,
+    on_evict=lambda key: cache_analytics.record_eviction(_endpoint_of(key))
+)
+
+# The backend's in-process tier (None for the plain Redis backend)
+local_cache: Optional[LocalLRUCache] = cache_backend.local_tier
+
+# Export cache_manager for external use
+cache_manager = cache_backend
+
+# Failures of the cache backend itself. Cached endpoints treat them as misses and are served
+# uncached, and invalidations are skipped, rather than failing while Redis is down or its
+# circuit breaker is open.
+_BACKEND_ERRORS = (RedisError, CircuitBreakerOpenError, OSError)
+
+
+async def _publish_invalidation(message: Dict[str, Any]) -> None:
+    """Tells other workers to drop matching entries from their in-process caches."""
+    try:
+        await cache_backend.publish(
+            settings.CACHE_INVALIDATION_CHANNEL,
+            json.dumps({"origin": _WORKER_ID, **message})
+        )
+    except _BACKEND_ERRORS as e:
+        # Other workers' L1 entries will still expire within CACHE_L1_TTL.
+        logger.warning(f"Failed to broadcast cache invalidation: {str(e)}")
+
+
+def _apply_invalidation(message: Dict[str, Any]) -> None:
+    if message.get("origin") == _WORKER_ID:
+        return
+    cache_backend.discard_local(*message.get("keys", []))
+
+
+async def _listen_for_invalidations() -> None:
+    """Applies invalidations broadcast by other workers, reconnecting on failure."""
+    backoff = 1.0
+    while True:
+        try:
+            async for message in cache_backend.subscribe(settings.CACHE_INVALIDATION_CHANNEL):
+                backoff = 1.0
+                try:
+                    _apply_invalidation(json.loads(message))
+                except (ValueError, TypeError) as e:
+                    logger.error(f"Invalid cache invalidation message: {str(e)}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # While disconnected we may miss invalidations; drop L1 so nothing stale outlives the outage.
+            cache_backend.clear_local()
+            logger.error(f"Cache invalidation listener error: {str(e)}; reconnecting in {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+
+async def _sample_cache_size() -> None:
+    """Periodically records the backend's memory usage, keeping e.g. Redis INFO off the request path."""
+    while True:
+        try:
+            used = await cache_backend.memory_usage()
+            if used is not None:
+                CACHE_SIZE.set(used)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to sample cache size: {str(e)}")
+        await asyncio.sleep(settings.CACHE_SIZE_SAMPLE_INTERVAL)
+
+
+# Calls per endpoint and canonical parameter set since the last flush to the backend.
+_access_counts: Dict[str, Dict[str, int]] = {}
+
+# Set while the cache warmer replays calls, so warming does not count as traffic.
+cache_warmup_active: contextvars.ContextVar[bool] = contextvars.ContextVar("cache_warmup_active", default=False)
+
+
+def _record_access(endpoint: str, canonical_params: str) -> None:
+    if cache_warmup_active.get():
+        return
+    counts = _access_counts.setdefault(endpoint, {})
+    counts[canonical_params] = counts.get(canonical_params, 0) + 1
+
+
+async def flush_access_stats() -> None:
+    """Adds this worker's access counts to the shared per-endpoint counters, keeping only the hottest entries."""
+    global _access_counts
+    if not _access_counts:
+        return
+    counts, _access_counts = _access_counts, {}
+    for endpoint, endpoint_counts in counts.items():
+        await cache_backend.increment_counts(
+            f"{ACCESS_KEY_PREFIX}{endpoint}",
+            endpoint_counts,
+            keep=settings.CACHE_ACCESS_STATS_MAX_ENTRIES,
+            ttl=settings.CACHE_ACCESS_STATS_TTL
+        )
+
+
+async def get_hot_params(endpoint: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Returns the parameter sets an endpoint is most often called with, hottest first.
+
+    Args:
+        endpoint: Endpoint name as "<key_prefix>:<function name>"
+        limit: Maximum number of parameter sets to return
+    """
+    members = await cache_backend.top_counted(f"{ACCESS_KEY_PREFIX}{endpoint}", limit)
+    return [json.loads(member) for member in members]
+
+
+async def _flush_access_stats_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.CACHE_ACCESS_FLUSH_INTERVAL)
+        try:
+            await flush_access_stats()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to flush cache access stats: {str(e)}")
+
+
+_background_tasks: List[asyncio.Task] = []
+
+
+def start_cache_tasks() -> None:
+    """Starts the invalidation listener, cache size sampler and access stats flusher for this worker."""
+    if _background_tasks:
+        return
+    loop = asyncio.get_running_loop()
+    if cache_backend.shared and cache_backend.local_tier is not None:
+        # Only needed when other workers can invalidate entries this worker holds locally
+        _background_tasks.append(loop.create_task(_listen_for_invalidations()))
+    _background_tasks.append(loop.create_task(_sample_cache_size()))
+    _background_tasks.append(loop.create_task(_flush_access_stats_periodically()))
+
+
+async def close_cache() -> None:
+    """Stops the background tasks, flushes access stats and closes the cache backend's connections."""
+    for task in _background_tasks:
+        task.cancel()
+    for task in _background_tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _background_tasks.clear()
+    try:
+        await flush_access_stats()
+    except Exception as e:
+        logger.warning(f"Failed to flush cache access stats: {str(e)}")
+    await cache_backend.close()
+
+
+def _resolve_tags(tag_templates: Sequence[str], params: Dict[str, Any]) -> List[str]:
+    """Formats tag templates such as "workflow_definition:{wf_def_id}" with the call's arguments."""
+    tags = []
+    for template in tag_templates:
+        try:
+            tags.append(template.format(**params))
+        except (KeyError, IndexError) as e:
+            logger.warning(f"Cannot resolve cache tag '{template}': missing argument {str(e)}")
+    return tags
+
+
+def _normalize_key_value(value: Any) -> Any:
+    """Converts a key parameter into a JSON-serializable value with a stable representation."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Enum):
+        return _normalize_key_value(value.value)
+    if isinstance(value, (uuid.UUID, date)):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(_normalize_key_value(v) for v in value)
+    if isinstance(value, (list, tuple)):
+        return [_normalize_key_value(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _normalize_key_value(v) for k, v in value.items()}
+    if hasattr(value, "model_dump"):
+        return _normalize_key_value(value.model_dump(mode="json"))
+    raise TypeError(f"Cannot use value of type {type(value).__name__} in a cache key")
+
+
+def build_cache_key(key_prefix: str, name: str, params: Dict[str, Any]) -> str:
+    """
+    Builds a compact, deterministic cache key.
+
+    Parameters are normalized (sorted, UUIDs/dates/enums stringified) and hashed, so the
+    key has a fixed length and is identical across processes for the same inputs.
+
+    Args:
+        key_prefix: Prefix for the key, also used as the entry's default tag
+        name: Endpoint name
+        params: Cache-relevant parameters
+
+    Returns:
+        str: Key of the form "<prefix>:<name>:<digest>"
+    """
+    return f"{key_prefix}:{name}:{_digest(_canonical_params(params))}"
+
+
+def _canonical_params(params: Dict[str, Any]) -> str:
+    return json.dumps(
+        {k: _normalize_key_value(v) for k, v in params.items()},
+        sort_keys=True,
+        separators=(",", ":")
+    )
+
+
+def _digest(canonical_params: str) -> str:
+    return hashlib.blake2b(canonical_params.encode(), digest_size=16).hexdigest()
+
+
+def _user_scope(arguments: Dict[str, Any]) -> Any:
+    """Identifies the caller, from an injected `current_user` or the request's state."""
+    current_user = arguments.get("current_user")
+    if current_user is not None:
+        return getattr(current_user, "id", current_user)
+    request = arguments.get("request")
+    state = getattr(request, "state", None)
+    return getattr(state, "user_id", None)
+
+
+def _is_plain_value(value: Any) -> bool:
+    """Whether an argument is a plain value (path/query parameter) rather than an injected object."""
+    return (
+        value is None or isinstance(value, _KEY_SCALAR_TYPES)
+        or (isinstance(value, (list, tuple, set, frozenset)) and all(isinstance(v, _KEY_SCALAR_TYPES) for v in value))
+    )
+
+
+def _key_params(arguments: Dict[str, Any], key_fields: Optional[Sequence[str]], vary_on_user: bool) -> Dict[str, Any]:
+    """
+    Selects the arguments a response depends on.
+
+    With explicit `key_fields`, exactly those arguments are used. Otherwise every argument
+    holding a plain value (the endpoint's path and query parameters) is used, while
+    injected objects such as Request, Session and services are skipped.
+    """
+    if key_fields is not None:
+        params = {name: arguments.get(name) for name in key_fields}
+    else:
+        params = {name: value for name, value in arguments.items() if _is_plain_value(value)}
+    if vary_on_user:
+        params["__user__"] = _user_scope(arguments)
+    return params
+
+
+# Computations in progress in this process, so concurrent misses for a key share one result.
+_inflight: Dict[str, "asyncio.Future[Any]"] = {}
+
+def _lock_key(cache_key: str) -> str:
+    return f"cache:lock:{cache_key}"
+
+
+class _CacheEntry(NamedTuple):
+    """
+    A cached value and the wall-clock time until which it is fresh.
+
+    Negative entries (`not_found`) remember that the endpoint answered 404; `value` then
+    holds the error detail.
+    """
+    value: Any
+    fresh_until: float
+    not_found: bool = False
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.fresh_until
+
+    def resolve(self) -> Any:
+        """Returns the cached value, or re-raises the cached 404."""
+        if self.not_found:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=self.value)
+        return self.value
+
+
+_background_refreshes: Set[asyncio.Task] = set()
+
+def _jittered(ttl: float) -> float:
+    """Shortens a TTL by a random fraction so keys written together do not expire together."""
+    return ttl * (1 - random.uniform(0, settings.CACHE_TTL_JITTER))
+
+
+async def _load(cache_key: str, local_ttl: float) -> Any:
+    """Looks a key up in the cache backend (its local tier first, if any). Returns a `_CacheEntry` or `_MISS`."""
+    try:
+        data = await cache_backend.get(cache_key, local_ttl)
+        if data is _MISS:
+            return _MISS
+        if "nf" in data:
+            return _CacheEntry(data["nf"], data["f"], not_found=True)
+        return _CacheEntry(data["v"], data["f"])
+    except (CacheSerializationError, ValueError, TypeError, KeyError) as e:
+        # Unreadable (e.g. written in an older format): treat as a miss and overwrite.
+        logger.warning(f"Discarding unreadable cache entry {cache_key}: {str(e)}")
+        return _MISS
+    except _BACKEND_ERRORS as e:
+        logger.warning(f"Cache backend unavailable, reading {cache_key} as a miss: {str(e)}")
+        return _MISS
+
+
+async def _store(
+    cache_key: str,
+    result: Any,
+    timeout: int,
+    stale_ttl: int,
+    tags: List[str],
+    tag_ttl: int,
+    not_found: bool = False
+) -> None:
+    """
+    Writes a result to the cache backend with jittered soft/hard TTLs, and records it under its tags.
+
+    With `not_found`, `result` is the detail of a 404 and a negative entry is written.
+    """
+    soft_ttl = _jittered(timeout)
+    hard_ttl = soft_ttl + stale_ttl
+    envelope = {"nf" if not_found else "v": result, "f": time.time() + soft_ttl}
+    try:
+        size = await cache_backend.set(cache_key, envelope, hard_ttl, tags, tag_ttl)
+    except CacheSerializationError as e:
+        # The response is still returned, just not cached
+        logger.warning(f"Not caching {cache_key}: {str(e)}")
+        return
+    except _BACKEND_ERRORS as e:
+        logger.warning(f"Cache backend unavailable, not caching {cache_key}: {str(e)}")
+        return
+    cache_analytics.record_write(_endpoint_of(cache_key), size)
+
+
+async def _revalidate(cache_key: str, fill: Callable[[], Any]) -> None:
+    """Recomputes a stale entry in the background, unless another worker is already doing so."""
+    token = uuid.uuid4().hex
+    lock_key = _lock_key(cache_key)
+    try:
+        if not await cache_backend.acquire_lock(lock_key, token, settings.CACHE_LOCK_TIMEOUT):
+            return
+        try:
+            await fill()
+            CACHE_REFRESHES.inc()
+        finally:
+            await cache_backend.release_lock(lock_key, token)
+    except Exception as e:
+        # The stale value keeps being served until the hard TTL; the next stale hit retries.
+        logger.warning(f"Background refresh of {cache_key} failed: {str(e)}")
+
+
+def _detached_fill(endpoint: str, arguments: Dict[str, Any], fill: Callable[..., Any]) -> Optional[Callable[[], Any]]:
+    """
+    Returns a `fill` that can run after the request has finished, or None if there is none.
+
+    Injected arguments (DB session, Request, services) belong to the request and are torn
+    down with it, so they are rebuilt from a fresh DB session with the dependency factory
+    the endpoint registered with the cache warmer. Endpoints that take injected arguments
+    but have no such registration cannot be refreshed in the background.
+    """
+    plain = {name: value for name, value in arguments.items() if _is_plain_value(value)}
+    if len(plain) == len(arguments):
+        return lambda: fill(plain)
+
+    from mcp.core.cache_warmer import cache_warmer
+    if not cache_warmer.is_registered(endpoint):
+        return None
+
+    async def refill() -> Any:
+        async with cache_warmer.rebuilt_dependencies(endpoint) as dependencies:
+            return await fill({**plain, **dependencies})
+
+    return refill
+
+
+def _schedule_revalidation(cache_key: str, fill: Callable[[], Any]) -> None:
+    if cache_key in _inflight:
+        return
+    future = asyncio.get_running_loop().create_future()
+    _inflight[cache_key] = future
+
+    async def run() -> None:
+        try:
+            await _revalidate(cache_key, fill)
+        finally:
+            _inflight.pop(cache_key, None)
+            # Waiters fall back to computing themselves when the shared future is cancelled.
+            future.cancel()
+
+    task = asyncio.get_running_loop().create_task(run())
+    _background_refreshes.add(task)
+    task.add_done_callback(_background_refreshes.discard)
+
+
+async def _compute_with_lock(cache_key: str, local_ttl: float, fill: Callable[[], Any]) -> Any:
+    """
+    Runs `fill` (compute and store) for a missing key, letting at most one process do so at a time.
+
+    The process that takes the backend lock computes and stores the result; the others poll
+    the cache until it appears. If the lock holder takes longer than CACHE_LOCK_TIMEOUT
+    (or died), waiters stop waiting and compute the value themselves.
+    """
+    token = uuid.uuid4().hex
+    lock_key = _lock_key(cache_key)
+    try:
+        acquired = await cache_backend.acquire_lock(lock_key, token, settings.CACHE_LOCK_TIMEOUT)
+    except _BACKEND_ERRORS as e:
+        # No other worker can publish a result through the cache either; just compute.
+        logger.warning(f"Cache backend unavailable, computing {cache_key} without the lock: {str(e)}")
+        return await fill()
+    if not acquired:
+        deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.CACHE_LOCK_POLL_INTERVAL)
+            entry = await _load(cache_key, local_ttl)
+            if entry is not _MISS and entry.is_fresh:
+                CACHE_COALESCED.inc()
+                return entry.resolve()
+        logger.warning(f"Timed out waiting for another worker to compute {cache_key}; computing locally")
+
+    try:
+        return await fill()
+    finally:
+        if acquired:
+            await _release_lock(lock_key, token)
+
+
+async def _release_lock(lock_key: str, token: str) -> None:
+    try:
+        await cache_backend.release_lock(lock_key, token)
+    except _BACKEND_ERRORS as e:
+        # The lock expires on its own after CACHE_LOCK_TIMEOUT
+        logger.warning(f"Could not release cache lock {lock_key}: {str(e)}")
+
+
+# Functions decorated with cache_response, by "<key_prefix>:<function name>".
+cached_endpoints: Dict[str, Callable[..., Any]] = {}
+
+
 def cache_response(
     timeout: int,
-    key_prefix: str = "workflow"
+    key_prefix: str = "workflow",
+    tags: Optional[Sequence[str]] = None,
+    stale_ttl: int = 0,
+    key_fields: Optional[Sequence[str]] = None,
+    vary_on_user: bool = False,
+    negative_ttl: int = 0,
+    cache_found: bool = True
 ) -> Callable:
     """
-    Decorator to cache API responses using Redis.
-    
+    Decorator to cache API responses in a two-tier cache.
+
+    Entries live in the backend chosen by CACHE_BACKEND. With the default tiered backend,
+    lookups check the in-process L1 cache first, then Redis (L2); L2 hits are promoted
+    into L1 for at most CACHE_L1_TTL seconds.
+
+    Sync endpoints can be decorated too: the wrapper is async so cache lookups run on the
+    event loop, while the endpoint itself runs in the threadpool like any sync FastAPI route.
+
+    Concurrent misses for the same key are coalesced: within a process they await one
+    shared computation, and across processes a short backend lock lets one worker compute
+    while the others wait for its result.
+
+    With `stale_ttl`, an entry older than `timeout` (the soft TTL) is still served for up
+    to `stale_ttl` more seconds while one background refresh recomputes it; only after
+    that hard TTL does a caller block on the computation. The refresh runs after the
+    request has finished, so injected arguments (DB session, Request, services) are
+    rebuilt from a fresh session with the endpoint's cache warmer registration; without
+    one, stale entries of such endpoints are recomputed by the request instead. Both TTLs
+    are jittered by up to CACHE_TTL_JITTER.
+
+    Keys are built by `build_cache_key` from the endpoint's path and query parameters, or
+    from exactly `key_fields` when given; injected Request/Session/service objects never
+    contribute. Responses that differ per caller must set `vary_on_user`.
+
+    Every entry is tagged with `key_prefix` plus any `tags`, which are format strings
+    filled from the endpoint's arguments. `invalidate_tags` drops all entries
+    carrying a tag without scanning the keyspace.
+
+    With `negative_ttl`, a 404 HTTPException raised by the endpoint is cached for that
+    many seconds (no stale period) and re-raised on hits, so repeated lookups of missing
+    IDs stop reaching the database. Negative entries carry only `tags`, not `key_prefix`,
+    and their tag indexes expire with them. Tag them with the looked-up ID and call
+    `invalidate_not_found` when an entity with a client-chosen ID is created.
+
     Args:
         timeout: Cache timeout in seconds
         key_prefix: Prefix for cache keys
-    
+        tags: Tag templates, e.g. ["workflow_definition:{wf_def_id}"]
+        stale_ttl: Seconds past `timeout` during which a stale entry is served while it is refreshed
+        key_fields: Names of the parameters the response depends on, e.g. ["wf_def_id", "skip"]
+        vary_on_user: Whether to include the current user's id in the key
+        negative_ttl: Seconds to cache 404 responses for (0 disables negative caching)
+        cache_found: Whether successful responses are cached (False caches only 404s)
+
     Returns:
         Decorated function with caching
     """
+    local_ttl = min(timeout + stale_ttl, settings.CACHE_L1_TTL)
+    tag_ttl = max(timeout + stale_ttl, settings.CACHE_TAG_TTL)
+    tag_templates = list(tags or [])
+
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        endpoint = f"{key_prefix}:{func.__name__}"
+        signature = inspect.signature(func)
+        is_async = inspect.iscoroutinefunction(func)
+        if key_fields is not None:
+            unknown = [name for name in key_fields if name not in signature.parameters]
+            if unknown:
+                raise ValueError(f"Cache key fields {unknown} are not parameters of {func.__name__}")
+
         @wraps(func)
         async def wrapper(*args: Any, **kwargs: Any) -> T:
             try:
-                # Generate cache key based on function name and arguments
-                cache_key = f"{key_prefix}:{func.__name__}:{str(args)}:{str(kwargs)}"
-                
-                # Check cache first
-                cached_result = redis_client.get(cache_key)
-                if cached_result:
-                    CACHE_HIT.inc()
-                    return pickle.loads(cached_result)  # Use pickle for security
-                
+                # Generate cache key from the cache-relevant arguments only
+                arguments = signature.bind_partial(*args, **kwargs).arguments
+                canonical_params = _canonical_params(_key_params(arguments, key_fields, vary_on_user))
+                cache_key = f"{endpoint}:{_digest(canonical_params)}"
+                if not vary_on_user:
+                    # Per-user entries are not worth pre-warming, so they are not tracked
+                    _record_access(endpoint, canonical_params)
+
+                async def fill(call_arguments: Optional[Dict[str, Any]] = None) -> T:
+                    resolved_tags = _resolve_tags(tag_templates, arguments)
+                    try:
+                        call_args, call_kwargs = (args, kwargs) if call_arguments is None else ((), call_arguments)
+                        if is_async:
+                            result = await func(*call_args, **call_kwargs)
+                        else:
+                            # Blocking (e.g. sync SQLAlchemy) endpoints run off the event loop, as FastAPI would run them
+                            result = await run_in_threadpool(func, *call_args, **call_kwargs)
+                    except HTTPException as e:
+                        if negative_ttl and e.status_code == status.HTTP_404_NOT_FOUND:
+                            # Not indexed under the prefix, and the tag indexes expire with the entry, so
+                            # probing many unknown IDs does not leave a long-lived index entry per ID
+                            await _store(cache_key, e.detail, negative_ttl, 0, resolved_tags, negative_ttl, not_found=True)
+                        raise
+                    if cache_found:
+                        await _store(cache_key, result, timeout, stale_ttl, [key_prefix, *resolved_tags], tag_ttl)
+                    return result
+
+                entry = await _load(cache_key, local_ttl)
+                if entry is not _MISS:
+                    stale = not entry.is_fresh
+                    refill = _detached_fill(endpoint, arguments, fill) if stale else None
+                    if not stale or refill is not None:
+                        CACHE_HIT.inc()
+                        cache_analytics.record_hit(endpoint, stale=stale)
+                        if stale:
+                            CACHE_STALE_HIT.inc()
+                            _schedule_revalidation(cache_key, refill)
+                        return entry.resolve()
+
                 CACHE_MISS.inc()
-                
-                # If not cached, execute function
-                result = await func(*args, **kwargs)
-                
-                # Cache the result using pickle for security
-                redis_client.setex(
-                    cache_key,
-                    timeout,
-                    pickle.dumps(result)
-                )
-                
-                # Update cache size metric
-                cache_size = redis_client.info('memory')['used_memory']
-                CACHE_SIZE.set(cache_size)
-                
-                return result
-                
-            except redis.exceptions.RedisError as e:
+
+                miss_started = time.perf_counter()
+                try:
+                    # Another request in this process is already computing this key
+                    while cache_key in _inflight:
+                        inflight = _inflight[cache_key]
+                        try:
+                            result = await asyncio.shield(inflight)
+                            CACHE_COALESCED.inc()
+                            return result
+                        except asyncio.CancelledError:
+                            # Re-raise if we were cancelled; if the computing request was, take over.
+                            if not inflight.cancelled():
+                                raise
+
+                    future = asyncio.get_running_loop().create_future()
+                    _inflight[cache_key] = future
+                    try:
+                        result = await _compute_with_lock(cache_key, local_ttl, fill)
+                        future.set_result(result)
+                        return result
+                    except asyncio.CancelledError:
+                        future.cancel()
+                        raise
+                    except Exception as e:
+                        future.set_exception(e)
+                        # Mark retrieved so an exception nobody else awaited is not logged as unhandled.
+                        future.exception()
+                        raise
+                    finally:
+                        _inflight.pop(cache_key, None)
+                finally:
+                    cache_analytics.record_miss(endpoint, time.perf_counter() - miss_started)
+
+            except RedisError as e:
                 logger.error(f"Redis error in cache operation: {str(e)}")
                 raise
+            except HTTPException:
+                # The endpoint's own error response, not a cache failure
+                raise
             except Exception as e:
                 logger.error(f"Cache error: {str(e)}")
                 raise
-        
+
+        wrapper.cache_endpoint = endpoint
+        cached_endpoints[endpoint] = wrapper
         return wrapper
-    
+
     return decorator
 
-def invalidate_cache(key_prefix: str = "workflow") -> None:
+
+def cache_not_found(
+    key_prefix: str,
+    tags: Optional[Sequence[str]] = None,
+    ttl: Optional[int] = None,
+    key_fields: Optional[Sequence[str]] = None
+) -> Callable:
     """
-    Invalidate all cache entries with the given prefix.
-    
+    Decorator that caches only the 404 responses of an endpoint (negative caching).
+
+    Successful responses always reach the endpoint. Entries expire after `ttl` seconds
+    (CACHE_NEGATIVE_TTL by default) or when `invalidate_not_found` is called for the ID.
+
     Args:
-        key_prefix: Prefix of cache keys to invalidate
+        key_prefix: Prefix for cache keys
+        tags: Tag templates naming the looked-up ID, e.g. [not_found_tag("{entity_id}")]
+        ttl: Seconds to remember a 404
+        key_fields: Names of the parameters the response depends on
+
+    Returns:
+        Decorated function with negative caching
     """
+    ttl = ttl or settings.CACHE_NEGATIVE_TTL
+    return cache_response(
+        timeout=ttl,
+        key_prefix=key_prefix,
+        tags=tags,
+        key_fields=key_fields,
+        negative_ttl=ttl,
+        cache_found=False
+    )
+
+
+def not_found_tag(entity_id: Any) -> str:
+    """Tag carried by negative cache entries for an entity ID (also usable as a template)."""
+    return f"not_found:{entity_id}"
+
+
+async def invalidate_not_found(*entity_ids: Any) -> int:
+    """
+    Drops cached 404s for the given entity IDs, e.g. right after the entity was created.
+
+    Args:
+        entity_ids: IDs of the entities that now exist
+
+    Returns:
+        int: Number of cache entries invalidated
+    """
+    return await invalidate_tags(*(not_found_tag(entity_id) for entity_id in entity_ids))
+
+async def invalidate_tags(*tags: str) -> int:
+    """
+    Invalidate every cache entry carrying any of the given tags, in the backend and in every worker's L1 cache.
+
+    Cost is proportional to the number of entries under the tags, not to the size of the keyspace.
+
+    Args:
+        tags: Tags to invalidate, e.g. "workflow_definition:42"
+
+    Returns:
+        int: Number of cache entries invalidated
+    """
+    if not tags:
+        return 0
     try:
-        keys = redis_client.keys(f"{key_prefix}:*")
-        if keys:
-            redis_client.delete(*keys)
-            logger.info(f"Invalidated {len(keys)} cache entries with prefix {key_prefix}")
-    except redis.exceptions.RedisError as e:
-        logger.error(f"Redis error while invalidating cache: {str(e)}")
-        raise
+        keys = sorted(await cache_backend.tag_members(*tags))
+    except _BACKEND_ERRORS as e:
+        # The write that triggered this has already been committed, so it must not fail now.
+        # Which keys carry the tags is unknown: drop this worker's copies wholesale, and let
+        # the shared entries expire with their TTL.
+        cache_backend.clear_local()
+        logger.warning(f"Cache backend unavailable, could not invalidate tags {list(tags)}: {str(e)}")
+        return 0
+    cache_backend.discard_local(*keys)
+    if keys and cache_backend.shared:
+        await _publish_invalidation({"keys": keys})
+    try:
+        await cache_backend.delete(*keys, tags=tags)
+    except _BACKEND_ERRORS as e:
+        logger.warning(f"Cache backend unavailable, could not invalidate tags {list(tags)}: {str(e)}")
+        return 0
+    logger.info(f"Invalidated {len(keys)} cache entries for tags {list(tags)}")
+    return len(keys)
+
+async def invalidate_cache(key_prefix: str = "workflow") -> None:
+    """
+    Invalidate all cache entries with the given prefix, in the backend and in every worker's L1 cache.
+
+    Cached 404s are not indexed under their prefix; they expire within their short TTL.
 
-def cache_key_exists(key: str) -> bool:
+    Args:
+        key_prefix: Prefix of cache keys to invalidate
+    """
+    # Every entry is tagged with its key prefix, so no keyspace scan is needed.
+    await invalidate_tags(key_prefix)
+
+async def cache_key_exists(key: str) -> bool:
     """
     Check if a specific cache key exists.
-    
+
     Args:
         key: Cache key to check
-    
+
     Returns:
-        bool: True if key exists, False otherwise
+        bool: True if key exists, False otherwise (also while the cache backend is unavailable)
     """
-    return redis_client.exists(key) > 0
+    try:
+        return await cache_backend.exists(key)
+    except _BACKEND_ERRORS as e:
+        logger.warning(f"Cache backend unavailable, reporting {key} as absent: {str(e)}")
+        return False
 
-def get_cache_ttl(key: str) -> Optional[int]:
+async def get_cache_ttl(key: str) -> Optional[int]:
     """
     Get the remaining time-to-live for a cache key.
-    
+
     Args:
         key: Cache key to check
-    
+
     Returns:
         int: Remaining TTL in seconds, or None if key doesn't exist
     """
-    ttl = redis_client.ttl(key)
-    return ttl if ttl >= 0 else None
+    return await cache_backend.ttl(key)
@@ -0,0 +1,611 @@
+"""
+Storage backends for the response cache.
+
+`cache_response` and the tag, lock, access-statistics and invalidation helpers in
+`mcp.core.cache` talk to a `CacheBackend` rather than to Redis directly, so the same code
+runs against:
+
+- `RedisCacheBackend`: entries shared by every worker, serialized into Redis.
+- `MemoryCacheBackend`: entries kept as live objects in this process; no network round
+  trips, for single-node deployments and tests.
+- `TieredCacheBackend`: a small in-process tier in front of a shared backend (the default).
+
+Backends store cache entries, not bytes: whether and how an entry is serialized is the
+backend's concern. The backend is chosen with the CACHE_BACKEND setting.
+"""
+import abc
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from prometheus_client import Counter, Gauge
+
+from mcp.core.circuit_breaker import CircuitBreaker, circuit_breakers
+from mcp.core.settings import settings
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:  # Only RedisCacheBackend needs the client library
+    aioredis = None
+
+    class RedisError(Exception):
+        """Stand-in so callers can still catch Redis errors when redis is not installed."""
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+CACHE_L1_HIT = Counter(
+    'cache_l1_hits_total',
+    'Total number of cache hits served from the in-process cache'
+)
+
+CACHE_L1_SIZE = Gauge(
+    'cache_l1_size_bytes',
+    'Current size of the in-process cache in bytes'
+)
+
+# Sentinel for "not in cache", since None is a legitimate cached value.
+_MISS = object()
+
+# Redis sets tracking which cache keys carry a tag live under this prefix.
+TAG_KEY_PREFIX = "cache:tag:"
+
+# Deletes a lock only if it still holds our token, so an expired lock re-acquired elsewhere is left alone.
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LocalLRUCache:
+    """
+    In-process L1 cache with a byte-size bound, per-entry TTL and LRU eviction.
+
+    Values are stored as live objects, so a hit costs a dict lookup rather than a Redis
+    round trip plus unpickling. Callers must not mutate values returned from the cache.
+
+    Args:
+        max_bytes: Upper bound on the summed serialized size of stored values.
+        on_evict: Called with the key of each entry evicted to stay within `max_bytes`.
+        on_remove: Called with the key of every entry that leaves the cache, whether it was
+            evicted, expired, deleted, replaced or cleared. Runs under the cache's lock.
+    """
+    def __init__(
+        self,
+        max_bytes: int,
+        on_evict: Optional[Callable[[str], None]] = None,
+        on_remove: Optional[Callable[[str], None]] = None
+    ):
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.on_remove = on_remove
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        """Returns the cached value, or the `_MISS` sentinel if absent or expired."""
+        entry = self.get_with_size(key)
+        return entry[0] if entry is not None else _MISS
+
+    def get_with_size(self, key: str) -> Optional[Tuple[Any, int, float]]:
+        """Returns (value, size, seconds left), or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, size, expires_at = entry
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                self._remove_locked(key)
+                return None
+            self._entries.move_to_end(key)
+            return value, size, remaining
+
+    def set(self, key: str, value: Any, size: int, ttl: float) -> bool:
+        """
+        Stores a value; `size` is its serialized size and counts toward the byte budget.
+
+        Returns:
+            bool: False if the value was not stored (larger than the budget, or no TTL left)
+        """
+        if size > self.max_bytes or ttl <= 0:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self._size_bytes += size
+            while self._size_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove_locked(oldest_key)
+                self.evictions += 1
+                if self.on_evict is not None:
+                    self.on_evict(oldest_key)
+        CACHE_L1_SIZE.set(self._size_bytes)
+        return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+        CACHE_L1_SIZE.set(self._size_bytes)
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Removes all entries whose key starts with `prefix`; returns how many were removed."""
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                self._remove_locked(key)
+        CACHE_L1_SIZE.set(self._size_bytes)
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            if self.on_remove is not None:
+                for key in self._entries:
+                    self.on_remove(key)
+            self._entries.clear()
+            self._size_bytes = 0
+        CACHE_L1_SIZE.set(0)
+
+    def _remove_locked(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._size_bytes -= size
+        if self.on_remove is not None:
+            self.on_remove(key)
+
+
+class CacheBackend(abc.ABC):
+    """
+    Storage for cache entries plus the coordination primitives the cache needs.
+
+    Besides entries, a backend keeps tag indexes (which keys carry a tag), short-lived
+    locks, access counters and a broadcast channel for invalidations.
+    """
+
+    # Whether entries are visible to other processes (and invalidations must be broadcast).
+    shared: bool = False
+
+    @property
+    def local_tier(self) -> Optional[LocalLRUCache]:
+        """The in-process tier, if this backend has one."""
+        return None
+
+    async def get(self, key: str, local_ttl: Optional[float] = None) -> Any:
+        """Returns the entry stored under `key`, or `_MISS`."""
+        value, _ = await self.get_with_size(key, local_ttl)
+        return value
+
+    @abc.abstractmethod
+    async def get_with_size(self, key: str, local_ttl: Optional[float] = None) -> Tuple[Any, int]:
+        """
+        Returns the entry stored under `key` and its serialized size, or (`_MISS`, 0).
+
+        Args:
+            key: Cache key
+            local_ttl: Upper bound on how long an in-process tier may keep a copy
+        """
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: Any, ttl: float, tags: Sequence[str] = (), tag_ttl: int = 0) -> int:
+        """
+        Stores an entry for `ttl` seconds and records it under `tags`.
+
+        Returns:
+            int: Serialized size of the entry in bytes
+        """
+
+    @abc.abstractmethod
+    async def delete(self, *keys: str, tags: Sequence[str] = ()) -> None:
+        """Deletes entries and, with `tags`, the indexes of those tags."""
+
+    @abc.abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Whether an entry is stored under `key`."""
+
+    @abc.abstractmethod
+    async def ttl(self, key: str) -> Optional[int]:
+        """Remaining lifetime of an entry in seconds, or None if there is no entry."""
+
+    @abc.abstractmethod
+    async def tag_members(self, *tags: str) -> Set[str]:
+        """Keys of all entries carrying any of `tags`."""
+
+    @abc.abstractmethod
+    async def acquire_lock(self, key: str, token: str, ttl: float) -> bool:
+        """Takes the lock `key` for `ttl` seconds unless someone else holds it."""
+
+    @abc.abstractmethod
+    async def release_lock(self, key: str, token: str) -> None:
+        """Releases the lock `key` if it is still held with `token`."""
+
+    @abc.abstractmethod
+    async def increment_counts(self, key: str, counts: Dict[str, int], keep: int, ttl: int) -> None:
+        """Adds `counts` to the counter set `key`, keeping only its `keep` highest members."""
+
+    @abc.abstractmethod
+    async def top_counted(self, key: str, limit: int) -> List[str]:
+        """Members of the counter set `key` with the highest counts, highest first."""
+
+    @abc.abstractmethod
+    async def publish(self, channel: str, message: str) -> None:
+        """Broadcasts a message to every subscriber of `channel`."""
+
+    @abc.abstractmethod
+    def subscribe(self, channel: str) -> AsyncIterator[str]:
+        """Yields messages published to `channel` until the subscription fails or is cancelled."""
+
+    def discard_local(self, *keys: str) -> None:
+        """Drops in-process copies of entries (after another worker invalidated them)."""
+        local = self.local_tier
+        if local is not None:
+            for key in keys:
+                local.delete(key)
+
+    def clear_local(self) -> None:
+        """Drops every in-process copy, e.g. when invalidations may have been missed."""
+        local = self.local_tier
+        if local is not None:
+            local.clear()
+
+    async def memory_usage(self) -> Optional[int]:
+        """Bytes used by the backend's storage, if known."""
+        return None
+
+    async def close(self) -> None:
+        """Releases connections held by the backend."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Keeps entries as live objects in this process.
+
+    Entries are serialized once when stored, only to measure them against `max_bytes`.
+    Tags, locks, counters and broadcasts are process-local, so this backend suits a
+    single worker or tests, or serves as the local tier of `TieredCacheBackend`.
+    An entry leaves its tag indexes when it is evicted, expires or is deleted, so the
+    indexes stay bounded by the entries actually held.
+
+    Args:
+        serializer: Measures entries (anything with `dumps(value) -> bytes`).
+        max_bytes: Upper bound on the summed serialized size of stored entries.
+        on_evict: Called with the key of each entry evicted to stay within `max_bytes`.
+    """
+    def __init__(self, serializer: Any, max_bytes: int, on_evict: Optional[Callable[[str], None]] = None):
+        self.serializer = serializer
+        self.entries = LocalLRUCache(max_bytes=max_bytes, on_evict=on_evict, on_remove=self._untag)
+        self._tags: Dict[str, Set[str]] = {}
+        self._key_tags: Dict[str, Set[str]] = {}
+        self._locks: Dict[str, Tuple[str, float]] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+    @property
+    def local_tier(self) -> Optional[LocalLRUCache]:
+        return self.entries
+
+    async def get_with_size(self, key: str, local_ttl: Optional[float] = None) -> Tuple[Any, int]:
+        entry = self.entries.get_with_size(key)
+        if entry is None:
+            return _MISS, 0
+        return entry[0], entry[1]
+
+    async def set(self, key: str, value: Any, ttl: float, tags: Sequence[str] = (), tag_ttl: int = 0) -> int:
+        size = len(self.serializer.dumps(value))
+        if self.entries.set(key, value, size, ttl) and tags:
+            self._key_tags[key] = set(tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+        return size
+
+    async def delete(self, *keys: str, tags: Sequence[str] = ()) -> None:
+        for key in keys:
+            self.entries.delete(key)
+        for tag in tags:
+            self._tags.pop(tag, None)
+
+    def _untag(self, key: str) -> None:
+        """Removes a key that left the cache from the indexes of its tags."""
+        for tag in self._key_tags.pop(key, ()):
+            members = self._tags.get(tag)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._tags[tag]
+
+    async def exists(self, key: str) -> bool:
+        return self.entries.get_with_size(key) is not None
+
+    async def ttl(self, key: str) -> Optional[int]:
+        entry = self.entries.get_with_size(key)
+        return int(entry[2]) if entry is not None else None
+
+    async def tag_members(self, *tags: str) -> Set[str]:
+        members: Set[str] = set()
+        for tag in tags:
+            members.update(self._tags.get(tag, ()))
+        return members
+
+    async def acquire_lock(self, key: str, token: str, ttl: float) -> bool:
+        held = self._locks.get(key)
+        if held is not None and held[1] > time.monotonic():
+            return False
+        self._locks[key] = (token, time.monotonic() + ttl)
+        return True
+
+    async def release_lock(self, key: str, token: str) -> None:
+        held = self._locks.get(key)
+        if held is not None and held[0] == token:
+            del self._locks[key]
+
+    async def increment_counts(self, key: str, counts: Dict[str, int], keep: int, ttl: int) -> None:
+        counter = self._counts.setdefault(key, {})
+        for member, count in counts.items():
+            counter[member] = counter.get(member, 0) + count
+        if len(counter) > keep:
+            self._counts[key] = dict(sorted(counter.items(), key=lambda item: item[1], reverse=True)[:keep])
+
+    async def top_counted(self, key: str, limit: int) -> List[str]:
+        counter = self._counts.get(key, {})
+        return sorted(counter, key=counter.get, reverse=True)[:limit]
+
+    async def publish(self, channel: str, message: str) -> None:
+        for queue in self._subscribers.get(channel, []):
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(channel, []).append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[channel].remove(queue)
+
+    async def memory_usage(self) -> Optional[int]:
+        return self.entries.size_bytes
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Stores serialized entries in Redis, shared by every worker.
+
+    The client and its connection pool are created on first use, so importing the cache
+    neither requires the redis package nor a reachable server. Request-path commands go
+    through the shared "redis" circuit breaker, so while Redis is down they fail fast
+    instead of each waiting out the socket timeout.
+
+    Args:
+        serializer: Encodes and decodes entries (`dumps`/`loads`).
+        client: An existing async Redis client (built from settings when omitted).
+        breaker: Circuit breaker for Redis (the registry's "redis" breaker when omitted).
+    """
+    shared = True
+
+    def __init__(self, serializer: Any, client: Optional[Any] = None, breaker: Optional[CircuitBreaker] = None):
+        self.serializer = serializer
+        self._client = client
+        self._pool = None
+        self.breaker = breaker or circuit_breakers.get("redis", expected_exceptions=(RedisError, OSError))
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            if aioredis is None:
+                raise RuntimeError("The redis package is required for the Redis cache backend")
+            # Own connection pool, so cache I/O never blocks the event loop
+            self._pool = aioredis.ConnectionPool(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                password=settings.REDIS_PASSWORD,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                socket_timeout=settings.REDIS_TIMEOUT
+            )
+            self._client = aioredis.Redis(connection_pool=self._pool)
+        return self._client
+
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"{TAG_KEY_PREFIX}{tag}"
+
+    async def get_with_size(self, key: str, local_ttl: Optional[float] = None) -> Tuple[Any, int]:
+        async with self.breaker.protect():
+            payload = await self.client.get(key)
+        if not payload:
+            return _MISS, 0
+        return self.serializer.loads(payload), len(payload)
+
+    async def set(self, key: str, value: Any, ttl: float, tags: Sequence[str] = (), tag_ttl: int = 0) -> int:
+        payload = self.serializer.dumps(value)
+        async with self.breaker.protect(), self.client.pipeline(transaction=False) as pipe:
+            pipe.setex(key, max(1, int(ttl)), payload)
+            for tag in tags:
+                pipe.sadd(self._tag_key(tag), key)
+                pipe.expire(self._tag_key(tag), tag_ttl)
+            await pipe.execute()
+        return len(payload)
+
+    async def delete(self, *keys: str, tags: Sequence[str] = ()) -> None:
+        names = [*keys, *(self._tag_key(tag) for tag in tags)]
+        if names:
+            async with self.breaker.protect():
+                await self.client.delete(*names)
+
+    async def exists(self, key: str) -> bool:
+        async with self.breaker.protect():
+            return await self.client.exists(key) > 0
+
+    async def ttl(self, key: str) -> Optional[int]:
+        ttl = await self.client.ttl(key)
+        return ttl if ttl >= 0 else None
+
+    async def tag_members(self, *tags: str) -> Set[str]:
+        async with self.breaker.protect(), self.client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.smembers(self._tag_key(tag))
+            members = await pipe.execute()
+        return {
+            key.decode() if isinstance(key, bytes) else key
+            for tag_members in members
+            for key in tag_members
+        }
+
+    async def acquire_lock(self, key: str, token: str, ttl: float) -> bool:
+        async with self.breaker.protect():
+            return bool(await self.client.set(key, token, nx=True, px=int(ttl * 1000)))
+
+    async def release_lock(self, key: str, token: str) -> None:
+        async with self.breaker.protect():
+            await self.client.eval(_RELEASE_LOCK_SCRIPT, 1, key, token)
+
+    async def increment_counts(self, key: str, counts: Dict[str, int], keep: int, ttl: int) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for member, count in counts.items():
+                pipe.zincrby(key, count, member)
+            pipe.zremrangebyrank(key, 0, -keep - 1)
+            pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def top_counted(self, key: str, limit: int) -> List[str]:
+        members = await self.client.zrevrange(key, 0, limit - 1)
+        return [member.decode() if isinstance(member, bytes) else member for member in members]
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self.client.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        pubsub = self.client.pubsub()
+        try:
+            await pubsub.subscribe(channel)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    data = message["data"]
+                    yield data.decode() if isinstance(data, bytes) else data
+        finally:
+            try:
+                await pubsub.close()
+            except Exception:
+                pass
+
+    async def memory_usage(self) -> Optional[int]:
+        info = await self.client.info('memory')
+        return info['used_memory']
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.disconnect()
+
+
+class TieredCacheBackend(CacheBackend):
+    """
+    A shared backend fronted by an in-process tier of live entries.
+
+    Reads check the local tier first and promote shared hits into it for at most
+    `local_ttl` seconds; writes and deletes go to both tiers. Everything else (tags,
+    locks, counters, broadcasts) is handled by the shared backend.
+
+    Args:
+        local: The in-process tier.
+        remote: The shared backend.
+        local_ttl: Upper bound on how long this process serves an entry locally.
+    """
+    def __init__(self, local: MemoryCacheBackend, remote: CacheBackend, local_ttl: float):
+        self.local = local
+        self.remote = remote
+        self.local_ttl = local_ttl
+        self.shared = remote.shared
+
+    @property
+    def local_tier(self) -> Optional[LocalLRUCache]:
+        return self.local.entries
+
+    async def get_with_size(self, key: str, local_ttl: Optional[float] = None) -> Tuple[Any, int]:
+        entry = self.local.entries.get_with_size(key)
+        if entry is not None:
+            CACHE_L1_HIT.inc()
+            return entry[0], entry[1]
+        value, size = await self.remote.get_with_size(key)
+        if value is not _MISS:
+            ttl = self.local_ttl if local_ttl is None else min(local_ttl, self.local_ttl)
+            self.local.entries.set(key, value, size, ttl)
+        return value, size
+
+    async def set(self, key: str, value: Any, ttl: float, tags: Sequence[str] = (), tag_ttl: int = 0) -> int:
+        size = await self.remote.set(key, value, ttl, tags, tag_ttl)
+        self.local.entries.set(key, value, size, min(ttl, self.local_ttl))
+        return size
+
+    async def delete(self, *keys: str, tags: Sequence[str] = ()) -> None:
+        self.discard_local(*keys)
+        await self.remote.delete(*keys, tags=tags)
+
+    async def exists(self, key: str) -> bool:
+        return self.local.entries.get_with_size(key) is not None or await self.remote.exists(key)
+
+    async def ttl(self, key: str) -> Optional[int]:
+        return await self.remote.ttl(key)
+
+    async def tag_members(self, *tags: str) -> Set[str]:
+        return await self.remote.tag_members(*tags)
+
+    async def acquire_lock(self, key: str, token: str, ttl: float) -> bool:
+        return await self.remote.acquire_lock(key, token, ttl)
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self.remote.release_lock(key, token)
+
+    async def increment_counts(self, key: str, counts: Dict[str, int], keep: int, ttl: int) -> None:
+        await self.remote.increment_counts(key, counts, keep, ttl)
+
+    async def top_counted(self, key: str, limit: int) -> List[str]:
+        return await self.remote.top_counted(key, limit)
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self.remote.publish(channel, message)
+
+    def subscribe(self, channel: str) -> AsyncIterator[str]:
+        return self.remote.subscribe(channel)
+
+    async def memory_usage(self) -> Optional[int]:
+        return await self.remote.memory_usage()
+
+    async def close(self) -> None:
+        await self.remote.close()
+
+
+def create_cache_backend(serializer: Any, on_evict: Optional[Callable[[str], None]] = None) -> CacheBackend:
+    """
+    Builds the backend selected by CACHE_BACKEND ("tiered", "redis" or "memory").
+
+    Args:
+        serializer: Serializer used to encode (or measure) entries.
+        on_evict: Called with the key of each in-process entry evicted for space.
+    """
+    kind = settings.CACHE_BACKEND.lower()
+    if kind == "memory":
+        return MemoryCacheBackend(serializer, max_bytes=settings.CACHE_MEMORY_MAX_BYTES, on_evict=on_evict)
+    if kind == "redis":
+        return RedisCacheBackend(serializer)
+    if kind == "tiered":
+        return TieredCacheBackend(
+            MemoryCacheBackend(serializer, max_bytes=settings.CACHE_L1_MAX_BYTES, on_evict=on_evict),
+            RedisCacheBackend(serializer),
+            local_ttl=settings.CACHE_L1_TTL
+        )
+    raise ValueError(f"Unknown cache backend '{settings.CACHE_BACKEND}' (expected tiered, redis or memory)")
@@ -0,0 +1,145 @@
+"""
+Pre-populates the response cache with the entries workers are most likely to need.
+
+Endpoints decorated with `cache_response` record which parameter sets they are called
+with. The warmer replays the hottest ones through the cached endpoint itself, so entries
+land in Redis and the local tier under exactly the keys real requests will use. Each
+endpoint registers a factory for the dependencies FastAPI would normally inject (DB
+session, services, request). Background refreshes of stale entries reuse these
+factories, since the request that found the entry stale has closed its own session.
+"""
+import asyncio
+import inspect
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Union
+
+from sqlalchemy.orm import Session
+
+from mcp.core.cache import cache_warmup_active, cached_endpoints, get_hot_params
+from mcp.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+DependencyFactory = Callable[[Session], Dict[str, Any]]
+
+
+def warmup_request() -> Any:
+    """A stand-in for the Request object endpoints read `request.state` from."""
+    return SimpleNamespace(state=SimpleNamespace(request_id=f"cache-warmup-{uuid.uuid4()}", user_id=None))
+
+
+def _coerce_params(endpoint: Callable[..., Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    """Restores parameter types lost in the recorded form, e.g. UUIDs stored as strings."""
+    signature = inspect.signature(endpoint)
+    coerced = {}
+    for name, value in params.items():
+        parameter = signature.parameters.get(name)
+        annotation = parameter.annotation if parameter is not None else inspect.Parameter.empty
+        if isinstance(annotation, type) and value is not None and not isinstance(value, annotation):
+            try:
+                value = annotation(value)
+            except (TypeError, ValueError):
+                pass
+        coerced[name] = value
+    return coerced
+
+
+class CacheWarmer:
+    """
+    Replays the most-accessed calls of registered cached endpoints.
+
+    Args:
+        concurrency: Maximum number of endpoint calls in flight while warming.
+        top_n: Number of hottest parameter sets warmed per endpoint.
+        session_factory: Creates the DB session for each call (defaults to SessionLocal).
+    """
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        top_n: Optional[int] = None,
+        session_factory: Optional[Callable[[], Session]] = None
+    ):
+        self.concurrency = concurrency or settings.CACHE_WARMUP_CONCURRENCY
+        self.top_n = top_n or settings.CACHE_WARMUP_TOP_N
+        self.session_factory = session_factory
+        self._registrations: Dict[str, DependencyFactory] = {}
+
+    def register_endpoint(self, endpoint: Union[str, Callable[..., Any]], dependencies: Optional[DependencyFactory] = None) -> None:
+        """
+        Registers a cached endpoint for warming.
+
+        Args:
+            endpoint: The endpoint function (decorated with cache_response) or its "<key_prefix>:<name>".
+            dependencies: Builds the injected arguments (services, request, ...) from a DB session.
+        """
+        name = endpoint if isinstance(endpoint, str) else getattr(endpoint, "cache_endpoint", None)
+        if name is None:
+            raise ValueError(f"{endpoint!r} is not decorated with cache_response")
+        if name in self._registrations:
+            logger.warning(f"Overwriting existing cache warmer registration for '{name}'.")
+        self._registrations[name] = dependencies or (lambda db: {})
+
+    def is_registered(self, name: str) -> bool:
+        """Whether an endpoint ("<key_prefix>:<name>") has a dependency factory registered."""
+        return name in self._registrations
+
+    def _get_session_factory(self) -> Callable[[], Session]:
+        if self.session_factory is None:
+            from mcp.db.session import SessionLocal
+            return SessionLocal
+        return self.session_factory
+
+    @asynccontextmanager
+    async def rebuilt_dependencies(self, name: str) -> AsyncIterator[Dict[str, Any]]:
+        """Builds a registered endpoint's injected arguments from a fresh DB session, closed on exit."""
+        db = self._get_session_factory()()
+        try:
+            yield self._registrations[name](db)
+        finally:
+            db.close()
+
+    async def warm(self, top_n: Optional[int] = None) -> Dict[str, int]:
+        """
+        Warms every registered endpoint with its hottest parameter sets.
+
+        Returns:
+            Dict[str, int]: Number of entries successfully warmed per endpoint.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        warmed: Dict[str, int] = {name: 0 for name in self._registrations}
+
+        async def warm_one(name: str, endpoint: Callable[..., Any], params: Dict[str, Any]) -> None:
+            async with semaphore:
+                token = cache_warmup_active.set(True)
+                try:
+                    async with self.rebuilt_dependencies(name) as injected:
+                        await endpoint(**{**_coerce_params(endpoint, params), **injected})
+                    warmed[name] += 1
+                except Exception as e:
+                    logger.warning(f"Cache warmup call {name}({params}) failed: {str(e)}")
+                finally:
+                    cache_warmup_active.reset(token)
+
+        jobs = []
+        for name in self._registrations:
+            endpoint = cached_endpoints.get(name)
+            if endpoint is None:
+                logger.warning(f"Cache warmer: no cached endpoint named '{name}'")
+                continue
+            try:
+                hot_params = await get_hot_params(name, top_n or self.top_n)
+            except Exception as e:
+                logger.warning(f"Cache warmer: cannot read access stats for '{name}': {str(e)}")
+                continue
+            jobs.extend(warm_one(name, endpoint, params) for params in hot_params)
+
+        await asyncio.gather(*jobs)
+        logger.info(f"Cache warmup finished: {warmed}")
+        return warmed
+
+
+# Global instance of the warmer (Singleton-like access)
+cache_warmer = CacheWarmer()
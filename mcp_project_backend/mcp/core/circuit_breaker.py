@@ -1,6 +1,21 @@
-from typing import Callable, Any, TypeVar, Generic, Type, Optional
-from datetime import datetime, timedelta
-import asyncio
+"""
+Circuit breaking for calls to external dependencies.
+
+A `CircuitBreaker` guards one dependency. It opens when the dependency fails `failure_threshold`
+times in a row, or when its error rate over a rolling window reaches `error_rate_threshold`.
+While open, calls fail fast with `CircuitBreakerOpenError`. After `reset_timeout` the breaker
+turns half-open and lets up to `half_open_max_calls` probe calls through: if they all succeed it
+closes, and if any of them fails it opens again.
+
+Breakers are kept per dependency in `circuit_breakers`, keyed by name, e.g. "redis",
+"llm:<model>" or "external_db:<config id>", so one flaky dependency does not block the others.
+"""
+from contextlib import asynccontextmanager
+from collections import deque
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Generic, List, Optional, Tuple, Type, TypeVar
+import time
+from mcp.core.concurrency_limiter import AdaptiveConcurrencyLimiter
 from mcp.core.config import settings
 import logging
 from prometheus_client import Counter, Gauge, Histogram
@@ -11,118 +26,353 @@ logger = logging.getLogger(__name__)
 # Prometheus metrics
 CIRCUIT_BREAKER_FAILURES = Counter(
     'circuit_breaker_failures_total',
-    'Total number of circuit breaker failures'
+    'Total number of failed calls through a circuit breaker',
+    ['name']
+)
+
+CIRCUIT_BREAKER_REJECTED = Counter(
+    'circuit_breaker_rejected_total',
+    'Total number of calls failed fast by an open circuit breaker',
+    ['name']
+)
+
+CIRCUIT_BREAKER_TRANSITIONS = Counter(
+    'circuit_breaker_transitions_total',
+    'Total number of circuit breaker state changes',
+    ['name', 'state']
 )
 
 CIRCUIT_BREAKER_OPEN = Gauge(
     'circuit_breaker_open',
-    'Circuit breaker open state (1=open, 0=closed)'
+    'Circuit breaker state (1=open, 0.5=half-open, 0=closed)',
+    ['name']
 )
 
 CIRCUIT_BREAKER_LATENCY = Histogram(
     'circuit_breaker_latency_seconds',
-    'Circuit breaker operation latency'
+    'Latency of calls through a circuit breaker',
+    ['name']
 )
 
 T = TypeVar('T')
 
+# Number of buckets the rolling error-rate window is split into
+_WINDOW_BUCKETS = 10
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+_STATE_GAUGE_VALUES = {CircuitState.CLOSED: 0, CircuitState.OPEN: 1, CircuitState.HALF_OPEN: 0.5}
+
+
 class CircuitBreaker(Generic[T]):
     """
     Circuit breaker implementation to protect against service failures.
-    
+
     Args:
-        failure_threshold: Number of failures before opening
-        reset_timeout: Time to wait before reset
-        max_concurrent: Maximum concurrent operations
+        failure_threshold: Consecutive failures before opening
+        reset_timeout: Seconds to stay open before letting probe calls through
+        max_concurrent: Starting in-flight limit through `__call__`; it then adapts to latency
         name: Name for metrics and logging
+        error_rate_threshold: Error rate (0-1) over the window that opens the breaker
+        window_seconds: Length of the rolling error-rate window
+        minimum_requests: Calls needed in the window before the error rate is considered
+        half_open_max_calls: Probe calls allowed (and successes needed to close) while half-open
+        expected_exceptions: Exceptions that count as a failure of the dependency
+        excluded_exceptions: Subclasses of the expected exceptions that do not count
     """
     def __init__(
         self,
         failure_threshold: int = 5,
-        reset_timeout: int = 60,  # seconds
+        reset_timeout: float = 60,  # seconds
         max_concurrent: int = 10,
-        name: str = "default"
+        name: str = "default",
+        error_rate_threshold: Optional[float] = None,
+        window_seconds: Optional[float] = None,
+        minimum_requests: Optional[int] = None,
+        half_open_max_calls: Optional[int] = None,
+        expected_exceptions: Tuple[Type[BaseException], ...] = (Exception,),
+        excluded_exceptions: Tuple[Type[BaseException], ...] = ()
     ):
         self.failure_threshold = failure_threshold
         self.reset_timeout = reset_timeout
         self.max_concurrent = max_concurrent
-        self.failures = 0
-        self.last_failure: Optional[datetime] = None
-        self.is_open = False
-        self._semaphore = asyncio.Semaphore(max_concurrent)
         self.name = name
-        
+        self.error_rate_threshold = error_rate_threshold if error_rate_threshold is not None else settings.CIRCUIT_BREAKER_ERROR_RATE_THRESHOLD
+        self.window_seconds = window_seconds if window_seconds is not None else settings.CIRCUIT_BREAKER_WINDOW_SECONDS
+        self.minimum_requests = minimum_requests if minimum_requests is not None else settings.CIRCUIT_BREAKER_MINIMUM_REQUESTS
+        self.half_open_max_calls = half_open_max_calls if half_open_max_calls is not None else settings.CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS
+        self.expected_exceptions = expected_exceptions
+        self.excluded_exceptions = excluded_exceptions
+        self._limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=max_concurrent,
+            min_limit=settings.CONCURRENCY_MIN_LIMIT,
+            max_limit=max(max_concurrent, int(max_concurrent * settings.CONCURRENCY_MAX_LIMIT_FACTOR)),
+            latency_tolerance=settings.CONCURRENCY_LATENCY_TOLERANCE,
+            name=f"circuit_breaker:{name}"
+        )
+
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self.failures = 0  # Consecutive failures
+        # Rolling window: [bucket start, calls, failures], oldest first
+        self._bucket_width = self.window_seconds / _WINDOW_BUCKETS
+        self._buckets: Deque[List[float]] = deque()
+        self._window_calls = 0
+        self._window_failures = 0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
         # Initialize metrics
         self._latency = CIRCUIT_BREAKER_LATENCY.labels(name=self.name)
+        self._failure_counter = CIRCUIT_BREAKER_FAILURES.labels(name=self.name)
+        self._rejected_counter = CIRCUIT_BREAKER_REJECTED.labels(name=self.name)
         self._open_gauge = CIRCUIT_BREAKER_OPEN.labels(name=self.name)
+        self._open_gauge.set(0)
 
-    async def __call__(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
-        start_time = datetime.now()
-        
-        if self.is_open:
-            CIRCUIT_BREAKER_OPEN.labels(name=self.name).set(1)
-            raise CircuitBreakerOpenError(
-                f"Circuit breaker {self.name} is open - too many failures"
-            )
-
-        async with self._semaphore:
-            try:
-                result = await func(*args, **kwargs)
-                self._reset_state()
-                self._record_latency(start_time)
-                return result
-            except Exception as e:
-                self._record_failure()
-                self._record_latency(start_time)
-                raise
+    @property
+    def state(self) -> CircuitState:
+        """Current state; an open breaker whose timeout has passed reports half-open."""
+        if self._state is CircuitState.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
 
-    def _reset_state(self) -> None:
-        """Reset circuit breaker state."""
+    async def __call__(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> T:
+        async with self.protect():
+            async with self._limiter.slot():
+                return await func(*args, **kwargs)
+
+    @asynccontextmanager
+    async def protect(self) -> AsyncIterator[None]:
+        """
+        Guards the enclosed block as one call to the dependency.
+
+        Raises:
+            CircuitBreakerOpenError: If the breaker is open, or half-open with all probe slots taken
+        """
+        probe = self.before_call()
+        start_time = time.perf_counter()
+        failed: Optional[bool] = None
+        try:
+            yield
+            failed = False
+        except Exception as e:
+            failed = self._is_failure(e)
+            raise
+        finally:
+            self.after_call(probe, failed, time.perf_counter() - start_time)
+
+    def before_call(self) -> bool:
+        """
+        Admits a call, or fails it fast.
+
+        Returns:
+            bool: True if the call is a half-open probe; pass it back to `after_call`
+
+        Raises:
+            CircuitBreakerOpenError: If the call is not admitted
+        """
+        state = self.state
+        if state is CircuitState.CLOSED:
+            return False
+        if state is CircuitState.HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+            self._probes_in_flight += 1
+            return True
+        self._rejected_counter.inc()
+        raise CircuitBreakerOpenError(
+            f"Circuit breaker {self.name} is {state.value} - dependency is failing",
+            retry_after=self.retry_after()
+        )
+
+    def after_call(self, probe: bool, failed: Optional[bool], duration: Optional[float] = None) -> None:
+        """
+        Records the outcome of an admitted call.
+
+        Args:
+            probe: The value returned by `before_call`
+            failed: Whether the dependency failed; None if the call ended without an outcome
+                    (e.g. it was cancelled)
+            duration: Call latency in seconds, if measured
+        """
+        if probe and self._probes_in_flight > 0:
+            self._probes_in_flight -= 1
+        if duration is not None:
+            self._latency.observe(duration)
+        if failed is None:
+            return
+        if failed:
+            self._record_failure(probe)
+        else:
+            self._record_success(probe)
+
+    def _is_failure(self, error: BaseException) -> bool:
+        return isinstance(error, self.expected_exceptions) and not isinstance(error, self.excluded_exceptions)
+
+    def _record_success(self, probe: bool) -> None:
         self.failures = 0
-        self.last_failure = None
-        self.is_open = False
-        CIRCUIT_BREAKER_OPEN.labels(name=self.name).set(0)
-        logger.info(f"Circuit breaker {self.name} reset to closed state")
+        if self._state is not CircuitState.CLOSED:
+            if probe and self._state is CircuitState.HALF_OPEN:
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_max_calls:
+                    self._reset_state()
+            return
+        self._record_in_window(failed=False)
 
-    def _record_failure(self) -> None:
+    def _record_failure(self, probe: bool) -> None:
         """Record a failure and update state."""
         self.failures += 1
-        self.last_failure = datetime.now()
-        CIRCUIT_BREAKER_FAILURES.labels(name=self.name).inc()
-        logger.warning(f"Circuit breaker {self.name} failure recorded (total: {self.failures})")
-        
+        self._failure_counter.inc()
+        if self._state is CircuitState.HALF_OPEN:
+            if probe:
+                self._open("probe call failed")
+            return
+        if self._state is CircuitState.OPEN:
+            # A call admitted before the breaker opened
+            return
+        self._record_in_window(failed=True)
         if self.failures >= self.failure_threshold:
-            self.is_open = True
-            self._schedule_reset()
-            logger.error(f"Circuit breaker {self.name} opened due to {self.failure_threshold} failures")
+            self._open(f"{self.failures} consecutive failures")
+        elif self._window_calls >= self.minimum_requests and self.error_rate() >= self.error_rate_threshold:
+            self._open(f"error rate {self.error_rate():.0%} over {self._window_calls} calls")
 
-    async def _schedule_reset(self) -> None:
-        """Schedule circuit breaker reset after timeout."""
-        await asyncio.sleep(self.reset_timeout)
-        self._reset_state()
-        logger.info(f"Circuit breaker {self.name} reset after timeout")
+    def _record_in_window(self, failed: bool) -> None:
+        now = time.monotonic()
+        self._expire_buckets(now)
+        if not self._buckets or now - self._buckets[-1][0] >= self._bucket_width:
+            self._buckets.append([now, 0, 0])
+        bucket = self._buckets[-1]
+        bucket[1] += 1
+        self._window_calls += 1
+        if failed:
+            bucket[2] += 1
+            self._window_failures += 1
+
+    def _expire_buckets(self, now: float) -> None:
+        while self._buckets and now - self._buckets[0][0] >= self.window_seconds:
+            _, calls, failures = self._buckets.popleft()
+            self._window_calls -= calls
+            self._window_failures -= failures
+
+    def error_rate(self) -> float:
+        """Failed share of the calls in the rolling window."""
+        self._expire_buckets(time.monotonic())
+        return self._window_failures / self._window_calls if self._window_calls else 0.0
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets probe calls through (0 if it does now)."""
+        if self._state is not CircuitState.OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def _open(self, reason: str) -> None:
+        self._opened_at = time.monotonic()
+        self._transition(CircuitState.OPEN)
+        logger.error(f"Circuit breaker {self.name} opened: {reason}")
+
+    def _reset_state(self) -> None:
+        """Reset circuit breaker state."""
+        self.failures = 0
+        self._buckets.clear()
+        self._window_calls = 0
+        self._window_failures = 0
+        self._transition(CircuitState.CLOSED)
+        logger.info(f"Circuit breaker {self.name} reset to closed state")
 
-    def _record_latency(self, start_time: datetime) -> None:
-        """Record operation latency."""
-        duration = (datetime.now() - start_time).total_seconds()
-        self._latency.observe(duration)
+    def _transition(self, state: CircuitState) -> None:
+        self._state = state
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._open_gauge.set(_STATE_GAUGE_VALUES[state])
+        CIRCUIT_BREAKER_TRANSITIONS.labels(name=self.name, state=state.value).inc()
+
+    def reset(self) -> None:
+        """Closes the breaker and forgets its history."""
+        self._reset_state()
 
     def is_circuit_open(self) -> bool:
         """Check if circuit is currently open."""
-        return self.is_open
+        return self.state is CircuitState.OPEN
 
     def get_failure_count(self) -> int:
-        """Get current failure count."""
+        """Get current consecutive failure count."""
         return self.failures
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns the breaker's state and rolling-window counts."""
+        error_rate = self.error_rate()
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.failures,
+            "window_calls": self._window_calls,
+            "error_rate": error_rate,
+            "retry_after": self.retry_after(),
+            **self._limiter.get_stats(),
+        }
+
+
 class CircuitBreakerOpenError(Exception):
     """Raised when the circuit breaker is open."""
-    pass
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreakerRegistry:
+    """
+    Circuit breakers keyed by dependency name.
+
+    Breakers are created on first use from the CIRCUIT_BREAKER_* settings; overrides passed
+    to `get` apply only when the breaker is created.
+    """
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str, **overrides: Any) -> CircuitBreaker:
+        """
+        Returns the breaker for a dependency, creating it if needed.
+
+        Args:
+            name: Dependency name, e.g. "redis", "llm:gpt-4o" or "external_db:<config id>"
+            **overrides: CircuitBreaker arguments replacing the defaults from settings
+        """
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            options = {
+                "failure_threshold": settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                "reset_timeout": settings.CIRCUIT_BREAKER_RESET_TIMEOUT,
+                "max_concurrent": settings.CIRCUIT_BREAKER_MAX_CONCURRENT,
+            }
+            options.update(overrides)
+            breaker = CircuitBreaker(name=name, **options)
+            self._breakers[name] = breaker
+        return breaker
+
+    def register(self, breaker: CircuitBreaker) -> None:
+        """Registers a preconfigured breaker under its name."""
+        if breaker.name in self._breakers:
+            logger.warning(f"Overwriting existing circuit breaker '{breaker.name}'.")
+        self._breakers[breaker.name] = breaker
+
+    def remove(self, name: str) -> None:
+        """Drops a breaker, e.g. when its dependency's configuration is deleted."""
+        self._breakers.pop(name, None)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the state of every breaker, by name."""
+        return {name: breaker.get_stats() for name, breaker in self._breakers.items()}
+
+
+# Global instance of the registry (Singleton-like access)
+circuit_breakers = CircuitBreakerRegistry()
 
 # Create a circuit breaker instance for workflow operations
-workflow_circuit_breaker = CircuitBreaker(
+workflow_circuit_breaker = circuit_breakers.get(
+    "workflow",
     failure_threshold=settings.WORKFLOW_FAILURE_THRESHOLD,
     reset_timeout=settings.WORKFLOW_RESET_TIMEOUT,
-    max_concurrent=settings.WORKFLOW_MAX_CONCURRENT,
-    name="workflow"
+    max_concurrent=settings.WORKFLOW_MAX_CONCURRENT
 )
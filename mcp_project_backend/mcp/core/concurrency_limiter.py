@@ -0,0 +1,208 @@
+"""
+Adaptive limits on in-flight calls to a protected resource.
+
+`AdaptiveConcurrencyLimiter` replaces a fixed `asyncio.Semaphore(max_concurrent)`: instead of a
+number picked up front, the limit follows what the resource can currently take.
+
+- Throttling signals (the resource said "slow down") cut the limit multiplicatively.
+- Without latency samples, each success raises the limit by 1/limit (AIMD).
+- With latency samples, the limit tracks the gradient between the long-term and the recent
+  latency: while recent calls are no slower than usual (within `latency_tolerance`) it grows by
+  about sqrt(limit); once queueing inside the resource makes them slower it shrinks in
+  proportion. Increases are skipped while the limiter is not the bottleneck (under half the
+  limit in use), so an idle resource does not accumulate an unusable limit.
+
+Waiters are served in FIFO order. When a `name` is given, the limit, in-flight and queued
+counts and the time spent waiting for a slot are exported as Prometheus metrics.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from prometheus_client import Gauge, Histogram
+
+# Prometheus metrics
+CONCURRENCY_LIMIT = Gauge(
+    'adaptive_concurrency_limit',
+    'Current adaptive in-flight limit per protected resource',
+    ['resource']
+)
+
+CONCURRENCY_IN_FLIGHT = Gauge(
+    'adaptive_concurrency_in_flight',
+    'Calls currently holding a slot per protected resource',
+    ['resource']
+)
+
+CONCURRENCY_QUEUED = Gauge(
+    'adaptive_concurrency_queued',
+    'Calls waiting for a slot per protected resource',
+    ['resource']
+)
+
+CONCURRENCY_QUEUE_WAIT = Histogram(
+    'adaptive_concurrency_queue_wait_seconds',
+    'Time spent waiting for a slot per protected resource',
+    ['resource']
+)
+
+# EWMA weights of the recent latency (last few calls) and the long-term one (last few hundred)
+_SHORT_LATENCY_ALPHA = 0.3
+_LONG_LATENCY_ALPHA = 0.002
+# Share of the newly computed limit applied per latency sample
+_SMOOTHING = 0.2
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Adaptive limiter for in-flight calls to a single resource.
+
+    Args:
+        initial_limit: Limit before any feedback has been observed
+        min_limit: Lowest the limit can go
+        max_limit: Highest the limit can go
+        backoff_ratio: Factor applied to the limit on a throttling signal
+        latency_tolerance: How much slower than the long-term latency recent calls may be
+                           before the limit shrinks
+        name: Resource label for metrics; metrics are not exported when omitted
+    """
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        backoff_ratio: float = 0.5,
+        latency_tolerance: float = 1.5,
+        name: Optional[str] = None
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.name = name
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._short_latency: Optional[float] = None
+        self._long_latency: Optional[float] = None
+
+        if name is not None:
+            self._limit_gauge = CONCURRENCY_LIMIT.labels(resource=name)
+            self._in_flight_gauge = CONCURRENCY_IN_FLIGHT.labels(resource=name)
+            self._queued_gauge = CONCURRENCY_QUEUED.labels(resource=name)
+            self._queue_wait = CONCURRENCY_QUEUE_WAIT.labels(resource=name)
+            self._update_gauges()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        """Waits until a slot is free and takes it."""
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            if self.name is not None:
+                self._queue_wait.observe(0.0)
+                self._in_flight_gauge.set(self._in_flight)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.perf_counter()
+        self._update_gauges()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before cancellation; give it back.
+                self._in_flight -= 1
+                self._wake_waiters()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._update_gauges()
+            raise
+        if self.name is not None:
+            self._queue_wait.observe(time.perf_counter() - started)
+
+    def release(self, success: bool = True, throttled: bool = False, latency: Optional[float] = None) -> None:
+        """
+        Frees a slot and adapts the limit to the outcome of the call.
+
+        Args:
+            success: Whether the call succeeded
+            throttled: Whether the resource signalled overload (e.g. HTTP 429)
+            latency: Duration of the call in seconds, if measured
+        """
+        in_use = self._in_flight
+        self._in_flight -= 1
+        if throttled:
+            self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+        elif success and latency is not None:
+            self._adapt_to_latency(latency, in_use)
+        elif success:
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+        self._wake_waiters()
+        self._update_gauges()
+
+    def _adapt_to_latency(self, latency: float, in_use: int) -> None:
+        if self._short_latency is None:
+            self._short_latency = self._long_latency = latency
+        else:
+            self._short_latency += _SHORT_LATENCY_ALPHA * (latency - self._short_latency)
+            self._long_latency += _LONG_LATENCY_ALPHA * (latency - self._long_latency)
+            # After a sustained slowdown, let the baseline recover quickly once latency drops
+            if self._long_latency > 2 * self._short_latency:
+                self._long_latency = 2 * self._short_latency
+        if self._short_latency <= 0:
+            return
+        gradient = max(0.5, min(1.0, self.latency_tolerance * self._long_latency / self._short_latency))
+        if gradient >= 1.0 and in_use * 2 < self._limit:
+            return
+        new_limit = self._limit * gradient + math.sqrt(self._limit)
+        new_limit = self._limit + _SMOOTHING * (new_limit - self._limit)
+        self._limit = max(float(self.min_limit), min(float(self.max_limit), new_limit))
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Holds a slot for the enclosed block and feeds its latency back into the limit."""
+        await self.acquire()
+        started = time.perf_counter()
+        success = False
+        try:
+            yield
+            success = True
+        finally:
+            self.release(success=success, latency=time.perf_counter() - started if success else None)
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    def _update_gauges(self) -> None:
+        if self.name is None:
+            return
+        self._limit_gauge.set(self.limit)
+        self._in_flight_gauge.set(self._in_flight)
+        self._queued_gauge.set(len(self._waiters))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns the current limit, in-flight and queued counts."""
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+        }
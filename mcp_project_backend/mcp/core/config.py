@@ -60,6 +60,32 @@ class Settings(BaseSettings):
     ERROR_RATE_THRESHOLD: float = 0.05  # 5%
     MEMORY_THRESHOLD: float = 80.0  # 80% memory usage
     CPU_THRESHOLD: float = 80.0  # 80% CPU usage
+    # Rate limiting and circuit breaking for workflow operations
+    WORKFLOW_MAX_REQUESTS: int = 100  # Requests per client per window
+    WORKFLOW_RATE_WINDOW: int = 60  # seconds
+    WORKFLOW_MAX_CONCURRENT: int = 10
+    WORKFLOW_STEPS_MAX_REQUESTS: int = 200
+    WORKFLOW_STEPS_RATE_WINDOW: int = 60  # seconds
+    WORKFLOW_STEPS_MAX_CONCURRENT: int = 20
+    WORKFLOW_FAILURE_THRESHOLD: int = 5
+    WORKFLOW_RESET_TIMEOUT: int = 60  # seconds
+    # Per-dependency circuit breakers (Redis, each LLM model, each external database)
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open a breaker
+    CIRCUIT_BREAKER_ERROR_RATE_THRESHOLD: float = 0.5  # Error rate over the window that opens a breaker
+    CIRCUIT_BREAKER_WINDOW_SECONDS: float = 60.0
+    CIRCUIT_BREAKER_MINIMUM_REQUESTS: int = 20  # Calls in the window before the error rate counts
+    CIRCUIT_BREAKER_RESET_TIMEOUT: float = 30.0  # seconds open before probe calls are let through
+    CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS: int = 3  # Probe calls while half-open; all must succeed to close
+    CIRCUIT_BREAKER_MAX_CONCURRENT: int = 100
+    # Adaptive in-flight limits for CircuitBreaker and RateLimiter; max_concurrent is the starting limit
+    CONCURRENCY_MIN_LIMIT: int = 1
+    CONCURRENCY_MAX_LIMIT_FACTOR: float = 4.0  # Highest limit as a multiple of max_concurrent
+    CONCURRENCY_LATENCY_TOLERANCE: float = 1.5  # Slowdown over the usual latency before limits shrink
+    RATE_LIMIT_MAX_CLIENTS: int = 100_000  # Clients tracked per limiter before the least recent are evicted
+    RATE_LIMIT_BACKEND: str = "redis"  # "redis" (quotas shared by all workers) or "local" (per process)
+    RATE_LIMIT_REDIS_RETRY_INTERVAL: float = 5.0  # seconds on local limits after a Redis failure
+    # Streaming subscriptions share one Redis pub/sub connection per process
+    PUBSUB_CLIENT_QUEUE_SIZE: int = 100  # Messages buffered per stream subscriber before the oldest are dropped
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -0,0 +1,88 @@
+"""
+Event loop lag measurement.
+
+`EventLoopLagMonitor` schedules a timer every `interval` seconds and records how late it
+fires. On an idle loop the lag is near zero; when the loop is saturated (too many ready
+callbacks, or blocking code running on it) every await takes longer to resume and the lag
+grows, well before requests start timing out. `LoadSheddingMiddleware` uses it to decide
+when to turn requests away.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from prometheus_client import Gauge
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+EVENT_LOOP_LAG = Gauge(
+    'event_loop_lag_seconds',
+    'How late the event loop ran the most recent lag probe timer'
+)
+
+
+class EventLoopLagMonitor:
+    """
+    Samples the running event loop's scheduling lag in the background.
+
+    Args:
+        interval: Seconds between probes
+    """
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self._lag = 0.0
+        self._next_due: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Starts probing on the running event loop (no-op if already running there)."""
+        loop = asyncio.get_running_loop()
+        if self.running and self._task.get_loop() is loop:
+            return
+        self._lag = 0.0
+        self._next_due = None
+        self._task = loop.create_task(self._probe())
+
+    async def stop(self) -> None:
+        """Stops probing."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._next_due = None
+
+    def lag(self) -> float:
+        """
+        Returns the current lag in seconds.
+
+        If the next probe is already overdue, that delay counts too, so a loop that is stuck
+        right now is reported as lagging before the probe gets to run.
+        """
+        if self._next_due is None:
+            return self._lag
+        overdue = asyncio.get_running_loop().time() - self._next_due
+        return max(self._lag, overdue)
+
+    async def _probe(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                self._next_due = loop.time() + self.interval
+                await asyncio.sleep(self.interval)
+                self._lag = max(0.0, loop.time() - self._next_due)
+                EVENT_LOOP_LAG.set(self._lag)
+        except Exception as e:
+            logger.error(f"Event loop lag monitor stopped: {str(e)}")
+
+
+# Global instance of the monitor (Singleton-like access)
+event_loop_lag_monitor = EventLoopLagMonitor()
@@ -0,0 +1,10 @@
+# Makes 'executors' a Python package.
+# Concrete executors are deliberately not imported here: they are loaded lazily through
+# the registry so that importing this package does not pull in papermill, nbformat, etc.
+from .registry import ExecutorRegistry, UnknownExecutorTypeError, executor_registry
+
+__all__ = [
+    "ExecutorRegistry",
+    "UnknownExecutorTypeError",
+    "executor_registry"
+]
@@ -1,14 +1,25 @@
 import abc
+import logging
 from typing import Dict, Any, Optional
 from mcp.core.mcp_configs import MCPConfigPayload
 from mcp.core.workflow_streaming_service import WorkflowStreamingService
-from sqlalchemy.orm import Session
+from mcp.core.run_log_pipeline import RunLogPipeline, get_run_log_pipeline
+from sqlalchemy.orm import Session, sessionmaker
+
+logger = logging.getLogger(__name__)
 
 class BaseExecutor(abc.ABC):
-    def __init__(self, db_session: Optional[Session] = None, streaming_service: Optional[WorkflowStreamingService] = None, workflow_run_id: Optional[int]=None):
+    def __init__(
+        self,
+        db_session: Optional[Session] = None,
+        streaming_service: Optional[WorkflowStreamingService] = None,
+        workflow_run_id: Optional[int] = None,
+        log_pipeline: Optional[RunLogPipeline] = None
+    ):
         self.db_session = db_session
         self.streaming_service = streaming_service
         self.workflow_run_id = workflow_run_id  # To associate logs/events with the current run
+        self.log_pipeline = log_pipeline
 
     @abc.abstractmethod
     async def execute(self, config: MCPConfigPayload, inputs: Dict[str, Any]) -> Dict[str, Any]:
@@ -21,8 +32,18 @@ class BaseExecutor(abc.ABC):
         pass
 
     async def _log_message(self, step_id_for_log: str, message: str, level: str = "INFO"):
-        """Helper to publish log messages via the streaming service."""
-        if self.streaming_service and self.workflow_run_id:
-            payload = {"step_id": step_id_for_log, "message": message, "level": level}
-            # await self.streaming_service.publish_run_update(self.workflow_run_id, "log", payload)
-            print(f"RUN_ID {self.workflow_run_id} - STEP {step_id_for_log} [{level}]: {message}")  # Fallback print
+        """
+        Helper to ship log messages for the current run.
+        Lines go into the run's ring-buffered log pipeline, which publishes them in batches
+        and appends them to the step's logs in chunks. Without a run to attach them to, lines
+        go to the module logger instead of being dropped.
+        """
+        if self.log_pipeline is None and self.workflow_run_id and (self.streaming_service or self.db_session):
+            # Log chunks are written in sessions of their own on the run's engine, not in the run's session
+            session_factory = sessionmaker(bind=self.db_session.get_bind()) if self.db_session is not None else None
+            self.log_pipeline = get_run_log_pipeline(self.workflow_run_id, self.streaming_service, session_factory)
+        if self.log_pipeline is not None:
+            self.log_pipeline.append(step_id_for_log, message, level)
+        else:
+            level_no = logging.getLevelName(level.upper())
+            logger.log(level_no if isinstance(level_no, int) else logging.INFO, f"[{step_id_for_log}] {message}")
@@ -1,12 +1,32 @@
 from .base_executor import BaseExecutor
 from mcp.core.mcp_configs import LLMConfig
-from typing import Dict, Any
+from mcp.core.llm import LLMClientManager, LLMRequest, LLMResponse, LLMResponseCache, llm_client_manager, llm_response_cache
+from mcp.core.llm.response_cache import is_cacheable
+from mcp.core.prompt_templates import PromptTemplateError, build_prompt_context
+from mcp.core.settings import settings
+from typing import Dict, Any, Optional
+import time
 
 class LLMExecutor(BaseExecutor):
     """
     Concrete executor for MCPs of type 'LLM Prompt Agent'.
-    Prepares a prompt using the config and inputs, and calls an LLM client (placeholder for now).
+    Prepares a prompt using the config and inputs, and sends it through the shared LLMClientManager,
+    which batches requests and bounds in-flight calls per model.
+    Deterministic (temperature 0) completions are served from the persistent response cache
+    unless the MCP opts out via `cacheResponses`. With `streamOutput` enabled, partial output is
+    published to run subscribers as `result_preview` events while the completion is generated.
     """
+    def __init__(
+        self,
+        *args: Any,
+        client_manager: Optional[LLMClientManager] = None,
+        response_cache: Optional[LLMResponseCache] = None,
+        **kwargs: Any
+    ):
+        super().__init__(*args, **kwargs)
+        self.client_manager = client_manager or llm_client_manager
+        self.response_cache = response_cache or llm_response_cache
+
     async def execute(self, config: LLMConfig, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """
         Executes an LLM MCP using the specified configuration and inputs.
@@ -16,7 +36,7 @@ class LLMExecutor(BaseExecutor):
         Returns:
             Dict[str, Any]: Output values produced by the LLM.
         Raises:
-            ValueError: If required prompt input is missing.
+            ValueError: If inputs required by the prompt template are missing.
         """
         await self._log_message(config.type, f"Executing LLM Prompt Agent: {getattr(config, 'model_name', None)}")
 
@@ -25,20 +45,79 @@ class LLMExecutor(BaseExecutor):
 
         # Prepare the prompt
         prompt_to_send = "Translate 'hello' to French."  # Default placeholder
-        if getattr(config, 'user_prompt_template', None) and "prompt_input" in inputs:
+        template = config.compiled_prompt_template
+        if template is not None:
+            context = build_prompt_context(inputs)
             try:
-                prompt_to_send = config.user_prompt_template.replace("{{inputText}}", str(inputs["prompt_input"]))
-            except KeyError:
-                await self._log_message(config.type, "Input 'prompt_input' not found for template.", level="ERROR")
-                raise ValueError("Missing 'prompt_input' for user prompt template.")
+                prompt_to_send = template.render(context)
+            except PromptTemplateError as e:
+                if "prompt" not in inputs:
+                    await self._log_message(config.type, str(e), level="ERROR")
+                    raise ValueError(str(e)) from e
+                prompt_to_send = str(inputs["prompt"])
         elif "prompt" in inputs:
             prompt_to_send = str(inputs["prompt"])
 
         await self._log_message(config.type, f"LLM input: {prompt_to_send}")
 
-        # Placeholder for LLM client call
-        response_text = "Bonjour"  # Simulated response
+        request = LLMRequest(
+            model_name=config.model_name,
+            prompt=prompt_to_send,
+            system_prompt=config.system_prompt,
+            temperature=config.temperature,
+            max_tokens=config.max_tokens,
+            top_p=config.top_p,
+            top_k=config.top_k
+        )
+        use_cache = settings.LLM_CACHE_ENABLED and config.cache_responses and is_cacheable(request)
+        response = await self.response_cache.get(request) if use_cache else None
+        if response is not None:
+            await self._log_message(config.type, "LLM response served from cache.")
+        else:
+            if config.stream and self.streaming_service and self.workflow_run_id:
+                response = await self._stream_completion(config.type, request)
+            else:
+                response = await self.client_manager.complete(request)
+            if use_cache:
+                await self.response_cache.set(request, response, ttl=config.cache_ttl_seconds)
+        response_text = response.text
 
         await self._log_message(config.type, f"LLM output: {response_text}")
 
         return {"completion": response_text}
+
+    async def _stream_completion(self, step_id_for_log: str, request: LLMRequest) -> LLMResponse:
+        """
+        Streams the completion, publishing accumulated deltas as `result_preview` events.
+
+        Deltas are coalesced so subscribers get at most one event per
+        LLM_STREAM_PREVIEW_INTERVAL_MS rather than one per token.
+        """
+        interval = settings.LLM_STREAM_PREVIEW_INTERVAL_MS / 1000.0
+        chunks = []
+        pending = []
+        sequence = 0
+        last_publish = 0.0
+        start = time.perf_counter()
+
+        async def publish(done: bool) -> None:
+            nonlocal sequence, last_publish
+            payload = {"step_id": step_id_for_log, "sequence": sequence, "delta": "".join(pending), "done": done}
+            await self.streaming_service.publish_run_update(self.workflow_run_id, "result_preview", payload)
+            pending.clear()
+            sequence += 1
+            last_publish = time.perf_counter()
+
+        async for chunk in self.client_manager.stream(request):
+            chunks.append(chunk)
+            pending.append(chunk)
+            # The first token is published immediately; later ones are batched by interval.
+            if sequence == 0 or time.perf_counter() - last_publish >= interval:
+                await publish(done=False)
+        await publish(done=True)
+
+        return LLMResponse(
+            text="".join(chunks),
+            model_name=request.model_name,
+            latency_seconds=time.perf_counter() - start
+        )
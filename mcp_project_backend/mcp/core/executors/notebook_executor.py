@@ -1,15 +1,84 @@
 import papermill as pm
 import nbformat
+import hashlib
+import json
 import os
 import tempfile
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, List
 from .base_executor import BaseExecutor
 from mcp.core.mcp_configs import NotebookConfig
+from mcp.core.settings import settings
+
+# In-process index of materialized notebooks: cells hash -> .ipynb path on disk.
+_materialized_notebooks: Dict[str, str] = {}
+_materialize_lock = threading.Lock()
+
+
+def _notebook_cache_dir() -> str:
+    """Returns the directory where materialized notebooks are cached, creating it if needed."""
+    cache_dir = settings.NOTEBOOK_CACHE_DIR or os.path.join(tempfile.gettempdir(), "mcp_notebook_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def _hash_notebook_cells(cells: List[Dict[str, str]]) -> str:
+    """
+    Computes a stable content hash for a list of embedded notebook cells.
+    Only the fields that affect the materialized notebook (type, content) are hashed,
+    so re-ordering of dict keys or changes to cell ids do not invalidate the cache.
+    """
+    canonical = json.dumps(
+        [[cell.get('type'), cell.get('content')] for cell in cells],
+        separators=(',', ':'),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(f"nbformat{nbformat.v4.nbformat}.{nbformat.v4.nbformat_minor}:{canonical}".encode('utf-8')).hexdigest()
+
+
+def materialize_notebook_cells(cells: List[Dict[str, str]]) -> str:
+    """
+    Returns the path of an .ipynb file built from embedded cells, building it only once.
+
+    The notebook is cached on disk keyed by the hash of its cells, so every run of the same
+    MCP version reuses the same file instead of rebuilding and re-validating it with nbformat.
+    Files are written atomically, so concurrent workers never observe a partial notebook.
+    Args:
+        cells (List[Dict[str, str]]): Notebook cells, each with 'type' (code/markdown) and 'content'.
+    Returns:
+        str: Path to the cached input notebook. Callers must treat it as read-only.
+    """
+    cells_hash = _hash_notebook_cells(cells)
+    cached_path = _materialized_notebooks.get(cells_hash)
+    if cached_path and os.path.exists(cached_path):
+        return cached_path
+
+    with _materialize_lock:
+        notebook_path = os.path.join(_notebook_cache_dir(), f"{cells_hash}.ipynb")
+        if not os.path.exists(notebook_path):
+            notebook = nbformat.v4.new_notebook(cells=[
+                nbformat.v4.new_code_cell(cell['content']) if cell['type'] == 'code'
+                else nbformat.v4.new_markdown_cell(cell['content'])
+                for cell in cells
+            ])
+            fd, tmp_path = tempfile.mkstemp(suffix=".ipynb.tmp", dir=os.path.dirname(notebook_path))
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    nbformat.write(notebook, f)
+                os.replace(tmp_path, notebook_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        _materialized_notebooks[cells_hash] = notebook_path
+    return notebook_path
+
 
 class NotebookExecutor(BaseExecutor):
     """
     Concrete executor for MCPs of type 'Jupyter Notebook'.
     Executes a notebook using Papermill, supporting both file path and embedded cell content.
+    Notebooks built from embedded cells are cached on disk and reused across runs.
     """
     async def execute(self, config: NotebookConfig, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -35,14 +104,7 @@ class NotebookExecutor(BaseExecutor):
             if getattr(config, 'notebook_path_ref', None):
                 input_path = config.notebook_path_ref
             elif getattr(config, 'notebook_cells', None):
-                temp_notebook = nbformat.v4.new_notebook(cells=[
-                    nbformat.v4.new_code_cell(cell['content']) if cell['type'] == 'code'
-                    else nbformat.v4.new_markdown_cell(cell['content'])
-                    for cell in config.notebook_cells
-                ])
-                input_path = os.path.join(temp_dir, "temp_notebook.ipynb")
-                with open(input_path, 'w', encoding='utf-8') as f:
-                    nbformat.write(temp_notebook, f)
+                input_path = materialize_notebook_cells(config.notebook_cells)
             else:
                 raise ValueError("Notebook configuration must provide either notebook_path_ref or notebook_cells.")
 
@@ -67,7 +129,7 @@ class NotebookExecutor(BaseExecutor):
             await self._log_message(config.type, f"Notebook execution failed: {e}", level="ERROR")
             raise
         finally:
-            # Clean up temporary files/directory
+            # Clean up temporary files/directory (the cached input notebook lives elsewhere)
             import shutil
             if os.path.exists(temp_dir):
                 shutil.rmtree(temp_dir)
@@ -0,0 +1,109 @@
+"""
+Registry mapping MCP types to executor classes.
+
+Executor modules are imported lazily on first use, so processes that never run a given MCP
+type (e.g. API workers and notebooks) do not pay for its heavy dependencies (papermill,
+nbformat, ...). Third-party packages can contribute executors through the
+`mcp.executors` entry point group, where the entry point name is the MCP type:
+
+    [project.entry-points."mcp.executors"]
+    "R Script" = "my_package.r_executor:RScriptExecutor"
+"""
+import importlib
+import logging
+import threading
+from importlib.metadata import entry_points
+from typing import Dict, Type, Union
+
+from .base_executor import BaseExecutor
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "mcp.executors"
+
+# Built-in executors as "module:ClassName" references, imported only when first requested.
+_BUILTIN_EXECUTORS: Dict[str, str] = {
+    "LLM Prompt Agent": "mcp.core.executors.llm_executor:LLMExecutor",
+    "Jupyter Notebook": "mcp.core.executors.notebook_executor:NotebookExecutor",
+    "Python Script": "mcp.core.executors.script_executor:ScriptExecutor",
+    "TypeScript Script": "mcp.core.executors.script_executor:ScriptExecutor",
+    "Streamlit App": "mcp.core.executors.streamlit_executor:StreamlitExecutor",
+}
+
+
+class UnknownExecutorTypeError(ValueError):
+    """Raised when no executor is registered for an MCP type."""
+    pass
+
+
+def _import_reference(reference: str) -> Type[BaseExecutor]:
+    module_name, _, class_name = reference.partition(":")
+    module = importlib.import_module(module_name)
+    executor_class = getattr(module, class_name)
+    if not (isinstance(executor_class, type) and issubclass(executor_class, BaseExecutor)):
+        raise TypeError(f"Executor reference '{reference}' does not point to a BaseExecutor subclass.")
+    return executor_class
+
+
+class ExecutorRegistry:
+    """
+    Resolves MCP types to executor classes.
+
+    Lookup order: explicitly registered executors, built-in executors, then entry points.
+    Entry points are only scanned the first time an unknown type is requested.
+    """
+    def __init__(self):
+        self._references: Dict[str, Union[str, Type[BaseExecutor]]] = dict(_BUILTIN_EXECUTORS)
+        self._classes: Dict[str, Type[BaseExecutor]] = {}
+        self._entry_points_loaded = False
+        self._lock = threading.Lock()
+
+    def register_executor(self, mcp_type: str, executor: Union[str, Type[BaseExecutor]]) -> None:
+        """Registers an executor class, or a lazy 'module:ClassName' reference, for an MCP type."""
+        with self._lock:
+            if mcp_type in self._references:
+                logger.warning(f"Overwriting existing executor for mcp_type '{mcp_type}'.")
+            self._references[mcp_type] = executor
+            self._classes.pop(mcp_type, None)
+
+    def _load_entry_points(self) -> None:
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            # Explicit and built-in registrations take precedence over plugins.
+            self._references.setdefault(entry_point.name, entry_point.value)
+        self._entry_points_loaded = True
+
+    def get_executor_class(self, mcp_type: str) -> Type[BaseExecutor]:
+        """
+        Returns the executor class for an MCP type, importing its module on first use.
+
+        Raises:
+            UnknownExecutorTypeError: If no executor is registered for the type.
+        """
+        executor_class = self._classes.get(mcp_type)
+        if executor_class is not None:
+            return executor_class
+
+        with self._lock:
+            if mcp_type not in self._references and not self._entry_points_loaded:
+                self._load_entry_points()
+            reference = self._references.get(mcp_type)
+            if reference is None:
+                raise UnknownExecutorTypeError(f"No executor registered for MCP type '{mcp_type}'.")
+            executor_class = _import_reference(reference) if isinstance(reference, str) else reference
+            self._classes[mcp_type] = executor_class
+        return executor_class
+
+    def is_registered(self, mcp_type: str) -> bool:
+        """Checks whether an executor is available for an MCP type without importing it."""
+        with self._lock:
+            if mcp_type not in self._references and not self._entry_points_loaded:
+                self._load_entry_points()
+            return mcp_type in self._references
+
+    def loaded_types(self) -> Dict[str, str]:
+        """Returns the MCP types whose executor modules have already been imported."""
+        return {mcp_type: cls.__module__ for mcp_type, cls in self._classes.items()}
+
+
+# Global instance of the registry (Singleton-like access)
+executor_registry = ExecutorRegistry()
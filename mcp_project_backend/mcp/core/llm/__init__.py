@@ -0,0 +1,28 @@
+# Makes 'llm' a Python package
+from .base_client import (
+    BaseLLMClient,
+    LLMRequest,
+    LLMResponse,
+    LLMClientError,
+    LLMRetryableError,
+    LLMRateLimitError
+)
+from .stub_client import StubLLMClient, StubLatencyModel
+from .llm_client_manager import LLMClientManager, AdaptiveConcurrencyLimiter, llm_client_manager
+from .response_cache import LLMResponseCache, llm_response_cache
+
+__all__ = [
+    "BaseLLMClient",
+    "LLMRequest",
+    "LLMResponse",
+    "LLMClientError",
+    "LLMRetryableError",
+    "LLMRateLimitError",
+    "StubLLMClient",
+    "StubLatencyModel",
+    "LLMClientManager",
+    "AdaptiveConcurrencyLimiter",
+    "llm_client_manager",
+    "LLMResponseCache",
+    "llm_response_cache"
+]
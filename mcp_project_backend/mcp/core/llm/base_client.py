@@ -0,0 +1,105 @@
+"""
+Defines the abstract base class for LLM provider clients and supporting models.
+"""
+import abc
+import asyncio
+from typing import AsyncIterator, List, Optional, Union
+from pydantic import BaseModel, Field
+
+# --- Supporting Pydantic Models for Requests and Responses ---
+
+
+class LLMRequest(BaseModel):
+    """A single completion request sent to an LLM provider."""
+    model_name: str = Field(description="Identifier of the model, optionally prefixed with '<provider>/'.")
+    prompt: str = Field(description="The fully rendered user prompt.")
+    system_prompt: Optional[str] = None
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+    top_p: Optional[float] = None
+    top_k: Optional[int] = None
+
+
+class LLMResponse(BaseModel):
+    """The completion returned by an LLM provider."""
+    text: str
+    model_name: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    latency_seconds: float = 0.0
+
+
+# --- Errors ---
+
+
+class LLMClientError(Exception):
+    """Raised when an LLM call fails and should not be retried."""
+    pass
+
+
+class LLMRetryableError(LLMClientError):
+    """
+    Raised for transient provider failures (timeouts, 5xx, dropped connections).
+
+    Args:
+        message: Error description.
+        retry_after: Delay in seconds suggested by the provider, if any.
+    """
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMRateLimitError(LLMRetryableError):
+    """Raised when the provider throttles us; signals the concurrency limiter to back off."""
+    pass
+
+
+# --- Abstract Base Client ---
+
+
+class BaseLLMClient(abc.ABC):
+    """
+    Abstract Base Class for LLM provider clients.
+
+    Each concrete client (a hosted provider, a local stub, etc.) should inherit from this
+    class and implement `complete`. Providers with a native batch endpoint should set
+    `supports_batching = True` and override `complete_batch`; providers that can stream
+    tokens should override `stream`.
+    """
+    supports_batching: bool = False
+    max_batch_size: int = 1
+
+    @abc.abstractmethod
+    async def complete(self, request: LLMRequest) -> LLMResponse:
+        """
+        Sends a single completion request.
+
+        Raises:
+            LLMRetryableError: For transient failures that may succeed on retry.
+            LLMClientError: For permanent failures.
+        """
+        pass
+
+    async def complete_batch(self, requests: List[LLMRequest]) -> List[Union[LLMResponse, Exception]]:
+        """
+        Sends several requests in one provider call.
+
+        Returns one entry per request, in order: either the response or the exception raised
+        for that item, so a single bad prompt does not fail the whole batch. The default
+        implementation simply issues the requests concurrently.
+        """
+        return await asyncio.gather(*(self.complete(r) for r in requests), return_exceptions=True)
+
+    async def stream(self, request: LLMRequest) -> AsyncIterator[str]:
+        """
+        Yields the completion as text chunks as the provider produces them.
+
+        Providers without a streaming endpoint fall back to yielding the full completion once.
+        """
+        response = await self.complete(request)
+        yield response.text
+
+    async def close(self) -> None:
+        """Releases any network resources held by the client."""
+        pass
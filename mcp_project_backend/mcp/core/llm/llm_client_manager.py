@@ -0,0 +1,384 @@
+"""
+Manages LLM provider clients and the call path shared by all LLM steps.
+
+The manager acts as a registry of BaseLLMClient implementations (like ConnectorManager does
+for database connectors) and wraps every provider call with:
+- an adaptive (AIMD) in-flight limit per model, which grows on success and halves on throttling;
+- a circuit breaker per model ("llm:<model>"), so a failing model fails fast without holding
+  up calls to other models;
+- micro-batching for providers with a native batch endpoint;
+- retries with capped exponential backoff, full jitter, provider Retry-After hints and a
+  global retry budget so a provider outage does not turn into a retry storm.
+"""
+import asyncio
+import logging
+import random
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple, TypeVar
+
+from prometheus_client import Counter, Gauge
+
+from mcp.core.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, circuit_breakers
+from mcp.core.concurrency_limiter import AdaptiveConcurrencyLimiter
+from mcp.core.settings import settings
+from .base_client import BaseLLMClient, LLMRequest, LLMResponse, LLMRateLimitError, LLMRetryableError
+from .stub_client import StubLLMClient
+
+T = TypeVar('T')
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+LLM_CONCURRENCY_LIMIT = Gauge(
+    'llm_concurrency_limit',
+    'Current adaptive in-flight limit per model',
+    ['model']
+)
+
+LLM_IN_FLIGHT = Gauge(
+    'llm_in_flight_requests',
+    'LLM provider calls currently in flight per model',
+    ['model']
+)
+
+LLM_RETRIES = Counter(
+    'llm_retries_total',
+    'Total number of retried LLM provider calls',
+    ['model', 'reason']
+)
+
+# Retry budget bounds: retries are paid for by earlier successful requests.
+_RETRY_BUDGET_INITIAL = 10.0
+_RETRY_BUDGET_MAX = 100.0
+
+
+class _ModelBatcher:
+    """Collects requests for one model and flushes them as a single provider batch call."""
+    def __init__(self, manager: "LLMClientManager", model_name: str, client: BaseLLMClient, max_size: int, max_wait: float):
+        self.manager = manager
+        self.model_name = model_name
+        self.client = client
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._pending: List[Tuple[LLMRequest, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Strong references to in-flight flush/retry tasks; the loop only keeps weak ones
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, request: LLMRequest) -> LLMResponse:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+        if len(self._pending) >= self.max_size:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._schedule_flush)
+        return await future
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self._spawn(self._flush(batch))
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch: List[Tuple[LLMRequest, asyncio.Future]]) -> None:
+        requests = [request for request, _ in batch]
+        try:
+            results = await self.manager._call_with_retries(
+                self.model_name, lambda: self.client.complete_batch(requests))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (request, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, LLMRetryableError):
+                # Retry only the failed item, outside of the batch.
+                self._spawn(self._retry_single(request, future))
+            elif isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        if len(results) < len(batch):
+            error = RuntimeError(
+                f"LLM provider returned {len(results)} results for a batch of {len(batch)} requests")
+            for _, future in batch[len(results):]:
+                if not future.done():
+                    future.set_exception(error)
+
+    async def _retry_single(self, request: LLMRequest, future: asyncio.Future) -> None:
+        try:
+            result = await self.manager._call_with_retries(
+                self.model_name, lambda: self.client.complete(request), first_attempt=1)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+
+class LLMClientManager:
+    """
+    Registry of LLM provider clients plus the batched, concurrency-adaptive call path.
+
+    Models are routed to providers by an explicit `route_model` mapping, by a
+    '<provider>/<model>' prefix on the model name, or to the default provider.
+    """
+    def __init__(
+        self,
+        default_provider: Optional[str] = None,
+        initial_concurrency: Optional[int] = None,
+        min_concurrency: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        batch_max_size: Optional[int] = None,
+        batch_max_wait_ms: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        retry_base_delay: Optional[float] = None,
+        retry_max_delay: Optional[float] = None,
+        retry_budget_ratio: Optional[float] = None,
+        breakers: Optional[CircuitBreakerRegistry] = None
+    ):
+        self.default_provider = default_provider or settings.LLM_DEFAULT_PROVIDER
+        self.initial_concurrency = initial_concurrency or settings.LLM_INITIAL_CONCURRENCY
+        self.min_concurrency = min_concurrency or settings.LLM_MIN_CONCURRENCY
+        self.max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        self.batch_max_size = batch_max_size or settings.LLM_BATCH_MAX_SIZE
+        self.batch_max_wait = (batch_max_wait_ms if batch_max_wait_ms is not None else settings.LLM_BATCH_MAX_WAIT_MS) / 1000.0
+        self.max_retries = max_retries if max_retries is not None else settings.LLM_MAX_RETRIES
+        self.retry_base_delay = retry_base_delay if retry_base_delay is not None else settings.LLM_RETRY_BASE_DELAY
+        self.retry_max_delay = retry_max_delay if retry_max_delay is not None else settings.LLM_RETRY_MAX_DELAY
+        self.retry_budget_ratio = retry_budget_ratio if retry_budget_ratio is not None else settings.LLM_RETRY_BUDGET_RATIO
+
+        # Registry for provider client factories
+        self._client_registry: Dict[str, Callable[[], BaseLLMClient]] = {
+            "stub": StubLLMClient,
+        }
+        self._clients: Dict[str, BaseLLMClient] = {}
+        self._model_routes: Dict[str, str] = {}
+        self._limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+        self._batchers: Dict[str, _ModelBatcher] = {}
+        self._retry_budget = _RETRY_BUDGET_INITIAL
+        self._breakers = breakers if breakers is not None else circuit_breakers
+
+    # --- Registry ---
+
+    def register_client(self, provider: str, client_factory: Callable[[], BaseLLMClient]) -> None:
+        """Registers a client class (or zero-argument factory) for a provider name."""
+        if provider in self._client_registry:
+            logger.warning(f"Overwriting existing LLM client for provider '{provider}'.")
+        self._client_registry[provider] = client_factory
+        self._drop_provider_state(provider)
+
+    def set_client(self, provider: str, client: BaseLLMClient) -> None:
+        """Installs an already configured client instance, e.g. a StubLLMClient in tests."""
+        self._client_registry[provider] = lambda: client
+        self._drop_provider_state(provider)
+        self._clients[provider] = client
+
+    def route_model(self, model_name: str, provider: str) -> None:
+        """Routes a model name to a specific provider."""
+        self._model_routes[model_name] = provider
+
+    def _drop_provider_state(self, provider: str) -> None:
+        self._clients.pop(provider, None)
+        for model_name in [m for m in self._batchers if self._resolve_provider(m) == provider]:
+            del self._batchers[model_name]
+
+    def _resolve_provider(self, model_name: str) -> str:
+        if model_name in self._model_routes:
+            return self._model_routes[model_name]
+        prefix, sep, _ = model_name.partition("/")
+        if sep and prefix in self._client_registry:
+            return prefix
+        return self.default_provider
+
+    def get_client(self, model_name: str) -> BaseLLMClient:
+        """Returns the (cached) client responsible for a model."""
+        provider = self._resolve_provider(model_name)
+        client = self._clients.get(provider)
+        if client is None:
+            factory = self._client_registry.get(provider)
+            if factory is None:
+                raise ValueError(f"Unsupported LLM provider: '{provider}' (model '{model_name}')")
+            client = factory()
+            self._clients[provider] = client
+        return client
+
+    def _get_limiter(self, model_name: str) -> AdaptiveConcurrencyLimiter:
+        limiter = self._limiters.get(model_name)
+        if limiter is None:
+            limiter = AdaptiveConcurrencyLimiter(
+                initial_limit=self.initial_concurrency,
+                min_limit=self.min_concurrency,
+                max_limit=self.max_concurrency,
+                name=f"llm:{model_name}"
+            )
+            self._limiters[model_name] = limiter
+        return limiter
+
+    def _get_breaker(self, model_name: str) -> CircuitBreaker:
+        # Throttling is handled by the limiter; only transient provider errors trip the breaker
+        return self._breakers.get(
+            f"llm:{model_name}",
+            expected_exceptions=(LLMRetryableError,),
+            excluded_exceptions=(LLMRateLimitError,)
+        )
+
+    def _get_batcher(self, model_name: str, client: BaseLLMClient) -> _ModelBatcher:
+        batcher = self._batchers.get(model_name)
+        if batcher is None:
+            batcher = _ModelBatcher(
+                self, model_name, client,
+                max_size=max(1, min(self.batch_max_size, client.max_batch_size)),
+                max_wait=self.batch_max_wait
+            )
+            self._batchers[model_name] = batcher
+        return batcher
+
+    # --- Call path ---
+
+    async def complete(self, request: LLMRequest) -> LLMResponse:
+        """
+        Sends a completion request through batching, the per-model limiter and retries.
+
+        Raises:
+            LLMClientError: If the call fails permanently or retries are exhausted.
+            CircuitBreakerOpenError: If the model's circuit breaker is open.
+        """
+        client = self.get_client(request.model_name)
+        if client.supports_batching and self.batch_max_size > 1 and client.max_batch_size > 1:
+            return await self._get_batcher(request.model_name, client).submit(request)
+        return await self._call_with_retries(request.model_name, lambda: client.complete(request))
+
+    async def complete_many(self, requests: List[LLMRequest]) -> List[LLMResponse]:
+        """Fans out many requests; batching and concurrency limits apply per model."""
+        return list(await asyncio.gather(*(self.complete(r) for r in requests)))
+
+    async def stream(self, request: LLMRequest) -> AsyncIterator[str]:
+        """
+        Streams completion text chunks for a request.
+
+        Streaming calls bypass batching but share the per-model limiter. Failures are retried
+        only before the first chunk is produced; once output has been yielded, errors propagate.
+        """
+        client = self.get_client(request.model_name)
+        limiter = self._get_limiter(request.model_name)
+        breaker = self._get_breaker(request.model_name)
+        self._retry_budget = min(_RETRY_BUDGET_MAX, self._retry_budget + self.retry_budget_ratio)
+        attempt = 0
+        while True:
+            await limiter.acquire()
+            self._update_gauges(request.model_name, limiter)
+            started = False
+            try:
+                async with breaker.protect():
+                    async for chunk in client.stream(request):
+                        started = True
+                        yield chunk
+            except LLMRetryableError as e:
+                delay = self._on_retryable_error(request.model_name, limiter, e, attempt, can_retry=not started)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                limiter.release(success=False)
+                self._update_gauges(request.model_name, limiter)
+                raise
+            limiter.release(success=True)
+            self._update_gauges(request.model_name, limiter)
+            return
+
+    async def _call_with_retries(
+        self,
+        model_name: str,
+        call: Callable[[], Awaitable[T]],
+        first_attempt: int = 0
+    ) -> T:
+        limiter = self._get_limiter(model_name)
+        breaker = self._get_breaker(model_name)
+        self._retry_budget = min(_RETRY_BUDGET_MAX, self._retry_budget + self.retry_budget_ratio)
+        attempt = first_attempt
+        while True:
+            await limiter.acquire()
+            self._update_gauges(model_name, limiter)
+            try:
+                async with breaker.protect():
+                    result = await call()
+            except LLMRetryableError as e:
+                delay = self._on_retryable_error(model_name, limiter, e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                limiter.release(success=False)
+                self._update_gauges(model_name, limiter)
+                raise
+            limiter.release(success=True)
+            self._update_gauges(model_name, limiter)
+            return result
+
+    def _on_retryable_error(
+        self,
+        model_name: str,
+        limiter: AdaptiveConcurrencyLimiter,
+        error: LLMRetryableError,
+        attempt: int,
+        can_retry: bool = True
+    ) -> Optional[float]:
+        """Releases the slot for a failed call and returns the backoff delay, or None to give up."""
+        throttled = isinstance(error, LLMRateLimitError)
+        limiter.release(success=False, throttled=throttled)
+        self._update_gauges(model_name, limiter)
+        if not can_retry or attempt >= self.max_retries or self._retry_budget < 1.0:
+            return None
+        self._retry_budget -= 1.0
+        LLM_RETRIES.labels(model=model_name, reason="throttled" if throttled else "transient").inc()
+        return self._backoff_delay(attempt, error.retry_after)
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Capped exponential backoff with full jitter; a provider hint sets the floor."""
+        delay = random.uniform(0.0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.retry_max_delay))
+        return delay
+
+    def _update_gauges(self, model_name: str, limiter: AdaptiveConcurrencyLimiter) -> None:
+        LLM_CONCURRENCY_LIMIT.labels(model=model_name).set(limiter.limit)
+        LLM_IN_FLIGHT.labels(model=model_name).set(limiter.in_flight)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the current limit, in-flight and queued counts per model."""
+        return {
+            model_name: {
+                "limit": limiter.limit,
+                "in_flight": limiter.in_flight,
+                "queued": limiter.queued,
+            }
+            for model_name, limiter in self._limiters.items()
+        }
+
+    async def close(self) -> None:
+        """Closes all instantiated provider clients."""
+        for client in self._clients.values():
+            await client.close()
+        self._clients.clear()
+        self._batchers.clear()
+
+
+# Global instance of the manager (Singleton-like access)
+llm_client_manager = LLMClientManager()
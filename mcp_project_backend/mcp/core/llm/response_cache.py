@@ -0,0 +1,220 @@
+"""
+Persistent prompt/response cache for LLM steps.
+
+Deterministic completions (temperature 0) are stored in a local SQLite file keyed by a hash of
+every request field that influences the output. Entries expire after a TTL and the file is kept
+under a byte budget by evicting the least recently used entries.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from prometheus_client import Counter
+
+from mcp.core.settings import settings
+from .base_client import LLMRequest, LLMResponse
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+LLM_CACHE_HITS = Counter(
+    'llm_cache_hits_total',
+    'Total number of LLM response cache hits',
+    ['model']
+)
+
+LLM_CACHE_MISSES = Counter(
+    'llm_cache_misses_total',
+    'Total number of LLM response cache misses',
+    ['model']
+)
+
+LLM_CACHE_EVICTIONS = Counter(
+    'llm_cache_evictions_total',
+    'Total number of LLM response cache entries evicted to stay under the size limit'
+)
+
+# After exceeding the byte budget, evict down to this fraction of it to avoid evicting on every put.
+_EVICTION_TARGET_RATIO = 0.9
+
+
+def is_cacheable(request: LLMRequest) -> bool:
+    """Only deterministic requests can be served from cache."""
+    return request.temperature is not None and request.temperature == 0
+
+
+def build_cache_key(request: LLMRequest) -> str:
+    """Hashes every request field that affects the completion."""
+    material = json.dumps(
+        [
+            request.model_name,
+            request.system_prompt,
+            request.prompt,
+            request.temperature,
+            request.max_tokens,
+            request.top_p,
+            request.top_k,
+        ],
+        separators=(',', ':'),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Disk-backed, size-bounded cache of LLM responses.
+
+    SQLite calls are blocking, so the async methods run them in a worker thread. The cache is
+    best effort: storage errors (locked database, full disk, unusable path) are logged and the
+    lookup counts as a miss or the write is skipped, so they never fail the LLM step.
+
+    Args:
+        path: SQLite file path. Defaults to settings.LLM_CACHE_PATH or a file in the temp dir.
+        max_bytes: Upper bound on the total size of stored responses.
+        default_ttl: TTL in seconds for entries stored without an explicit TTL.
+    """
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None, default_ttl: Optional[int] = None):
+        self.path = path or settings.LLM_CACHE_PATH or os.path.join(tempfile.gettempdir(), "mcp_llm_cache.sqlite3")
+        self.max_bytes = max_bytes or settings.LLM_CACHE_MAX_BYTES
+        self.default_ttl = default_ttl or settings.LLM_CACHE_DEFAULT_TTL
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                " key TEXT PRIMARY KEY,"
+                " model_name TEXT NOT NULL,"
+                " response TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " last_accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_responses_last_accessed ON llm_responses (last_accessed)")
+            self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    # --- Synchronous implementation (runs in a worker thread) ---
+
+    def _get_sync(self, key: str) -> Optional[LLMResponse]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT response, size, expires_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            response, size, expires_at = row
+            if expires_at <= now:
+                conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                return None
+            conn.execute("UPDATE llm_responses SET last_accessed = ? WHERE key = ?", (now, key))
+        return LLMResponse(**json.loads(response))
+
+    def _set_sync(self, key: str, response: LLMResponse, ttl: int) -> None:
+        payload = json.dumps(response.model_dump(), ensure_ascii=False)
+        size = len(payload.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            previous = conn.execute("SELECT size FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, model_name, response, size, expires_at, last_accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response.model_name, payload, size, now + ttl, now)
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked(conn, now)
+
+    def _evict_locked(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drops expired entries, then least recently used ones until under the target size."""
+        conn.execute("DELETE FROM llm_responses WHERE expires_at <= ?", (now,))
+        # Other processes may share the file, so re-sync the running total before evicting.
+        self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        target = int(self.max_bytes * _EVICTION_TARGET_RATIO)
+        if self._total_bytes <= target:
+            return
+        cursor = conn.execute("SELECT key, size FROM llm_responses ORDER BY last_accessed ASC")
+        to_delete = []
+        for key, size in cursor:
+            if self._total_bytes <= target:
+                break
+            to_delete.append((key,))
+            self._total_bytes -= size
+        cursor.close()
+        conn.executemany("DELETE FROM llm_responses WHERE key = ?", to_delete)
+        self.evictions += len(to_delete)
+        LLM_CACHE_EVICTIONS.inc(len(to_delete))
+
+    # --- Async API ---
+
+    async def get(self, request: LLMRequest) -> Optional[LLMResponse]:
+        """Returns the cached response for a request, recording a hit or miss."""
+        try:
+            cached = await asyncio.to_thread(self._get_sync, build_cache_key(request))
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"LLM response cache lookup failed, treating as a miss: {str(e)}")
+            cached = None
+        if cached is None:
+            self.misses += 1
+            LLM_CACHE_MISSES.labels(model=request.model_name).inc()
+        else:
+            self.hits += 1
+            LLM_CACHE_HITS.labels(model=request.model_name).inc()
+        return cached
+
+    async def set(self, request: LLMRequest, response: LLMResponse, ttl: Optional[int] = None) -> None:
+        """Stores a response for a request."""
+        try:
+            await asyncio.to_thread(self._set_sync, build_cache_key(request), response, ttl or self.default_ttl)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"LLM response cache write skipped: {str(e)}")
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        with self._lock:
+            self._connect().execute("DELETE FROM llm_responses")
+            self._total_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counts, hit ratio and current size for this process."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Global instance of the cache (Singleton-like access)
+llm_response_cache = LLMResponseCache()
@@ -0,0 +1,112 @@
+"""
+Local stub LLM provider with a configurable latency model.
+
+Stands in for a real provider during tests and benchmarks: it answers instantly from a
+responder function but sleeps according to the latency model, and can inject transient
+errors and throttling so retry and concurrency behaviour can be exercised offline.
+"""
+import asyncio
+import random
+import time
+from typing import AsyncIterator, Callable, List, Optional, Union
+from pydantic import BaseModel, Field
+
+from .base_client import BaseLLMClient, LLMRequest, LLMResponse, LLMRateLimitError, LLMRetryableError
+
+
+class StubLatencyModel(BaseModel):
+    """Latency and failure characteristics simulated by StubLLMClient."""
+    base_seconds: float = Field(default=0.05, ge=0.0, description="Fixed latency of every call.")
+    per_token_seconds: float = Field(default=0.0, ge=0.0, description="Extra latency per prompt token.")
+    jitter_seconds: float = Field(default=0.0, ge=0.0, description="Uniform random latency added to each call.")
+    per_stream_chunk_seconds: float = Field(default=0.0, ge=0.0, description="Delay between streamed chunks.")
+    per_batch_item_seconds: float = Field(default=0.0, ge=0.0, description="Extra latency per item in a batch call.")
+    error_rate: float = Field(default=0.0, ge=0.0, le=1.0, description="Probability of a transient error.")
+    rate_limit_rate: float = Field(default=0.0, ge=0.0, le=1.0, description="Probability of a throttling error.")
+    max_concurrency: Optional[int] = Field(default=None, gt=0, description="Calls above this in-flight count are throttled.")
+    seed: Optional[int] = None
+
+
+def _echo_responder(request: LLMRequest) -> str:
+    return f"[{request.model_name}] {request.prompt}"
+
+
+class StubLLMClient(BaseLLMClient):
+    """
+    In-process stub provider. Supports native batching so the batching path can be benchmarked.
+
+    Attributes:
+        calls: Number of provider calls made (a batch counts once).
+        peak_in_flight: Highest number of concurrent calls observed.
+    """
+    supports_batching = True
+    max_batch_size = 32
+
+    def __init__(
+        self,
+        latency_model: Optional[StubLatencyModel] = None,
+        responder: Optional[Callable[[LLMRequest], str]] = None
+    ):
+        self.latency_model = latency_model or StubLatencyModel()
+        self.responder = responder or _echo_responder
+        self._random = random.Random(self.latency_model.seed)
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def _latency_for(self, requests: List[LLMRequest]) -> float:
+        model = self.latency_model
+        tokens = max(len(r.prompt.split()) for r in requests)
+        latency = model.base_seconds + model.per_token_seconds * tokens
+        latency += model.per_batch_item_seconds * (len(requests) - 1)
+        if model.jitter_seconds:
+            latency += self._random.uniform(0.0, model.jitter_seconds)
+        return latency
+
+    def _maybe_fail(self) -> None:
+        model = self.latency_model
+        if model.max_concurrency is not None and self.in_flight > model.max_concurrency:
+            raise LLMRateLimitError("Stub provider concurrency exceeded.", retry_after=model.base_seconds)
+        if model.rate_limit_rate and self._random.random() < model.rate_limit_rate:
+            raise LLMRateLimitError("Stub provider throttled the request.")
+        if model.error_rate and self._random.random() < model.error_rate:
+            raise LLMRetryableError("Stub provider transient error.")
+
+    def _respond(self, request: LLMRequest, latency: float) -> LLMResponse:
+        text = self.responder(request)
+        return LLMResponse(
+            text=text,
+            model_name=request.model_name,
+            prompt_tokens=len(request.prompt.split()),
+            completion_tokens=len(text.split()),
+            latency_seconds=latency
+        )
+
+    async def _simulate_call(self, requests: List[LLMRequest]) -> float:
+        self.calls += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        start = time.perf_counter()
+        try:
+            await asyncio.sleep(self._latency_for(requests))
+            self._maybe_fail()
+        finally:
+            self.in_flight -= 1
+        return time.perf_counter() - start
+
+    async def complete(self, request: LLMRequest) -> LLMResponse:
+        latency = await self._simulate_call([request])
+        return self._respond(request, latency)
+
+    async def complete_batch(self, requests: List[LLMRequest]) -> List[Union[LLMResponse, Exception]]:
+        latency = await self._simulate_call(requests)
+        return [self._respond(r, latency) for r in requests]
+
+    async def stream(self, request: LLMRequest) -> AsyncIterator[str]:
+        """Yields the response word by word after the simulated time to first token."""
+        await self._simulate_call([request])
+        words = self.responder(request).split(" ")
+        for i, word in enumerate(words):
+            if i and self.latency_model.per_stream_chunk_seconds:
+                await asyncio.sleep(self.latency_model.per_stream_chunk_seconds)
+            yield word if i == 0 else " " + word
@@ -6,6 +6,7 @@ allowing for type-safe handling and validation of MCP configurations.
 """
 from pydantic import BaseModel, Field, validator, field_validator
 from typing import Optional, Dict, Union, Literal, List, Any
+from mcp.core.prompt_templates import CompiledPromptTemplate, compile_prompt_template
 
 # --- Individual MCP Type Configuration Models ---
 
@@ -28,6 +29,28 @@ class LLMConfig(BaseModel):
         default=None, ge=0.0, le=1.0, description="Nucleus sampling parameter.", alias="topP")
     top_k: Optional[int] = Field(
         default=None, gt=0, description="Top-k sampling parameter.", alias="topK")
+    stream: bool = Field(
+        default=False, description="Stream partial output to run subscribers as result_preview events.", alias="streamOutput")
+    cache_responses: bool = Field(
+        default=True, description="Reuse cached completions for identical deterministic (temperature 0) prompts.", alias="cacheResponses")
+    cache_ttl_seconds: Optional[int] = Field(
+        default=None, gt=0, description="Lifetime of cached completions. Defaults to the server-wide TTL.", alias="cacheTtlSeconds")
+
+    @field_validator('user_prompt_template')
+    @classmethod
+    def validate_user_prompt_template(cls, v):
+        # Compiling here rejects malformed templates when the MCP version is created,
+        # and warms the compiled-template cache used at execution time.
+        if v is not None:
+            compile_prompt_template(v)
+        return v
+
+    @property
+    def compiled_prompt_template(self) -> Optional[CompiledPromptTemplate]:
+        """The parsed user prompt template (cached per template string), or None if unset."""
+        if self.user_prompt_template is None:
+            return None
+        return compile_prompt_template(self.user_prompt_template)
 
 
 class NotebookConfig(BaseModel):
@@ -0,0 +1,139 @@
+"""
+Precompiled prompt templates for LLM MCP configurations.
+
+Templates use `{{ name }}` placeholders; dotted paths such as `{{ customer.address.city }}` or
+`{{ items.0.title }}` walk nested dicts and lists in the step inputs. A template is parsed once
+into a flat list of literal chunks and resolver functions, so rendering is a single join.
+
+Example:
+    template = compile_prompt_template("Summarize {{ doc.title }} for {{ audience }}.")
+    template.render({"doc": {"title": "Q3 report"}, "audience": "executives"})
+"""
+import json
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Tuple, Union
+
+_PLACEHOLDER_RE = re.compile(r"\{\{(.*?)\}\}", re.DOTALL)
+_PATH_RE = re.compile(r"^[A-Za-z_]\w*(?:\.\w+)*$")
+
+_MISSING = object()
+
+
+class PromptTemplateError(ValueError):
+    """Raised when a prompt template is malformed or cannot be rendered from the given inputs."""
+    pass
+
+
+def _resolve_path(context: Mapping[str, Any], path: Tuple[str, ...]) -> Any:
+    value: Any = context
+    for segment in path:
+        if isinstance(value, Mapping):
+            value = value.get(segment, _MISSING)
+        elif isinstance(value, Sequence) and not isinstance(value, (str, bytes)) and segment.isdigit():
+            index = int(segment)
+            value = value[index] if index < len(value) else _MISSING
+        else:
+            value = getattr(value, segment, _MISSING)
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+
+def _make_resolver(path: Tuple[str, ...]) -> Callable[[Mapping[str, Any]], Any]:
+    if len(path) == 1:
+        key = path[0]
+        return lambda context: context.get(key, _MISSING)
+    return lambda context: _resolve_path(context, path)
+
+
+def _to_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
+
+
+class CompiledPromptTemplate:
+    """
+    A parsed prompt template.
+
+    Attributes:
+        source: The original template string.
+        placeholders: Dotted placeholder paths in order of first appearance.
+    """
+    __slots__ = ("source", "placeholders", "_parts")
+
+    def __init__(self, source: str, parts: List[Union[str, Tuple[str, Callable[[Mapping[str, Any]], Any]]]]):
+        self.source = source
+        self._parts = parts
+        self.placeholders: List[str] = list(dict.fromkeys(p[0] for p in parts if isinstance(p, tuple)))
+
+    def render(self, context: Mapping[str, Any]) -> str:
+        """
+        Renders the template against the given inputs.
+
+        Raises:
+            PromptTemplateError: If any placeholder cannot be resolved.
+        """
+        chunks: List[str] = []
+        missing: List[str] = []
+        for part in self._parts:
+            if isinstance(part, str):
+                chunks.append(part)
+                continue
+            name, resolver = part
+            value = resolver(context)
+            if value is _MISSING:
+                missing.append(name)
+            else:
+                chunks.append(_to_text(value))
+        if missing:
+            raise PromptTemplateError(f"Missing inputs for prompt template placeholders: {', '.join(dict.fromkeys(missing))}")
+        return "".join(chunks)
+
+    def missing_inputs(self, context: Mapping[str, Any]) -> List[str]:
+        """Returns the placeholders that cannot be resolved from the given inputs."""
+        return [name for name in self.placeholders if _resolve_path(context, tuple(name.split("."))) is _MISSING]
+
+
+@lru_cache(maxsize=1024)
+def compile_prompt_template(template: str) -> CompiledPromptTemplate:
+    """
+    Parses a template string once; repeated calls with the same string return the cached result.
+
+    Raises:
+        PromptTemplateError: If a placeholder is unclosed or is not a valid dotted path.
+    """
+    parts: List[Union[str, Tuple[str, Callable[[Mapping[str, Any]], Any]]]] = []
+    position = 0
+    for match in _PLACEHOLDER_RE.finditer(template):
+        literal = template[position:match.start()]
+        if "{{" in literal:
+            raise PromptTemplateError(f"Malformed placeholder near: {literal[literal.index('{{'):][:40]!r}")
+        if literal:
+            parts.append(literal)
+        expression = match.group(1).strip()
+        if not _PATH_RE.match(expression):
+            raise PromptTemplateError(f"Invalid prompt template placeholder: {{{{{match.group(1)}}}}}")
+        parts.append((expression, _make_resolver(tuple(expression.split(".")))))
+        position = match.end()
+    tail = template[position:]
+    if "{{" in tail:
+        raise PromptTemplateError(f"Unclosed placeholder near: {tail[tail.index('{{'):][:40]!r}")
+    if tail:
+        parts.append(tail)
+    return CompiledPromptTemplate(template, parts)
+
+
+def build_prompt_context(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Builds the render context for step inputs.
+
+    `{{inputText}}` is kept as an alias of the `prompt_input` input for templates written
+    before named placeholders were supported.
+    """
+    if "prompt_input" in inputs and "inputText" not in inputs:
+        return {**inputs, "inputText": inputs["prompt_input"]}
+    return inputs
@@ -9,19 +9,24 @@ operations.
 Key functionalities:
 - Connect and disconnect a shared publisher client.
 - Publish messages (dictionaries) to specified Redis channels.
-- Subscribe to Redis channels and receive messages as an asynchronous generator.
+- Subscribe to Redis channels and receive messages as an asynchronous generator. All
+  subscriptions share one Redis connection per process (`RedisChannelMultiplexer`).
 
 Error handling is included for connection issues and message processing.
 """
 import asyncio
 import json
-from typing import AsyncGenerator, Dict, Any, Optional
+from typing import AsyncGenerator, Dict, Any, Optional, Set
 
 import redis.asyncio as aioredis
 from redis.asyncio import Redis  # For type hinting
 
 # from mcp.core.config import settings  # Assuming REDIS_URL is in settings - Unused if global instance is commented out
 
+# Bounds of the delay between subscriber reconnection attempts (seconds)
+_RECONNECT_MIN_DELAY = 0.5
+_RECONNECT_MAX_DELAY = 30.0
+
 
 class RedisPubSubManager:
     """
@@ -31,17 +36,19 @@ class RedisPubSubManager:
         redis_url (str): The URL for the Redis instance.
         _publisher_client (Optional[Redis]): The `aioredis.Redis` client instance for publishing messages.
                                             This client is intended to be long-lived.
+        _subscriber (RedisChannelMultiplexer): The shared subscriber connection for all subscriptions.
     """
-    def __init__(self, redis_url: str):
+    def __init__(self, redis_url: str, queue_size: int = 100):
         """
         Initializes the RedisPubSubManager with the given Redis URL.
 
         Args:
             redis_url: The connection URL for the Redis server (e.g., "redis://localhost:6379").
+            queue_size: Maximum messages buffered per subscriber before the oldest are dropped.
         """
         self.redis_url = redis_url
         self._publisher_client: Optional[Redis] = None
-        # Subscriber clients are created per subscription typically
+        self._subscriber = RedisChannelMultiplexer(redis_url, queue_size=queue_size)
 
     async def connect_publisher(self) -> None:
         """
@@ -113,72 +120,215 @@ class RedisPubSubManager:
         """
         Subscribes to a Redis channel and yields messages as they are received.
 
-        This method establishes a new, dedicated Redis connection for the subscription.
-        It handles connection management, message parsing (JSON), and graceful
-        disconnection.
+        All subscriptions in this process share the manager's single subscriber connection
+        (see `RedisChannelMultiplexer`); the channel is subscribed in Redis while at least one
+        caller is consuming it. A caller that falls more than `queue_size` messages behind
+        loses the oldest ones.
 
         Args:
             channel: The Redis channel name to subscribe to.
 
         Yields:
             A dictionary representing the JSON-decoded message received from the channel.
+            The same object is delivered to every subscriber of the channel; do not mutate it.
 
         Raises:
             asyncio.CancelledError: If the calling task is cancelled (e.g., client disconnects).
                                     This is re-raised to allow proper cleanup by the caller.
-            Exception: For other unhandled errors during subscription or message processing.
-                       These are printed to stderr and the subscription is terminated.
         """
-        subscriber_client: Optional[Redis] = None
-        pubsub: Optional[aioredis.client.PubSub] = None
         try:
-            subscriber_client = await aioredis.from_url(self.redis_url)
-            pubsub = subscriber_client.pubsub()
-            await pubsub.subscribe(channel)
-            print(f"Redis Pub/Sub Manager: Subscribed to channel '{channel}'")
-
+            queue = await self._subscriber.subscribe(channel)
+        except Exception as e:
+            print(
+                f"Redis Pub/Sub Manager: Error subscribing to channel '{channel}': {e}")
+            return
+        try:
             while True:
-                # Listen for messages with a timeout to allow graceful shutdown/disconnection checks
-                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-                if message and message.get("type") == "message":
-                    try:
-                        data = json.loads(message["data"])
-                        yield data
-                    except json.JSONDecodeError as e:
-                        print(
-                            f"Redis Pub/Sub Manager: Error decoding JSON message from channel '{channel}': {e} - Data: {message['data']}")
-                    except Exception as e:
-                        print(
-                            f"Redis Pub/Sub Manager: Error processing message from '{channel}': {e}")
-
-                # A mechanism to break the loop if the client/caller disconnects would be ideal here,
-                # e.g., checking an external flag or asyncio.CancelledError propagation.
-                # For FastAPI EventSourceResponse, request.is_disconnected() check is done in the route.
-                # Small sleep to prevent tight loop and allow task switching
-                await asyncio.sleep(0.01)
-
+                yield await queue.get()
         except asyncio.CancelledError:
             print(
                 f"Redis Pub/Sub Manager: Subscription to channel '{channel}' cancelled.")
             # This is expected when the client disconnects
             raise  # Re-raise to allow FastAPI/caller to handle it
-        except Exception as e:
-            print(
-                f"Redis Pub/Sub Manager: Error in subscription to channel '{channel}': {e}")
-            # Log error and potentially re-raise or handle based on policy
-            # For a persistent subscriber, you might implement retry logic here.
         finally:
-            if pubsub:
-                try:
-                    await pubsub.unsubscribe(channel)
-                    # pubsub.close() or await pubsub.close() - aioredis pubsub object itself might not have close
-                except Exception as e:
-                    print(
-                        f"Redis Pub/Sub Manager: Error during unsubscribe for channel '{channel}': {e}")
-            if subscriber_client:
-                await subscriber_client.close()
+            self._subscriber.unsubscribe(channel, queue)
+
+    async def disconnect_subscriber(self) -> None:
+        """Closes the shared subscriber connection; current subscriptions stop receiving messages."""
+        await self._subscriber.close()
+
+
+class RedisChannelMultiplexer:
+    """
+    Shares one Redis pub/sub connection among every subscriber in the process.
+
+    Each subscriber gets its own bounded asyncio queue. Channels are reference counted: a
+    channel is subscribed in Redis when its first queue is added and unsubscribed when its
+    last queue is removed. A single reader task decodes each message once and fans it out
+    to the channel's queues; a full queue drops its oldest message rather than blocking the
+    reader. If the connection fails, the reader reconnects and resubscribes every channel.
+
+    Args:
+        redis_url: The connection URL for the Redis server.
+        queue_size: Maximum messages buffered per subscriber.
+        client: An existing async Redis client (created from `redis_url` when omitted).
+    """
+    def __init__(self, redis_url: str, queue_size: int = 100, client: Optional[Redis] = None):
+        self.redis_url = redis_url
+        self.queue_size = queue_size
+        self._client = client
+        self._pubsub: Optional[aioredis.client.PubSub] = None
+        # Local demand: subscriber queues per channel
+        self._queues: Dict[str, Set[asyncio.Queue]] = {}
+        # Channels currently subscribed on the Redis connection
+        self._subscribed: Set[str] = set()
+        self._lock = asyncio.Lock()
+        self._reader: Optional[asyncio.Task] = None
+        self.dropped_messages = 0
+
+    @property
+    def channel_count(self) -> int:
+        return len(self._queues)
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._queues.values())
+
+    async def subscribe(self, channel: str) -> asyncio.Queue:
+        """
+        Adds a subscriber to a channel.
+
+        Returns:
+            The subscriber's queue of decoded messages. Pass it to `unsubscribe` when done.
+
+        Raises:
+            Exception: If subscribing the channel in Redis fails; the subscriber is not added.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._queues.setdefault(channel, set()).add(queue)
+        try:
+            await self._sync_channel(channel)
+        except BaseException:
+            self.unsubscribe(channel, queue)
+            raise
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.get_running_loop().create_task(self._read())
+        return queue
+
+    def unsubscribe(self, channel: str, queue: asyncio.Queue) -> None:
+        """Removes a subscriber; the channel is unsubscribed in Redis once it has none left."""
+        queues = self._queues.get(channel)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._queues[channel]
+            # Synchronous so it is safe from finally blocks of cancelled generators
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:  # Finalized after the loop stopped; nothing left to unsubscribe
+                return
+            task = loop.create_task(self._sync_channel(channel))
+            task.add_done_callback(self._log_sync_failure)
+
+    async def _sync_channel(self, channel: str) -> None:
+        # Brings the Redis subscription for one channel in line with local demand.
+        async with self._lock:
+            wanted = channel in self._queues
+            if wanted and channel not in self._subscribed:
+                await self._connect()
+                await self._pubsub.subscribe(channel)
+                self._subscribed.add(channel)
+            elif not wanted and channel in self._subscribed:
+                self._subscribed.discard(channel)
+                await self._pubsub.unsubscribe(channel)
+
+    @staticmethod
+    def _log_sync_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Redis Pub/Sub Manager: Error unsubscribing channel: {task.exception()}")
+
+    async def _connect(self) -> None:
+        if self._pubsub is not None:
+            return
+        if self._client is None:
+            self._client = aioredis.from_url(self.redis_url)
+        self._pubsub = self._client.pubsub()
+        print(f"Redis Pub/Sub Manager: Subscriber connected to {self.redis_url}")
+
+    async def _read(self) -> None:
+        backoff = _RECONNECT_MIN_DELAY
+        while self._queues:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Redis Pub/Sub Manager: Subscriber connection failed, reconnecting in {backoff:.1f}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(_RECONNECT_MAX_DELAY, backoff * 2)
+                await self._reconnect()
+                continue
+            backoff = _RECONNECT_MIN_DELAY
+            if message and message.get("type") == "message":
+                self._dispatch(message)
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        channel = message["channel"]
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        queues = self._queues.get(channel)
+        if not queues:
+            return
+        try:
+            data = json.loads(message["data"])
+        except json.JSONDecodeError as e:
             print(
-                f"Redis Pub/Sub Manager: Unsubscribed and connection closed for channel '{channel}'.")
+                f"Redis Pub/Sub Manager: Error decoding JSON message from channel '{channel}': {e} - Data: {message['data']}")
+            return
+        for queue in queues:
+            if queue.full():
+                # A slow consumer loses its oldest message instead of stalling everyone else
+                queue.get_nowait()
+                self.dropped_messages += 1
+            queue.put_nowait(data)
+
+    async def _reconnect(self) -> None:
+        async with self._lock:
+            await self._close_pubsub()
+            try:
+                await self._connect()
+                channels = list(self._queues)
+                if channels:
+                    await self._pubsub.subscribe(*channels)
+                    self._subscribed.update(channels)
+            except Exception as e:
+                # The reader retries on its next failed read
+                print(f"Redis Pub/Sub Manager: Error reconnecting subscriber: {e}")
+
+    async def _close_pubsub(self) -> None:
+        pubsub, self._pubsub = self._pubsub, None
+        self._subscribed.clear()
+        if pubsub is not None:
+            try:
+                await pubsub.reset()
+            except Exception:
+                pass
+
+    async def close(self) -> None:
+        """Stops the reader and closes the subscriber connection."""
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        async with self._lock:
+            await self._close_pubsub()
+            if self._client is not None:
+                await self._client.close()
+                self._client = None
 
 # Global instance (optional, can be managed by FastAPI dependency injection)
 # Ensure settings.REDIS_URL is available when this module is imported if using global instance this way.
@@ -1,4 +1,4 @@
 from mcp.core.config import settings
 from mcp.core.pubsub.redis_pubsub import RedisPubSubManager
 
-redis_pubsub_manager = RedisPubSubManager(settings.REDIS_URL) 
\ No newline at end of file
+redis_pubsub_manager = RedisPubSubManager(settings.REDIS_URL, queue_size=settings.PUBSUB_CLIENT_QUEUE_SIZE) 
\ No newline at end of file
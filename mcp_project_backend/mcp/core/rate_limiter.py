@@ -1,63 +1,352 @@
-from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
+"""
+Request rate limiting.
+
+`RateLimiter` implements GCRA (the generic cell rate algorithm): for each client it keeps
+a single timestamp, the theoretical arrival time (TAT) of its next request, so a check is
+O(1) in time and memory regardless of the quota. A client may burst up to `max_requests`
+at once and is then held to one request every `window_seconds / max_requests`.
+
+A client whose TAT has passed is indistinguishable from one never seen before, so idle
+clients are dropped as the limiter runs; `max_clients` additionally caps the table by
+evicting the least recently seen clients.
+
+`DistributedRateLimiter` runs the same algorithm in Redis so that a quota holds across
+all workers, and falls back to the in-process table while Redis is unavailable.
+"""
 import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from mcp.core.concurrency_limiter import AdaptiveConcurrencyLimiter
 from mcp.core.config import settings
 
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:  # Only DistributedRateLimiter needs the client library
+    aioredis = None
+
+    class RedisError(Exception):
+        """Stand-in so callers can still catch Redis errors when redis is not installed."""
+
+logger = logging.getLogger(__name__)
+
+# Slack for float rounding: on a large monotonic clock, (now + window) - now can come out a
+# hair above window, which would refuse a request that exactly fills the quota.
+_EPSILON = 1e-9
+
+
+class RateLimitResult(NamedTuple):
+    """
+    Outcome of a rate limit check.
+
+    Attributes:
+        allowed: Whether the request may proceed.
+        limit: Maximum burst size (`max_requests`).
+        remaining: Requests the client could still make right now.
+        retry_after: Seconds until the next request would be allowed (0 if allowed).
+        reset_after: Seconds until the client's full quota is available again.
+    """
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float
+    reset_after: float
+
+
 class RateLimiter:
+    """
+    GCRA rate limiter keyed by client id.
+
+    Args:
+        max_requests: Requests allowed per window (and maximum burst)
+        window_seconds: Length of the window in seconds
+        max_concurrent: Starting limit on concurrent checks through `__call__`; it then adapts to latency
+        max_clients: Upper bound on tracked clients; least recently seen are evicted first
+        name: Label for the concurrency metrics; not exported when omitted
+    """
     def __init__(
         self,
         max_requests: int = 100,
         window_seconds: int = 60,
-        max_concurrent: int = 10
+        max_concurrent: int = 10,
+        max_clients: Optional[int] = None,
+        name: Optional[str] = None
     ):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
         self.max_concurrent = max_concurrent
-        self.requests: Dict[str, list] = {}
-        self._semaphore = asyncio.Semaphore(max_concurrent)
-
-    def _get_window_start(self) -> datetime:
-        return datetime.now() - timedelta(seconds=self.window_seconds)
-
-    def _cleanup_old_requests(self, client_id: str) -> None:
-        if client_id in self.requests:
-            self.requests[client_id] = [
-                ts for ts in self.requests[client_id]
-                if ts > self._get_window_start()
-            ]
-
-    def _add_request(self, client_id: str) -> None:
-        if client_id not in self.requests:
-            self.requests[client_id] = []
-        self.requests[client_id].append(datetime.now())
-
-    def _is_rate_limited(self, client_id: str) -> bool:
-        self._cleanup_old_requests(client_id)
-        if client_id in self.requests:
-            return len(self.requests[client_id]) >= self.max_requests
-        return False
-
-    async def __call__(self, client_id: str) -> None:
-        async with self._semaphore:
-            if self._is_rate_limited(client_id):
-                raise RateLimitExceededError(
-                    f"Rate limit exceeded for client {client_id}."
-                )
-            self._add_request(client_id)
+        self.max_clients = max_clients or settings.RATE_LIMIT_MAX_CLIENTS
+        self.emission_interval = window_seconds / max_requests
+        # Theoretical arrival time per client, least recently seen first
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=max_concurrent,
+            min_limit=settings.CONCURRENCY_MIN_LIMIT,
+            max_limit=max(max_concurrent, int(max_concurrent * settings.CONCURRENCY_MAX_LIMIT_FACTOR)),
+            latency_tolerance=settings.CONCURRENCY_LATENCY_TOLERANCE,
+            name=f"rate_limiter:{name}" if name else None
+        )
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    def check(self, client_id: str, cost: int = 1, now: Optional[float] = None) -> RateLimitResult:
+        """
+        Checks a request against the client's quota and, if allowed, counts it.
+
+        Args:
+            client_id: Identity the quota applies to
+            cost: Number of requests this call counts as
+            now: Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            RateLimitResult: Whether the request is allowed, plus header values
+        """
+        now = time.monotonic() if now is None else now
+        self._evict_idle(now)
+
+        tat = max(self._tats.get(client_id, now), now)
+        new_tat = tat + self.emission_interval * cost
+        allowed = new_tat - now <= self.window_seconds + _EPSILON
+        if allowed:
+            self._tats[client_id] = new_tat
+            self._tats.move_to_end(client_id)
+            if len(self._tats) > self.max_clients:
+                self._tats.popitem(last=False)
+        else:
+            new_tat = tat
+        return self._result(allowed, now, new_tat)
+
+    def peek(self, client_id: str, now: Optional[float] = None) -> RateLimitResult:
+        """Returns the client's current quota without counting a request."""
+        now = time.monotonic() if now is None else now
+        tat = max(self._tats.get(client_id, now), now)
+        return self._result(tat + self.emission_interval - now <= self.window_seconds + _EPSILON, now, tat)
+
+    def _result(self, allowed: bool, now: float, tat: float) -> RateLimitResult:
+        used = tat - now
+        remaining = max(0, math.floor((self.window_seconds - used) / self.emission_interval + _EPSILON))
+        retry_after = 0.0 if allowed else used + self.emission_interval - self.window_seconds
+        return RateLimitResult(allowed, self.max_requests, remaining, max(0.0, retry_after), max(0.0, used))
+
+    def _evict_idle(self, now: float) -> None:
+        # Clients whose TAT has passed hold no state worth keeping. Looking only at the
+        # least recently seen end keeps this amortized O(1) per check.
+        tats = self._tats
+        while tats:
+            client_id, tat = next(iter(tats.items()))
+            if tat > now:
+                break
+            del tats[client_id]
+
+    def reset(self, client_id: Optional[str] = None) -> None:
+        """Forgets one client's usage, or every client's."""
+        if client_id is None:
+            self._tats.clear()
+        else:
+            self._tats.pop(client_id, None)
+
+    async def consume(self, client_id: str, cost: int = 1) -> RateLimitResult:
+        """Async form of `check`, shared with limiters whose state is not in-process."""
+        return self.check(client_id, cost)
+
+    async def consume_many(self, requests: Sequence[Tuple[str, int]]) -> List[RateLimitResult]:
+        """Checks several (client_id, cost) pairs, in order."""
+        return [self.check(client_id, cost) for client_id, cost in requests]
+
+    async def __call__(self, client_id: str) -> RateLimitResult:
+        async with self._limiter.slot():
+            result = await self.consume(client_id)
+        if not result.allowed:
+            raise RateLimitExceededError(
+                f"Rate limit exceeded for client {client_id}.",
+                retry_after=result.retry_after
+            )
+        return result
+
+
+# GCRA over a batch of keys, atomically and on Redis' clock so workers need not agree on time.
+# ARGV: emission interval (ms), tolerance (ms), then one cost per key.
+# Returns, per key: allowed (0/1) and the time (ms) until the key's quota is fully restored.
+_GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+local results = {}
+for i, key in ipairs(KEYS) do
+    local tat = tonumber(redis.call('GET', key)) or now
+    if tat < now then
+        tat = now
+    end
+    local new_tat = tat + interval * tonumber(ARGV[i + 2])
+    local allowed = 0
+    if new_tat - now <= tolerance then
+        allowed = 1
+        redis.call('SET', key, math.ceil(new_tat), 'PX', math.max(1, math.ceil(new_tat - now)))
+    else
+        new_tat = tat
+    end
+    results[#results + 1] = allowed
+    results[#results + 1] = math.ceil(new_tat - now)
+end
+return results
+"""
+
+
+class DistributedRateLimiter(RateLimiter):
+    """
+    GCRA rate limiter whose state lives in Redis, so a quota is shared by every worker.
+
+    Checks issued concurrently (within one event loop iteration) are sent to Redis as a
+    single script call. If Redis fails, checks fall back to this process's own table for
+    `retry_interval` seconds before Redis is tried again; during that time each worker
+    enforces the full quota on its own.
+
+    Args:
+        max_requests: Requests allowed per window (and maximum burst)
+        window_seconds: Length of the window in seconds
+        max_concurrent: Starting limit on concurrent checks through `__call__`
+        key_prefix: Prefix of the Redis keys holding each client's state
+        client: An existing async Redis client (created from REDIS_URL when omitted)
+        retry_interval: Seconds to use the local fallback after a Redis failure
+        name: Label for the concurrency metrics; not exported when omitted
+    """
+    def __init__(
+        self,
+        max_requests: int = 100,
+        window_seconds: int = 60,
+        max_concurrent: int = 10,
+        max_clients: Optional[int] = None,
+        key_prefix: str = "ratelimit",
+        client: Optional[object] = None,
+        retry_interval: Optional[float] = None,
+        name: Optional[str] = None
+    ):
+        super().__init__(max_requests, window_seconds, max_concurrent, max_clients, name)
+        self.key_prefix = key_prefix
+        self._client = client
+        self.retry_interval = retry_interval if retry_interval is not None else settings.RATE_LIMIT_REDIS_RETRY_INTERVAL
+        self._redis_unavailable_until = 0.0
+        self._pending: List[Tuple[str, int, "asyncio.Future[RateLimitResult]"]] = []
+        # Batches in flight; the event loop only keeps weak references to tasks
+        self._flushes: Set["asyncio.Task[List[RateLimitResult]]"] = set()
+        self._gcra_script = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            if aioredis is None:
+                raise RuntimeError("The redis package is required for distributed rate limiting")
+            self._client = aioredis.from_url(settings.REDIS_URL)
+        return self._client
+
+    @property
+    def gcra_script(self):
+        """The GCRA script, sent as EVALSHA with its hash; redis-py reloads it on NOSCRIPT."""
+        if self._gcra_script is None:
+            self._gcra_script = self.client.register_script(_GCRA_SCRIPT)
+        return self._gcra_script
+
+    def _key(self, client_id: str) -> str:
+        return f"{self.key_prefix}:{client_id}"
+
+    async def consume(self, client_id: str, cost: int = 1) -> RateLimitResult:
+        """Checks and counts a request against the shared quota."""
+        if time.monotonic() < self._redis_unavailable_until:
+            return self.check(client_id, cost)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((client_id, cost, future))
+        if len(self._pending) == 1:
+            # Let the other checks issued in this loop iteration join the batch
+            loop.call_soon(self._flush_pending)
+        return await future
+
+    def _flush_pending(self) -> None:
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self.consume_many([(c, n) for c, n, _ in batch]))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+        def deliver(done: "asyncio.Task[List[RateLimitResult]]") -> None:
+            if done.cancelled():
+                for _, _, future in batch:
+                    future.cancel()
+                return
+            error = done.exception()
+            for (_, _, future), result in zip(batch, done.result() if error is None else [error] * len(batch)):
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+        task.add_done_callback(deliver)
+
+    async def consume_many(self, requests: Sequence[Tuple[str, int]]) -> List[RateLimitResult]:
+        """Checks several (client_id, cost) pairs with one Redis round trip."""
+        if not requests:
+            return []
+        if time.monotonic() < self._redis_unavailable_until:
+            return await super().consume_many(requests)
+        try:
+            reply = await self.gcra_script(
+                keys=[self._key(client_id) for client_id, _ in requests],
+                args=[self.emission_interval * 1000, self.window_seconds * 1000, *(cost for _, cost in requests)]
+            )
+        except (RedisError, OSError, RuntimeError) as e:
+            self._redis_unavailable_until = time.monotonic() + self.retry_interval
+            logger.warning(f"Rate limiter '{self.key_prefix}' falling back to local limits for {self.retry_interval:.0f}s: {str(e)}")
+            return await super().consume_many(requests)
+        return [
+            self._result(bool(int(reply[i])), 0.0, int(reply[i + 1]) / 1000)
+            for i in range(0, len(reply), 2)
+        ]
+
 
 class RateLimitExceededError(Exception):
     """Raised when the rate limit is exceeded."""
-    pass
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def create_rate_limiter(name: str, max_requests: int, window_seconds: int, max_concurrent: int = 10) -> RateLimiter:
+    """
+    Builds a limiter of the kind selected by RATE_LIMIT_BACKEND ("redis" or "local").
+
+    Args:
+        name: Identifies the limiter's keys in Redis, e.g. "workflow"
+        max_requests: Requests allowed per window
+        window_seconds: Length of the window in seconds
+        max_concurrent: Starting limit on concurrent checks through `__call__`
+    """
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return DistributedRateLimiter(
+            max_requests=max_requests,
+            window_seconds=window_seconds,
+            max_concurrent=max_concurrent,
+            key_prefix=f"ratelimit:{name}",
+            name=name
+        )
+    return RateLimiter(max_requests=max_requests, window_seconds=window_seconds, max_concurrent=max_concurrent, name=name)
 
 # Create rate limiter instances
-workflow_rate_limiter = RateLimiter(
+workflow_rate_limiter = create_rate_limiter(
+    "workflow",
     max_requests=settings.WORKFLOW_MAX_REQUESTS,
     window_seconds=settings.WORKFLOW_RATE_WINDOW,
     max_concurrent=settings.WORKFLOW_MAX_CONCURRENT
 )
 
 # Create separate rate limiter for workflow steps
-workflow_steps_rate_limiter = RateLimiter(
+workflow_steps_rate_limiter = create_rate_limiter(
+    "workflow_steps",
     max_requests=settings.WORKFLOW_STEPS_MAX_REQUESTS,
     window_seconds=settings.WORKFLOW_STEPS_RATE_WINDOW,
     max_concurrent=settings.WORKFLOW_STEPS_MAX_CONCURRENT
@@ -0,0 +1,199 @@
+"""
+Per-run pipeline that ships executor log lines in batches.
+
+Executors append lines synchronously into a bounded ring buffer. A background task drains the
+buffer every RUN_LOG_FLUSH_INTERVAL_MS and publishes all collected lines as a single `log`
+event, and appends them to `WorkflowStepExecution.logs` in chunks rather than line by line.
+Publishing is best-effort; the DB copy is written whether or not it succeeds.
+When a step is noisier than the buffer can absorb, the oldest lines are dropped and the
+number of dropped lines is reported with the next batch.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from mcp.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RunLogPipeline:
+    """
+    Collects log lines for one workflow run and flushes them in batches.
+
+    Args:
+        workflow_run_id: The run the lines belong to.
+        streaming_service: WorkflowStreamingService used to publish batches (optional).
+        session_factory: Creates the sessions used to append lines to WorkflowStepExecution.logs
+            (optional). Each chunk is written in a session of its own, in a worker thread.
+    """
+    def __init__(
+        self,
+        workflow_run_id: Any,
+        streaming_service: Optional[Any] = None,
+        session_factory: Optional[Callable[[], Session]] = None,
+        capacity: Optional[int] = None,
+        flush_interval_ms: Optional[float] = None,
+        db_chunk_lines: Optional[int] = None,
+        db_flush_interval: Optional[float] = None
+    ):
+        self.workflow_run_id = workflow_run_id
+        self.streaming_service = streaming_service
+        self.session_factory = session_factory
+        self.flush_interval = (flush_interval_ms or settings.RUN_LOG_FLUSH_INTERVAL_MS) / 1000.0
+        self.db_chunk_lines = db_chunk_lines or settings.RUN_LOG_DB_CHUNK_LINES
+        self.db_flush_interval = db_flush_interval or settings.RUN_LOG_DB_FLUSH_INTERVAL
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=capacity or settings.RUN_LOG_BUFFER_SIZE)
+        self._dropped = 0
+        self._db_pending: Dict[str, List[str]] = {}
+        self._db_pending_lines = 0
+        self._last_db_flush = time.monotonic()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def append(self, step_id: str, message: str, level: str = "INFO") -> None:
+        """Buffers a log line. Never blocks and never performs I/O."""
+        if self._closed:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self._dropped += 1
+        self._buffer.append({
+            "step_id": step_id,
+            "message": message,
+            "level": level,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        })
+        self._ensure_flusher()
+        self._wakeup.set()
+
+    def _ensure_flusher(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = self._wakeup or asyncio.Event()
+            self._stop = self._stop or asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                # While DB lines are pending, wake up in time to write them even if the step goes quiet.
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.db_flush_interval if self._db_pending_lines else None)
+                # Let more lines accumulate so they ship together; close() cuts the wait short.
+                await asyncio.wait_for(self._stop.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush logs for run {self.workflow_run_id}: {e}")
+
+    async def flush(self, force_db: bool = False) -> None:
+        """Publishes buffered lines as one event and appends them to the DB when a chunk is due."""
+        entries = list(self._buffer)
+        self._buffer.clear()
+        dropped, self._dropped = self._dropped, 0
+
+        if entries:
+            # Queued for the DB first, so lines survive a failed publish
+            for entry in entries:
+                line = f"{entry['timestamp']} [{entry['level']}] {entry['message']}"
+                self._db_pending.setdefault(entry["step_id"], []).append(line)
+            self._db_pending_lines += len(entries)
+            if self.streaming_service is not None:
+                payload = {"entries": entries, "dropped": dropped}
+                try:
+                    await self.streaming_service.publish_run_update(self.workflow_run_id, "log", payload)
+                except Exception as e:
+                    logger.warning(f"Failed to publish logs for run {self.workflow_run_id}: {e}")
+
+        db_due = (
+            self._db_pending_lines >= self.db_chunk_lines
+            or time.monotonic() - self._last_db_flush >= self.db_flush_interval
+        )
+        if self._db_pending_lines and (force_db or db_due):
+            await self._write_db_chunks()
+
+    async def _write_db_chunks(self) -> None:
+        pending, self._db_pending = self._db_pending, {}
+        self._db_pending_lines = 0
+        self._last_db_flush = time.monotonic()
+        if self.session_factory is None:
+            return
+        try:
+            # Blocking DB I/O stays off the event loop, and a session of its own never commits
+            # or rolls back changes the engine has pending on the run's session.
+            await asyncio.to_thread(self._write_in_new_session, pending)
+        except Exception as e:
+            logger.error(f"Failed to append logs for run {self.workflow_run_id}: {e}")
+
+    def _write_in_new_session(self, pending: Dict[str, List[str]]) -> None:
+        db = self.session_factory()
+        try:
+            self._append_logs(db, pending)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _append_logs(self, db: Session, pending: Dict[str, List[str]]) -> None:
+        from mcp.db.models import WorkflowStepExecution
+
+        for step_id, lines in pending.items():
+            chunk = "\n".join(lines) + "\n"
+            db.query(WorkflowStepExecution).filter(
+                WorkflowStepExecution.workflow_run_id == str(self.workflow_run_id),
+                WorkflowStepExecution.step_id_in_graph == step_id
+            ).update(
+                {WorkflowStepExecution.logs: func.coalesce(WorkflowStepExecution.logs, "") + chunk},
+                synchronize_session=False
+            )
+
+    async def close(self) -> None:
+        """
+        Stops the flusher and writes out everything still buffered.
+
+        The flusher is woken up and allowed to finish rather than cancelled, so a batch it has
+        already taken from the buffer is not lost halfway through being published.
+        """
+        self._closed = True
+        if self._task is not None:
+            self._stop.set()
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush(force_db=True)
+
+
+# Active pipelines, one per workflow run in this process.
+_run_pipelines: Dict[str, RunLogPipeline] = {}
+
+
+def get_run_log_pipeline(
+    workflow_run_id: Any,
+    streaming_service: Optional[Any] = None,
+    session_factory: Optional[Callable[[], Session]] = None
+) -> RunLogPipeline:
+    """Returns the pipeline for a run, creating it on first use so all executors of the run share it."""
+    key = str(workflow_run_id)
+    pipeline = _run_pipelines.get(key)
+    if pipeline is None:
+        pipeline = RunLogPipeline(workflow_run_id, streaming_service=streaming_service, session_factory=session_factory)
+        _run_pipelines[key] = pipeline
+    return pipeline
+
+
+async def close_run_log_pipeline(workflow_run_id: Any) -> None:
+    """Flushes and discards the pipeline for a finished run."""
+    pipeline = _run_pipelines.pop(str(workflow_run_id), None)
+    if pipeline is not None:
+        await pipeline.close()
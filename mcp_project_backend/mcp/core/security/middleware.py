@@ -1,14 +1,83 @@
-from typing import Callable
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
 from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 from starlette.middleware.gzip import GZipMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.responses import JSONResponse
+from prometheus_client import Counter, Gauge
 
 from mcp.core.settings import settings
 from mcp.core.logging import logger
+from mcp.core.event_loop_monitor import EventLoopLagMonitor, event_loop_lag_monitor
+from mcp.core.rate_limiter import RateLimiter, create_rate_limiter
+
+# Prometheus metrics
+LOAD_SHED_REJECTED = Counter(
+    'load_shed_rejected_total',
+    'Requests rejected by load shedding',
+    ['reason', 'priority']
+)
+
+HTTP_REQUESTS_PENDING = Gauge(
+    'http_requests_pending',
+    'Requests accepted but not yet responding'
+)
+
+V = TypeVar('V')
+
+
+def _parse_route_rules(rules: Dict[str, V]) -> List[Tuple[Optional[str], str, V]]:
+    """Parses "[METHOD ]/path/prefix" -> value settings into (method, prefix, value), longest prefix first."""
+    parsed = []
+    for rule, value in rules.items():
+        method, _, path = rule.strip().rpartition(" ")
+        parsed.append((method.upper() or None, path, value))
+    parsed.sort(key=lambda rule: len(rule[1]), reverse=True)
+    return parsed
+
+
+def _match_route(rules: List[Tuple[Optional[str], str, V]], method: str, path: str) -> Optional[Tuple[Optional[str], str, V]]:
+    for rule in rules:
+        if path.startswith(rule[1]) and (rule[0] is None or rule[0] == method):
+            return rule
+    return None
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def verify_api_key(raw_key: str) -> Optional[str]:
+    """Looks an X-API-Key value up in the database; returns the key's id if it is valid. Blocking."""
+    from mcp.db.session import SessionLocal
+    from mcp.core.services.api_key_service import APIKeyService
+
+    db = SessionLocal()
+    try:
+        api_key = APIKeyService(db).validate_api_key(raw_key)
+        return str(api_key.id) if api_key is not None else None
+    finally:
+        db.close()
+
+
+def verify_bearer_token(token: str) -> Optional[str]:
+    """Checks a JWT's signature and expiry (no I/O); returns its subject if it is valid."""
+    from mcp.core.security.jwt_manager import JWTManager
+
+    payload = JWTManager.decode_token(token)
+    subject = payload.get("sub") if payload else None
+    return str(subject) if subject is not None else None
+
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     """Middleware for adding security headers to responses."""
@@ -27,42 +96,258 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         
         return response
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Middleware for rate limiting requests."""
-    
-    def __init__(self, app, rate_limit: int = 100, window: int = 60):
-        super().__init__(app)
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware for rate limiting requests.
+
+    Each request is attributed to an identity: a verified API key (X-API-Key), else a
+    verified user (Bearer JWT), else the client IP. Identities an earlier middleware already
+    stored in `request.state.api_key_id` / `request.state.user_id` are used as they are; the
+    ones verified here are stored there for the endpoints. Unverified keys and tokens count
+    against the client IP, since values that could be minted freely would otherwise get a
+    fresh quota per request and flood the limiter's client table.
+
+    Tokens are verified in-process. API keys need a database lookup, so results are cached
+    for `verified_key_ttl` seconds, and a key not in the cache is only looked up once the
+    request has been counted against its IP: rotating keys cannot skip the IP limit nor
+    turn each request into a query.
+
+    Quotas are enforced per identity by the shared GCRA engine in `mcp.core.rate_limiter`,
+    so state is O(1) and bounded per identity, and shared across workers when
+    RATE_LIMIT_BACKEND is "redis".
+
+    Args:
+        app: The ASGI application to wrap
+        rate_limit: Default requests per window for each identity
+        window: Window in seconds
+        route_quotas: "[METHOD ]/path/prefix" -> requests per window, overriding the default
+            for matching requests (longest prefix wins)
+        identity_quotas: "api_key" / "user" / "ip" -> requests per window for that kind of identity
+        exempt_paths: Path prefixes that are never limited (health checks, metrics)
+        api_key_verifier: Blocking callable returning the id of a valid API key, else None
+            (API keys are not used as identities when omitted)
+        token_verifier: Callable returning the subject of a valid Bearer token, else None
+            (tokens are not used as identities when omitted)
+        verified_key_ttl: Seconds an API key lookup result is reused
+        max_verified_keys: Most API key lookup results kept
+    """
+
+    def __init__(
+        self,
+        app,
+        rate_limit: int = 100,
+        window: int = 60,
+        route_quotas: Optional[Dict[str, int]] = None,
+        identity_quotas: Optional[Dict[str, Optional[int]]] = None,
+        exempt_paths: Sequence[str] = (),
+        api_key_verifier: Optional[Callable[[str], Optional[str]]] = None,
+        token_verifier: Optional[Callable[[str], Optional[str]]] = None,
+        verified_key_ttl: float = 60.0,
+        max_verified_keys: int = 10000
+    ):
+        self.app = app
         self.rate_limit = rate_limit  # requests per window
         self.window = window  # window in seconds
-        self.requests = {}  # {ip: [(timestamp, count), ...]}
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        client_ip = request.client.host
-        
-        # Clean up old requests
-        current_time = time.time()
-        if client_ip in self.requests:
-            self.requests[client_ip] = [
-                (ts, count) for ts, count in self.requests[client_ip]
-                if current_time - ts < self.window
-            ]
-        
-        # Count requests in current window
-        request_count = sum(count for _, count in self.requests.get(client_ip, []))
-        
-        if request_count >= self.rate_limit:
-            logger.warning(f"Rate limit exceeded for IP: {client_ip}")
-            return Response(
-                content="Rate limit exceeded",
-                status_code=429
+        self.identity_quotas = {kind: quota for kind, quota in (identity_quotas or {}).items() if quota}
+        self.exempt_paths = tuple(exempt_paths)
+        self.route_rules = _parse_route_rules(route_quotas or {})
+        self._limiters: Dict[Tuple[str, str], RateLimiter] = {}
+        self.api_key_verifier = api_key_verifier
+        self.token_verifier = token_verifier
+        self.verified_key_ttl = verified_key_ttl
+        self.max_verified_keys = max_verified_keys
+        # Key digest -> (key id, or "" for keys that failed verification; expiry), least recently used first
+        self._verified_keys: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        kind, identity = self._identity(scope)
+        result = None
+        if kind == "ip":
+            raw_key = _header(scope, b"x-api-key") if self.api_key_verifier is not None else None
+            if raw_key:
+                digest = hashlib.sha256(raw_key.encode()).hexdigest()
+                key_id = self._cached_key(digest)
+                if key_id is None:
+                    # The lookup is paid for from the IP's quota, and skipped once that is spent
+                    result = await self._consume(scope, kind, identity)
+                    key_id = await self._verify_key(raw_key, digest) if result.allowed else None
+                if key_id:
+                    kind, identity, result = "api_key", key_id, None
+                    scope.setdefault("state", {})["api_key_id"] = key_id
+        if kind == "ip" and result is None and self.token_verifier is not None:
+            authorization = _header(scope, b"authorization") or ""
+            scheme, _, token = authorization.partition(" ")
+            user_id = self.token_verifier(token) if scheme.lower() == "bearer" and token else None
+            if user_id is not None:
+                kind, identity = "user", user_id
+                scope.setdefault("state", {})["user_id"] = user_id
+        if result is None:
+            result = await self._consume(scope, kind, identity)
+        headers = [
+            (b"x-ratelimit-limit", str(result.limit).encode()),
+            (b"x-ratelimit-remaining", str(result.remaining).encode()),
+            (b"x-ratelimit-reset", str(math.ceil(result.reset_after)).encode()),
+        ]
+
+        if not result.allowed:
+            logger.warning(f"Rate limit exceeded for {kind} {identity} on {scope['path']}")
+            response = JSONResponse(
+                {"detail": "Rate limit exceeded"},
+                status_code=429,
+                headers={"Retry-After": str(max(1, math.ceil(result.retry_after)))}
             )
-        
-        # Add current request
-        if client_ip not in self.requests:
-            self.requests[client_ip] = []
-        self.requests[client_ip].append((current_time, 1))
-        
-        return await call_next(request)
+            response.raw_headers.extend(headers)
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), *headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    async def _consume(self, scope, kind: str, identity: str):
+        limiter = self._limiter_for(scope["method"], scope["path"], kind)
+        return await limiter.consume(f"{kind}:{identity}")
+
+    def _cached_key(self, digest: str) -> Optional[str]:
+        """The cached lookup result for a key: its id, "" if it is invalid, None if unknown."""
+        entry = self._verified_keys.get(digest)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._verified_keys[digest]
+            return None
+        self._verified_keys.move_to_end(digest)
+        return entry[0]
+
+    async def _verify_key(self, raw_key: str, digest: str) -> Optional[str]:
+        try:
+            key_id = await run_in_threadpool(self.api_key_verifier, raw_key)
+        except Exception as e:
+            # Not cached, so the key is looked up again once the database recovers
+            logger.warning(f"Could not verify API key for rate limiting: {str(e)}")
+            return None
+        self._verified_keys[digest] = (key_id or "", time.monotonic() + self.verified_key_ttl)
+        self._verified_keys.move_to_end(digest)
+        if len(self._verified_keys) > self.max_verified_keys:
+            self._verified_keys.popitem(last=False)
+        return key_id
+
+    @staticmethod
+    def _identity(scope) -> Tuple[str, str]:
+        state = scope.get("state") or {}
+        api_key_id = state.get("api_key_id")
+        if api_key_id is not None:
+            return "api_key", str(api_key_id)
+        user_id = state.get("user_id")
+        if user_id is not None:
+            return "user", str(user_id)
+        client = scope.get("client")
+        return "ip", client[0] if client else "unknown"
+
+    def _limiter_for(self, method: str, path: str, kind: str) -> RateLimiter:
+        route = "*"
+        quota = self.identity_quotas.get(kind, self.rate_limit)
+        rule = _match_route(self.route_rules, method, path)
+        if rule is not None:
+            rule_method, prefix, quota = rule
+            route = f"{rule_method or '*'} {prefix}"
+        limiter = self._limiters.get((route, kind))
+        if limiter is None:
+            limiter = create_rate_limiter(f"http:{kind}:{route}", max_requests=quota, window_seconds=self.window)
+            self._limiters[(route, kind)] = limiter
+        return limiter
+
+class LoadSheddingMiddleware:
+    """
+    Pure ASGI middleware that rejects requests early while the process is overloaded.
+
+    Overload is measured by event loop lag (see `EventLoopLagMonitor`) and by the number of
+    pending requests: accepted but not yet responding. A request stops being pending once
+    its response starts, so long-lived streams do not count against the limit.
+
+    The load is expressed as a multiple of the thresholds. A request is rejected with 503
+    and Retry-After when the load exceeds 1 + its route's priority. Routes default to
+    priority 0 and are shed first. A priority-1 route is only shed at twice the thresholds,
+    and so on. Exempt paths, such as health checks and metrics, are never shed.
+
+    Args:
+        app: The ASGI application to wrap
+        max_lag: Event loop lag in seconds above which priority-0 routes are shed
+        max_pending: Most pending requests before priority-0 routes are shed (None to ignore)
+        route_priorities: "[METHOD ]/path/prefix" -> priority (longest prefix wins)
+        exempt_paths: Path prefixes that are never shed
+        monitor: Lag monitor to consult; started on the first request
+    """
+
+    def __init__(
+        self,
+        app,
+        max_lag: float = 0.2,
+        max_pending: Optional[int] = None,
+        route_priorities: Optional[Dict[str, int]] = None,
+        exempt_paths: Sequence[str] = (),
+        monitor: Optional[EventLoopLagMonitor] = None
+    ):
+        self.app = app
+        self.max_lag = max_lag
+        self.max_pending = max_pending
+        self.route_rules = _parse_route_rules(route_priorities or {})
+        self.exempt_paths = tuple(exempt_paths)
+        self.monitor = monitor or event_loop_lag_monitor
+        self.pending = 0
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        self.monitor.start()
+        lag = self.monitor.lag()
+        lag_load = lag / self.max_lag
+        # Count this request too, so max_pending is the most ever admitted at once
+        pending_load = (self.pending + 1) / self.max_pending if self.max_pending else 0.0
+        rule = _match_route(self.route_rules, scope["method"], scope["path"])
+        priority = rule[2] if rule is not None else 0
+
+        if max(lag_load, pending_load) > 1 + priority:
+            reason = "event_loop_lag" if lag_load >= pending_load else "pending_requests"
+            LOAD_SHED_REJECTED.labels(reason=reason, priority=str(priority)).inc()
+            logger.warning(
+                f"Shedding {scope['method']} {scope['path']}: lag {lag * 1000:.0f}ms, {self.pending} pending"
+            )
+            response = JSONResponse(
+                {"detail": "Server overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(max(1, math.ceil(lag)))}
+            )
+            await response(scope, receive, send)
+            return
+
+        self.pending += 1
+        HTTP_REQUESTS_PENDING.set(self.pending)
+        responding = False
+
+        async def send_and_track(message) -> None:
+            nonlocal responding
+            if message["type"] == "http.response.start" and not responding:
+                responding = True
+                self.pending -= 1
+                HTTP_REQUESTS_PENDING.set(self.pending)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_track)
+        finally:
+            if not responding:
+                self.pending -= 1
+                HTTP_REQUESTS_PENDING.set(self.pending)
 
 class AutoLogoutMiddleware(BaseHTTPMiddleware):
     """Middleware for auto-logout after session expiration."""
@@ -127,13 +412,6 @@ def setup_security_middleware(app):
     # Add Gzip compression
     app.add_middleware(GZipMiddleware, minimum_size=1000)
     
-    # Add rate limiting
-    app.add_middleware(
-        RateLimitMiddleware,
-        rate_limit=settings.RATE_LIMIT_PER_MINUTE,
-        window=60
-    )
-    
     # Add session middleware if needed
     if settings.SESSION_SECRET_KEY:
         app.add_middleware(
@@ -151,4 +429,38 @@ def setup_security_middleware(app):
     
     # Add CSRF middleware after session and auto-logout middleware
     if settings.SESSION_SECRET_KEY:
-        app.add_middleware(CSRFMiddleware) 
\ No newline at end of file
+        app.add_middleware(CSRFMiddleware)
+
+    # Rate limiting and load shedding are installed by setup_traffic_middleware; adding them
+    # here as well would count every request twice against their limits.
+
+
+def setup_traffic_middleware(app):
+    """
+    Installs rate limiting and load shedding; the only place either is added to an app.
+
+    Load shedding is added last, so it runs first and rejects cheaply under overload.
+    """
+    app.add_middleware(
+        RateLimitMiddleware,
+        rate_limit=settings.RATE_LIMIT_PER_MINUTE,
+        window=60,
+        route_quotas=settings.RATE_LIMIT_ROUTE_QUOTAS,
+        identity_quotas={
+            "api_key": settings.RATE_LIMIT_API_KEY_PER_MINUTE,
+            "user": settings.RATE_LIMIT_USER_PER_MINUTE,
+        },
+        exempt_paths=settings.RATE_LIMIT_EXEMPT_PATHS,
+        api_key_verifier=verify_api_key,
+        token_verifier=verify_bearer_token,
+        verified_key_ttl=settings.RATE_LIMIT_API_KEY_CACHE_TTL
+    )
+
+    if settings.LOAD_SHED_ENABLED:
+        app.add_middleware(
+            LoadSheddingMiddleware,
+            max_lag=settings.LOAD_SHED_MAX_EVENT_LOOP_LAG_MS / 1000,
+            max_pending=settings.LOAD_SHED_MAX_PENDING_REQUESTS,
+            route_priorities=settings.LOAD_SHED_ROUTE_PRIORITIES,
+            exempt_paths=settings.LOAD_SHED_EXEMPT_PATHS
+        ) 
\ No newline at end of file
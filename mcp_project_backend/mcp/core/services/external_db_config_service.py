@@ -5,6 +5,7 @@ import uuid
 from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 
+from mcp.core.circuit_breaker import circuit_breakers
 from mcp.db.models import ExternalDatabaseConfig
 from mcp.schemas.external_db_config import ExternalDbConfigCreate, ExternalDbConfigUpdate
 
@@ -58,6 +59,8 @@ class ExternalDbConfigService:
 
         self.db.commit()
         self.db.refresh(db_config)
+        # Connection details may have changed; start the new target with a closed breaker
+        circuit_breakers.remove(f"external_db:{config_id}")
         return db_config
 
     def delete_config(self, config_id: uuid.UUID) -> bool:
@@ -66,4 +69,5 @@ class ExternalDbConfigService:
             return False
         self.db.delete(db_config)
         self.db.commit()
+        circuit_breakers.remove(f"external_db:{config_id}")
         return True
@@ -19,6 +19,30 @@ class Settings(BaseSettings):
     REDIS_PASSWORD: Optional[str] = None
     REDIS_MAX_CONNECTIONS: int = 100
     REDIS_TIMEOUT: float = 5.0
+
+    # Response cache settings
+    CACHE_BACKEND: str = "tiered"  # "tiered" (in-process + Redis), "redis" or "memory" (single process, no Redis)
+    CACHE_MEMORY_MAX_BYTES: int = 256 * 1024 * 1024  # Budget of the "memory" backend
+    CACHE_L1_MAX_BYTES: int = 64 * 1024 * 1024  # In-process cache budget per worker
+    CACHE_L1_TTL: int = 30  # Upper bound (seconds) on how long a worker serves an entry locally
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
+    CACHE_TAG_TTL: int = 24 * 60 * 60  # Lifetime of the sets tracking which keys carry a tag
+    CACHE_TTL_JITTER: float = 0.1  # Cache TTLs are shortened by a random fraction up to this
+    CACHE_NEGATIVE_TTL: int = 30  # How long a 404 for a missing ID is remembered
+    CACHE_LOCK_TIMEOUT: float = 10.0  # Max seconds one worker may hold a key's recompute lock
+    CACHE_LOCK_POLL_INTERVAL: float = 0.05  # Seconds between cache checks while another worker recomputes
+    CACHE_SERIALIZER: str = "orjson"  # orjson | msgpack | pickle
+    CACHE_FALLBACK_SERIALIZER: Optional[str] = None  # Codec for values the serializer cannot encode (e.g. "pickle" for ORM objects); only enable if every writer is trusted
+    CACHE_COMPRESSION: str = "zlib"  # zlib | lz4 | none
+    CACHE_COMPRESSION_THRESHOLD: int = 1024  # Bytes; smaller values are stored uncompressed
+    CACHE_SIZE_SAMPLE_INTERVAL: float = 15.0  # Seconds between Redis memory usage samples
+    CACHE_ACCESS_FLUSH_INTERVAL: float = 30.0  # Seconds between writes of per-endpoint access counts
+    CACHE_ACCESS_STATS_MAX_ENTRIES: int = 1000  # Hottest parameter sets kept per endpoint
+    CACHE_ACCESS_STATS_TTL: int = 7 * 24 * 3600  # seconds
+    CACHE_WARMUP_ON_STARTUP: bool = True
+    CACHE_WARMUP_TOP_N: int = 50  # Hottest parameter sets warmed per endpoint
+    CACHE_WARMUP_CONCURRENCY: int = 8
+    CACHE_WARMUP_TIMEOUT: float = 60.0  # seconds; startup proceeds with a partially warm cache after this
     
     # JWT settings
     JWT_SECRET_KEY: SecretStr = SecretStr("your-secret-key-here")
@@ -37,6 +61,31 @@ class Settings(BaseSettings):
     
     # Monitoring settings
     MONITORING_ENABLED: bool = True
+
+    # Executor settings
+    NOTEBOOK_CACHE_DIR: Optional[str] = None  # Defaults to <tmp>/mcp_notebook_cache
+
+    RUN_LOG_BUFFER_SIZE: int = 5000  # Ring buffer capacity per run (oldest lines dropped when full)
+    RUN_LOG_FLUSH_INTERVAL_MS: float = 25.0  # How often buffered lines are published
+    RUN_LOG_DB_CHUNK_LINES: int = 200  # Lines accumulated per step before appending to the DB
+    RUN_LOG_DB_FLUSH_INTERVAL: float = 2.0  # Max seconds before pending lines are written to the DB
+
+    # LLM client settings
+    LLM_DEFAULT_PROVIDER: str = "stub"
+    LLM_INITIAL_CONCURRENCY: int = 8  # Starting in-flight calls per model
+    LLM_MIN_CONCURRENCY: int = 1
+    LLM_MAX_CONCURRENCY: int = 64
+    LLM_BATCH_MAX_SIZE: int = 16
+    LLM_BATCH_MAX_WAIT_MS: float = 5.0
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_DELAY: float = 0.5  # seconds
+    LLM_RETRY_MAX_DELAY: float = 20.0  # seconds
+    LLM_RETRY_BUDGET_RATIO: float = 0.2  # Retries allowed as a fraction of requests
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: Optional[str] = None  # Defaults to <tmp>/mcp_llm_cache.sqlite3
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    LLM_CACHE_DEFAULT_TTL: int = 7 * 24 * 3600  # seconds
+    LLM_STREAM_PREVIEW_INTERVAL_MS: float = 50.0  # Minimum gap between result_preview events
     
     # Performance monitoring thresholds
     ERROR_RATE_THRESHOLD: float = 0.1  # 10% error rate threshold
@@ -58,6 +107,16 @@ class Settings(BaseSettings):
     ALLOWED_HOSTS: list[str] = ["localhost", "127.0.0.1"]
     ALLOWED_ORIGINS: list[str] = ["http://localhost:3000"]
     RATE_LIMIT_PER_MINUTE: int = 100  # requests per minute
+    RATE_LIMIT_API_KEY_PER_MINUTE: Optional[int] = None  # per verified API key; defaults to RATE_LIMIT_PER_MINUTE
+    RATE_LIMIT_API_KEY_CACHE_TTL: float = 60.0  # seconds an API key lookup is reused by the rate limiter
+    RATE_LIMIT_USER_PER_MINUTE: Optional[int] = None  # per verified Bearer token subject; defaults to RATE_LIMIT_PER_MINUTE
+    RATE_LIMIT_ROUTE_QUOTAS: dict[str, int] = {}  # "[METHOD ]/path/prefix" -> requests per minute per identity
+    RATE_LIMIT_EXEMPT_PATHS: list[str] = ["/health", "/metrics"]
+    LOAD_SHED_ENABLED: bool = True
+    LOAD_SHED_MAX_EVENT_LOOP_LAG_MS: float = 200.0  # Event loop lag above which low-priority routes get 503
+    LOAD_SHED_MAX_PENDING_REQUESTS: Optional[int] = 500  # Requests accepted but not yet responding
+    LOAD_SHED_ROUTE_PRIORITIES: dict[str, int] = {}  # "[METHOD ]/path/prefix" -> priority; 0 (default) is shed first
+    LOAD_SHED_EXEMPT_PATHS: list[str] = ["/health", "/metrics"]
     DEBUG: bool = False
     
     class Config:
@@ -1,10 +1,13 @@
 from typing import Dict, Any, Optional
 from sqlalchemy.orm import Session
 
+from mcp.core.executors.base_executor import BaseExecutor
+from mcp.core.executors.registry import UnknownExecutorTypeError, executor_registry
+from mcp.core.run_log_pipeline import close_run_log_pipeline
+
 # from mcp.db.models import WorkflowDefinition, WorkflowRun, MCPVersion, User
 # from mcp.db.crud import crud_workflow_definition, crud_workflow_run, crud_mcp_version
 # from mcp.schemas.workflow_run_schemas import WorkflowRunStatusEnum
-# from mcp.core.executors import llm_executor, notebook_executor, script_executor
 # from mcp.core.mcp_configs import MCPConfigPayload
 # from mcp.core.workflow_streaming_service import WorkflowStreamingService
 # from mcp.core.auditing_service import AuditingService
@@ -54,8 +57,12 @@ class WorkflowEngineService:
             wf_def: WorkflowDefinition object.
             runtime_inputs: Optional runtime inputs for the workflow.
         """
-        # Placeholder for actual implementation
-        pass
+        try:
+            # Placeholder for actual implementation
+            pass
+        finally:
+            # Ship any executor log lines still buffered for this run.
+            await close_run_log_pipeline(workflow_run_id)
 
     def _resolve_step_inputs(self, input_mappings: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -79,13 +86,31 @@ class WorkflowEngineService:
                     raise ValueError(f"Input '{target_param}' could not be resolved: source {source_step_id}.{source_output_name} not found in context.")
         return resolved_inputs
 
-    def _get_executor(self, mcp_type: str) -> Optional[Any]:
+    def _get_executor(
+        self,
+        mcp_type: str,
+        workflow_run_id: Optional[int] = None,
+        streaming_service: Optional[Any] = None
+    ) -> Optional[BaseExecutor]:
         """
         Factory method to return the correct executor instance based on MCP type.
+        Executor modules are imported lazily by the executor registry, which also caches the classes.
+        A new executor is built for each run, bound to that run's context, so streaming and the
+        run log pipeline work and no per-run state is carried over to the next run.
         Args:
             mcp_type: The type of MCP (e.g., 'LLM Prompt Agent', 'Jupyter Notebook', 'Python Script').
+            workflow_run_id: ID of the run the executor works for.
+            streaming_service: Service used to publish the run's real-time updates (optional).
         Returns:
             Executor instance or None if not found.
         """
-        # Placeholder for actual executor selection logic
-        return None 
\ No newline at end of file
+        try:
+            executor_class = executor_registry.get_executor_class(mcp_type)
+        except UnknownExecutorTypeError:
+            return None
+        return executor_class(
+            db_session=self.db_session,
+            streaming_service=streaming_service,
+            workflow_run_id=workflow_run_id
+        )
+ 
\ No newline at end of file
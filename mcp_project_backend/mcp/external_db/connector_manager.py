@@ -2,16 +2,20 @@
 Manages and provides instances of database connectors.
 
 This manager will act as a factory or registry for different BaseDBConnector implementations.
+Operations run through `run` are guarded by a circuit breaker per database configuration.
 """
-from typing import Dict, Type
+from typing import Awaitable, Callable, Dict, Type, TypeVar
 import json
 
+from mcp.core.circuit_breaker import CircuitBreaker, circuit_breakers
 from mcp.db.models import ExternalDatabaseConfig
 from mcp.external_db.connectors.base_connector import BaseDBConnector, ConnectionParams
 # Specific connector implementations will be imported here later, e.g.:
 # from .connectors.postgresql_connector import PostgreSQLConnector
 from .connectors.bigquery_connector import BigQueryConnector
 
+T = TypeVar('T')
+
 
 class ConnectorManager:
     def __init__(self):
@@ -83,6 +87,31 @@ class ConnectorManager:
         # await connector_instance.connect() # Or leave connection to be explicitly managed by the caller.
         return connector_instance
 
+    def get_breaker(self, db_config: ExternalDatabaseConfig) -> CircuitBreaker:
+        """Returns the circuit breaker guarding one external database configuration."""
+        return circuit_breakers.get(f"external_db:{db_config.id}")
+
+    async def run(
+        self,
+        db_config: ExternalDatabaseConfig,
+        operation: Callable[[BaseDBConnector], Awaitable[T]]
+    ) -> T:
+        """
+        Runs an operation against an external database through its circuit breaker.
+
+        Args:
+            db_config: The ExternalDatabaseConfig model instance from the database.
+            operation: Coroutine function taking the connector, e.g. `lambda c: c.execute_query(sql)`.
+
+        Returns:
+            The operation's result.
+
+        Raises:
+            CircuitBreakerOpenError: If this database has been failing and its breaker is open.
+        """
+        connector = await self.get_connector(db_config)
+        return await self.get_breaker(db_config)(operation, connector)
+
 
 # Global instance of the manager (Singleton-like access)
 connector_manager = ConnectorManager()
@@ -0,0 +1,105 @@
+"""
+Microbenchmark for response cache serializers.
+
+Encodes and decodes a representative cached response (a page of workflow definitions
+with steps, as Pydantic models) with each available codec and compression setting, and
+reports per-operation cost and bytes stored.
+
+Usage:
+    python scripts/bench_cache_serializer.py --items 100 --rounds 500
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from mcp.core.cache import (
+    CacheSerializer,
+    MsgpackCodec,
+    OrjsonCodec,
+    PickleCodec,
+    lz4_frame,
+    msgpack,
+)
+
+
+class StepModel(BaseModel):
+    id: int
+    mcp_version_id: str
+    order: int
+    name: str
+    config_overrides: Dict[str, Any]
+
+
+class DefinitionModel(BaseModel):
+    id: int
+    name: str
+    description: Optional[str]
+    created_at: str
+    steps: List[StepModel]
+
+
+def build_payload(items: int) -> Dict[str, Any]:
+    now = datetime.now(timezone.utc).isoformat()
+    definitions = [
+        DefinitionModel(
+            id=i,
+            name=f"workflow-{i}",
+            description="Nightly ETL job that refreshes the reporting tables " * 2,
+            created_at=now,
+            steps=[
+                StepModel(
+                    id=i * 10 + j,
+                    mcp_version_id=str(uuid.uuid4()),
+                    order=j,
+                    name=f"step-{j}",
+                    config_overrides={"temperature": 0.0, "max_tokens": 512, "retries": 3}
+                )
+                for j in range(5)
+            ]
+        )
+        for i in range(items)
+    ]
+    # Same envelope cache_response stores: value plus soft-expiry timestamp.
+    return {"v": definitions, "f": time.time() + 60}
+
+
+def bench(label: str, serializer: CacheSerializer, payload: Dict[str, Any], rounds: int) -> None:
+    encoded = serializer.dumps(payload)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        serializer.dumps(payload)
+    encode_us = (time.perf_counter() - start) / rounds * 1e6
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        serializer.loads(encoded)
+    decode_us = (time.perf_counter() - start) / rounds * 1e6
+
+    print(f"{label:18} bytes={len(encoded):>9,} encode={encode_us:>9.1f}us decode={decode_us:>9.1f}us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100, help="Workflow definitions per cached response.")
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--threshold", type=int, default=1024, help="Compression threshold in bytes.")
+    args = parser.parse_args()
+
+    payload = build_payload(args.items)
+    codecs = [PickleCodec(), OrjsonCodec()]
+    if msgpack is not None:
+        codecs.append(MsgpackCodec())
+    compressions = ["none", "zlib"] + (["lz4"] if lz4_frame is not None else [])
+
+    for codec in codecs:
+        for compression in compressions:
+            serializer = CacheSerializer(codec, compression=compression, compression_threshold=args.threshold)
+            bench(f"{codec.name}+{compression}", serializer, payload, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark for the LLM client layer against the local stub provider.
+
+Fans out N prompts through LLMClientManager with and without batching and reports
+throughput, provider calls and the adaptive concurrency limit reached.
+
+Usage:
+    python scripts/bench_llm_client.py --prompts 5000 --latency 0.2 --max-concurrency 32
+"""
+import argparse
+import asyncio
+import time
+
+from mcp.core.llm import LLMClientManager, LLMRequest, StubLatencyModel, StubLLMClient
+
+
+async def run(prompts: int, latency: float, batching: bool, max_concurrency: int, error_rate: float) -> None:
+    client = StubLLMClient(StubLatencyModel(
+        base_seconds=latency,
+        jitter_seconds=latency / 4,
+        per_batch_item_seconds=latency / 50,
+        error_rate=error_rate,
+        max_concurrency=max_concurrency,
+        seed=42
+    ))
+    client.supports_batching = batching
+    manager = LLMClientManager(default_provider="stub", max_concurrency=max_concurrency * 2, retry_base_delay=0.01)
+    manager.set_client("stub", client)
+
+    requests = [LLMRequest(model_name="bench-model", prompt=f"prompt number {i}") for i in range(prompts)]
+    start = time.perf_counter()
+    await manager.complete_many(requests)
+    elapsed = time.perf_counter() - start
+
+    stats = manager.get_stats()["bench-model"]
+    print(
+        f"batching={batching!s:5} prompts={prompts} elapsed={elapsed:.2f}s "
+        f"rps={prompts / elapsed:,.0f} provider_calls={client.calls} "
+        f"peak_in_flight={client.peak_in_flight} final_limit={stats['limit']}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prompts", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Base stub latency in seconds.")
+    parser.add_argument("--max-concurrency", type=int, default=32, help="Stub provider throttles above this.")
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    for batching in (False, True):
+        asyncio.run(run(args.prompts, args.latency, batching, args.max_concurrency, args.error_rate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Microbenchmark for the request rate limiter.
+
+Drives `RateLimiter.check` with traffic from many distinct clients and reports the cost
+per check and how many clients stay tracked. For comparison it runs the same traffic
+through the previous list-of-timestamps approach, whose cost grows with the number of
+requests in the window and whose table never shrinks.
+
+Usage:
+    python scripts/bench_rate_limiter.py --clients 100000 --checks 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from mcp.core.rate_limiter import RateLimiter
+
+
+class ListRateLimiter:
+    """The previous implementation: a list of request datetimes per client, rescanned per check."""
+    def __init__(self, max_requests: int, window_seconds: int):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.requests: Dict[str, List[datetime]] = {}
+
+    def check(self, client_id: str) -> bool:
+        window_start = datetime.now() - timedelta(seconds=self.window_seconds)
+        timestamps = [ts for ts in self.requests.get(client_id, []) if ts > window_start]
+        if len(timestamps) >= self.max_requests:
+            self.requests[client_id] = timestamps
+            return False
+        timestamps.append(datetime.now())
+        self.requests[client_id] = timestamps
+        return True
+
+
+def bench(label: str, check, client_ids: List[str], tracked) -> None:
+    start = time.perf_counter()
+    allowed = sum(1 for client_id in client_ids if check(client_id))
+    elapsed = time.perf_counter() - start
+    per_check_ns = elapsed / len(client_ids) * 1e9
+    print(f"{label:8} checks={len(client_ids):,} allowed={allowed:,} per_check={per_check_ns:,.0f}ns tracked_clients={tracked():,}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=100_000, help="Distinct client ids.")
+    parser.add_argument("--checks", type=int, default=1_000_000)
+    parser.add_argument("--max-requests", type=int, default=100)
+    parser.add_argument("--window", type=int, default=60)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    # Zipf-like skew: a few hot clients, a long tail seen once or twice
+    population = [f"client-{i}" for i in range(args.clients)]
+    weights = [1.0 / (i + 1) for i in range(args.clients)]
+    client_ids = rng.choices(population, weights=weights, k=args.checks)
+    client_ids[:args.clients] = population  # every client is seen at least once
+
+    gcra = RateLimiter(max_requests=args.max_requests, window_seconds=args.window, max_clients=args.clients)
+    bench("gcra", lambda client_id: gcra.check(client_id).allowed, client_ids, lambda: len(gcra))
+
+    legacy = ListRateLimiter(args.max_requests, args.window)
+    bench("list", legacy.check, client_ids, lambda: len(legacy.requests))
+
+
+if __name__ == "__main__":
+    main()
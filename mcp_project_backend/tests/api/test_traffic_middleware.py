@@ -0,0 +1,39 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from mcp.core import rate_limiter
+from mcp.core.security import middleware
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(rate_limiter.settings, "RATE_LIMIT_BACKEND", "local")
+    monkeypatch.setattr(middleware.settings, "RATE_LIMIT_PER_MINUTE", 2)
+    monkeypatch.setattr(middleware.settings, "RATE_LIMIT_API_KEY_PER_MINUTE", 5)
+    monkeypatch.setattr(middleware.settings, "LOAD_SHED_ENABLED", False)
+    monkeypatch.setattr(middleware, "verify_api_key", lambda raw_key: "key-1" if raw_key == "good" else None)
+
+    app = FastAPI()
+
+    @app.get("/api/v1/whoami")
+    async def whoami(request: Request):
+        return {"api_key_id": getattr(request.state, "api_key_id", None)}
+
+    middleware.setup_traffic_middleware(app)
+    return TestClient(app)
+
+
+def test_verified_api_key_is_rate_limited_as_its_own_identity(client):
+    responses = [client.get("/api/v1/whoami", headers={"X-API-Key": "good"}) for _ in range(6)]
+
+    assert [r.status_code for r in responses] == [200] * 5 + [429]
+    # The middleware hands the verified key on to the endpoint
+    assert responses[0].json() == {"api_key_id": "key-1"}
+    assert "retry-after" in responses[-1].headers
+
+
+def test_rotating_unverified_api_keys_get_429_from_the_ip_limit(client):
+    statuses = [client.get("/api/v1/whoami", headers={"X-API-Key": f"random-{i}"}).status_code for i in range(3)]
+
+    assert statuses == [200, 200, 429]
@@ -0,0 +1,693 @@
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from mcp.core import cache
+from mcp.core.cache_warmer import CacheWarmer
+from mcp.core.cache import (
+    CacheSerializationError,
+    CacheSerializer,
+    LocalLRUCache,
+    MemoryCacheBackend,
+    OrjsonCodec,
+    PickleCodec,
+    RedisCacheBackend,
+    TieredCacheBackend,
+    _MISS,
+)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    async def execute(self):
+        return [await getattr(self.client, name)(*args) for name, args in self.calls]
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the async Redis client used by the cache."""
+    def __init__(self):
+        self.store = {}
+        self.sets = {}
+        self.published = []
+        self.expiries = {}
+        self.keys_calls = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def setex(self, key, timeout, value):
+        self.store[key] = value
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        if self.store.get(key) == token:
+            del self.store[key]
+            return 1
+        return 0
+
+    async def exists(self, key):
+        return int(key in self.store)
+
+    async def keys(self, pattern):
+        self.keys_calls += 1
+        prefix = pattern.rstrip("*")
+        return [k for k in self.store if k.startswith(prefix)]
+
+    async def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def expire(self, key, seconds):
+        self.expiries[key] = seconds
+
+    async def zincrby(self, key, amount, member):
+        zset = self.sets.setdefault(key, {})
+        zset[member] = zset.get(member, 0) + amount
+
+    async def zremrangebyrank(self, key, start, stop):
+        pass
+
+    async def zrevrange(self, key, start, stop):
+        zset = self.sets.get(key, {})
+        return sorted(zset, key=zset.get, reverse=True)[start:stop + 1]
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+            self.sets.pop(key, None)
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = FakeRedis()
+    backend = TieredCacheBackend(
+        MemoryCacheBackend(cache.cache_serializer, max_bytes=1024 * 1024),
+        RedisCacheBackend(cache.cache_serializer, client=client),
+        local_ttl=30
+    )
+    monkeypatch.setattr(cache, "cache_backend", backend)
+    monkeypatch.setattr(cache, "local_cache", backend.local_tier)
+    monkeypatch.setattr(cache, "_access_counts", {})
+    monkeypatch.setattr(cache, "cache_analytics", cache.CacheAnalytics())
+    return client
+
+
+def test_local_cache_evicts_least_recently_used_by_bytes():
+    local = LocalLRUCache(max_bytes=100)
+    local.set("a", "A", 40, ttl=60)
+    local.set("b", "B", 40, ttl=60)
+    local.get("a")
+    local.set("c", "C", 40, ttl=60)
+
+    assert local.get("b") is _MISS
+    assert local.get("a") == "A"
+    assert local.get("c") == "C"
+    assert local.size_bytes == 80
+    assert local.evictions == 1
+
+
+def test_local_cache_expires_entries():
+    local = LocalLRUCache(max_bytes=100)
+    local.set("a", "A", 10, ttl=0.01)
+    time.sleep(0.02)
+
+    assert local.get("a") is _MISS
+    assert local.size_bytes == 0
+
+
+def test_cache_response_serves_repeat_calls_from_local_tier(fake_redis):
+    calls = []
+
+    @cache.cache_response(timeout=60, key_prefix="test")
+    async def handler(item_id):
+        calls.append(item_id)
+        return {"id": item_id}
+
+    assert asyncio.run(handler(1)) == {"id": 1}
+    fake_redis.store.clear()  # a second call must not need Redis at all
+    assert asyncio.run(handler(1)) == {"id": 1}
+    assert calls == [1]
+
+
+def test_invalidate_cache_clears_both_tiers_and_broadcasts(fake_redis):
+    @cache.cache_response(timeout=60, key_prefix="test")
+    async def handler(item_id):
+        return {"id": item_id}
+
+    asyncio.run(handler(1))
+    asyncio.run(cache.invalidate_cache("test"))
+
+    assert fake_redis.store == {}
+    assert len(cache.local_cache) == 0
+    assert len(fake_redis.published) == 1
+    assert fake_redis.keys_calls == 0
+
+
+def test_invalidate_tags_only_drops_tagged_entries(fake_redis):
+    @cache.cache_response(timeout=60, key_prefix="test", tags=["item:{item_id}"])
+    async def handler(item_id):
+        return {"id": item_id}
+
+    asyncio.run(handler(item_id=1))
+    asyncio.run(handler(item_id=2))
+
+    assert asyncio.run(cache.invalidate_tags("item:1")) == 1
+    assert len(fake_redis.store) == 1
+    assert len(cache.local_cache) == 1
+    assert asyncio.run(cache.cache_key_exists(cache.build_cache_key("test", "handler", {"item_id": 2})))
+
+
+def test_writes_succeed_when_invalidation_cannot_reach_redis(fake_redis, monkeypatch):
+    @cache.cache_response(timeout=60, key_prefix="test", tags=["item:{item_id}"])
+    async def read_item(item_id):
+        return {"id": item_id}
+
+    committed = []
+
+    async def update_item(item_id):
+        committed.append(item_id)
+        await cache.invalidate_tags("item:{}".format(item_id))
+        return {"id": item_id, "updated": True}
+
+    asyncio.run(read_item(item_id=1))
+
+    async def unavailable(*args):
+        raise cache.RedisError("connection refused")
+
+    monkeypatch.setattr(fake_redis, "smembers", unavailable)
+
+    assert asyncio.run(update_item(item_id=1)) == {"id": 1, "updated": True}
+    assert committed == [1]
+    # Tagged keys are unknown, so this worker drops its local copies rather than serve them
+    assert len(cache.local_cache) == 0
+
+
+def test_not_found_is_cached_until_the_entity_is_created(fake_redis):
+    existing = set()
+    calls = []
+
+    @cache.cache_not_found(key_prefix="test", tags=[cache.not_found_tag("{item_id}")], ttl=30)
+    async def handler(item_id):
+        calls.append(item_id)
+        if item_id not in existing:
+            raise HTTPException(status_code=404, detail=f"Item {item_id} not found")
+        return {"id": item_id}
+
+    for _ in range(3):
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(handler(item_id=7))
+        assert exc_info.value.status_code == 404
+        assert exc_info.value.detail == "Item 7 not found"
+    assert calls == [7]
+
+    # A cached 404 survives the local tier being dropped (served from Redis)
+    cache.local_cache.clear()
+    with pytest.raises(HTTPException):
+        asyncio.run(handler(item_id=7))
+    assert calls == [7]
+
+    existing.add(7)
+    assert asyncio.run(cache.invalidate_not_found(7)) == 1
+    assert asyncio.run(handler(item_id=7)) == {"id": 7}
+    # Found entities are not cached by cache_not_found
+    asyncio.run(handler(item_id=7))
+    assert calls == [7, 7, 7]
+
+
+def test_not_found_entries_leave_no_long_lived_tag_indexes(fake_redis):
+    @cache.cache_not_found(key_prefix="test", tags=[cache.not_found_tag("{item_id}")], ttl=30)
+    async def handler(item_id):
+        raise HTTPException(status_code=404, detail=f"Item {item_id} not found")
+
+    for item_id in range(3):
+        with pytest.raises(HTTPException):
+            asyncio.run(handler(item_id=item_id))
+
+    tag_keys = sorted(fake_redis.sets)
+    assert tag_keys == [f"cache:tag:not_found:{item_id}" for item_id in range(3)]
+    assert all(fake_redis.expiries[key] == 30 for key in tag_keys)
+
+
+def test_sync_endpoint_runs_in_the_threadpool(fake_redis):
+    import threading
+    threads = []
+
+    @cache.cache_not_found(key_prefix="test", tags=[cache.not_found_tag("{item_id}")], ttl=30)
+    def handler(item_id):
+        threads.append(threading.get_ident())
+        raise HTTPException(status_code=404, detail=f"Item {item_id} not found")
+
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            asyncio.run(handler(item_id=7))
+
+    assert len(threads) == 1
+    assert threads[0] != threading.get_ident()
+
+
+def test_other_errors_are_not_negatively_cached(fake_redis):
+    calls = []
+
+    @cache.cache_response(timeout=60, key_prefix="test", negative_ttl=30)
+    async def handler(item_id):
+        calls.append(item_id)
+        raise HTTPException(status_code=400, detail="bad id")
+
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            asyncio.run(handler(item_id=1))
+    assert calls == [1, 1]
+
+
+def test_invalidation_from_other_worker_clears_local_tier(fake_redis):
+    key = "test:handler:(1,):{}"
+    cache.local_cache.set(key, {"id": 1}, 10, ttl=60)
+
+    cache._apply_invalidation({"origin": cache._WORKER_ID, "keys": [key]})
+    assert len(cache.local_cache) == 1
+
+    cache._apply_invalidation({"origin": "other-worker", "keys": [key]})
+    assert len(cache.local_cache) == 0
+
+
+def test_concurrent_misses_share_one_computation(fake_redis):
+    calls = []
+
+    @cache.cache_response(timeout=60, key_prefix="test")
+    async def handler(item_id):
+        calls.append(item_id)
+        await asyncio.sleep(0.01)
+        return {"id": item_id}
+
+    async def scenario():
+        return await asyncio.gather(*(handler(item_id=1) for _ in range(10)))
+
+    assert asyncio.run(scenario()) == [{"id": 1}] * 10
+    assert calls == [1]
+    assert not any(key.startswith("cache:lock:") for key in fake_redis.store)
+
+
+def test_waits_for_other_worker_holding_the_lock(fake_redis, monkeypatch):
+    monkeypatch.setattr(cache.settings, "CACHE_LOCK_POLL_INTERVAL", 0.001)
+    calls = []
+
+    @cache.cache_response(timeout=60, key_prefix="test")
+    async def handler(item_id):
+        calls.append(item_id)
+        return {"id": item_id}
+
+    cache_key = cache.build_cache_key("test", "handler", {"item_id": 1})
+    fake_redis.store[cache._lock_key(cache_key)] = "other-worker"
+
+    async def scenario():
+        waiter = asyncio.ensure_future(handler(item_id=1))
+        await asyncio.sleep(0.01)
+        fake_redis.store[cache_key] = cache.cache_serializer.dumps({"v": {"id": 1, "from": "other-worker"}, "f": time.time() + 60})
+        return await waiter
+
+    assert asyncio.run(scenario()) == {"id": 1, "from": "other-worker"}
+    assert calls == []
+
+
+def test_stale_entry_is_served_while_refreshed_in_background(fake_redis):
+    versions = iter(["v2", "v3"])
+
+    @cache.cache_response(timeout=60, key_prefix="test", stale_ttl=60)
+    async def handler(item_id):
+        return next(versions)
+
+    cache_key = cache.build_cache_key("test", "handler", {"item_id": 1})
+    fake_redis.store[cache_key] = cache.cache_serializer.dumps({"v": "v1", "f": time.time() - 1})
+
+    async def scenario():
+        stale = await handler(item_id=1)
+        await asyncio.gather(*cache._background_refreshes)
+        return stale, await handler(item_id=1)
+
+    assert asyncio.run(scenario()) == ("v1", "v2")
+
+
+def test_background_refresh_rebuilds_injected_dependencies(fake_redis, monkeypatch):
+    from mcp.core import cache_warmer
+    sessions = []
+
+    def session_factory():
+        session = SimpleNamespace(name=f"fresh-{len(sessions)}", closed=False)
+        session.close = lambda: setattr(session, "closed", True)
+        sessions.append(session)
+        return session
+
+    warmer = CacheWarmer(session_factory=session_factory)
+    monkeypatch.setattr(cache_warmer, "cache_warmer", warmer)
+
+    @cache.cache_response(timeout=60, key_prefix="test", stale_ttl=60)
+    async def list_items(page, db=None):
+        return f"{db.name}:{page}"
+
+    warmer.register_endpoint(list_items, lambda db: {"db": db})
+    cache_key = cache.build_cache_key("test", "list_items", {"page": 1})
+    fake_redis.store[cache_key] = cache.cache_serializer.dumps({"v": "old", "f": time.time() - 1})
+
+    async def scenario():
+        stale = await list_items(page=1, db=SimpleNamespace(name="request"))
+        await asyncio.gather(*cache._background_refreshes)
+        return stale, await list_items(page=1, db=SimpleNamespace(name="request"))
+
+    assert asyncio.run(scenario()) == ("old", "fresh-0:1")
+    assert [session.closed for session in sessions] == [True]
+
+
+def test_stale_entry_without_dependency_factory_is_recomputed_by_the_request(fake_redis, monkeypatch):
+    from mcp.core import cache_warmer
+    monkeypatch.setattr(cache_warmer, "cache_warmer", CacheWarmer())
+
+    @cache.cache_response(timeout=60, key_prefix="test", stale_ttl=60)
+    async def list_items(page, db=None):
+        return f"{db.name}:{page}"
+
+    cache_key = cache.build_cache_key("test", "list_items", {"page": 1})
+    fake_redis.store[cache_key] = cache.cache_serializer.dumps({"v": "old", "f": time.time() - 1})
+
+    assert asyncio.run(list_items(page=1, db=SimpleNamespace(name="request"))) == "request:1"
+    assert not cache._background_refreshes
+
+
+def test_endpoints_are_served_uncached_while_redis_is_down(monkeypatch):
+    from mcp.core.circuit_breaker import CircuitBreaker
+
+    class DownRedis:
+        def __init__(self):
+            self.calls = 0
+
+        def __getattr__(self, name):
+            async def fail(*args, **kwargs):
+                self.calls += 1
+                raise cache.RedisError("connection refused")
+            return fail
+
+    client = DownRedis()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60, name="test-redis",
+                             expected_exceptions=(cache.RedisError,))
+    monkeypatch.setattr(cache, "cache_backend", RedisCacheBackend(cache.cache_serializer, client=client, breaker=breaker))
+    monkeypatch.setattr(cache, "_access_counts", {})
+    calls = []
+
+    @cache.cache_response(timeout=60, key_prefix="test")
+    async def handler(item_id):
+        calls.append(item_id)
+        return {"id": item_id}
+
+    results = [asyncio.run(handler(item_id=1)) for _ in range(3)]
+
+    assert results == [{"id": 1}] * 3
+    assert calls == [1, 1, 1]
+    # Once the breaker opens, requests stop reaching Redis at all
+    assert client.calls == 2
+
+
+def test_invalidation_is_skipped_while_redis_is_down(monkeypatch):
+    from mcp.core.circuit_breaker import CircuitBreaker, CircuitState
+
+    client = FakeRedis()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, name="test-redis-writes",
+                             expected_exceptions=(cache.RedisError,))
+    monkeypatch.setattr(cache, "cache_backend", RedisCacheBackend(cache.cache_serializer, client=client, breaker=breaker))
+
+    async def unavailable(*args):
+        raise cache.RedisError("connection refused")
+
+    # Tag lookup succeeds but the delete fails, which opens the breaker
+    monkeypatch.setattr(client, "delete", unavailable)
+    assert asyncio.run(cache.invalidate_tags("item:1")) == 0
+    assert breaker.state is CircuitState.OPEN
+
+    # With the breaker open, creates that drop cached 404s do not fail either
+    assert asyncio.run(cache.invalidate_not_found(uuid.uuid4())) == 0
+    assert asyncio.run(cache.cache_key_exists("test:handler:abc")) is False
+
+
+def test_ttl_jitter_only_shortens(monkeypatch):
+    monkeypatch.setattr(cache.settings, "CACHE_TTL_JITTER", 0.2)
+    samples = [cache._jittered(100) for _ in range(200)]
+
+    assert all(80 <= ttl <= 100 for ttl in samples)
+    assert len(set(samples)) > 1
+
+
+def test_cache_key_ignores_injected_objects_and_argument_order(fake_redis):
+    calls = []
+
+    @cache.cache_response(timeout=60, key_prefix="test")
+    async def handler(request, item_id, db=None, skip=0):
+        calls.append(item_id)
+        return {"id": item_id}
+
+    asyncio.run(handler(object(), 1, db=object(), skip=5))
+    asyncio.run(handler(request=object(), skip=5, item_id=1, db=object()))
+
+    assert calls == [1]
+
+
+def test_build_cache_key_is_compact_and_normalized():
+    item_id = uuid.uuid4()
+    key = cache.build_cache_key("test", "handler", {"b": {1, 2}, "a": item_id})
+
+    assert key == cache.build_cache_key("test", "handler", {"a": str(item_id), "b": [1, 2]})
+    assert len(cache.build_cache_key("test", "handler", {"search": "x" * 10000})) == len(key)
+
+
+def test_declared_key_fields_and_user_scope(fake_redis):
+    @cache.cache_response(timeout=60, key_prefix="test", key_fields=["item_id"], vary_on_user=True)
+    async def handler(item_id, verbose=False, current_user=None):
+        return {"id": item_id, "user": current_user.id}
+
+    alice, bob = SimpleNamespace(id="alice"), SimpleNamespace(id="bob")
+    assert asyncio.run(handler(1, verbose=True, current_user=alice))["user"] == "alice"
+    assert asyncio.run(handler(1, verbose=False, current_user=alice))["user"] == "alice"
+    assert asyncio.run(handler(1, current_user=bob))["user"] == "bob"
+    assert len(fake_redis.store) == 2
+
+
+def test_unknown_key_field_is_rejected():
+    with pytest.raises(ValueError):
+        @cache.cache_response(timeout=60, key_fields=["missing"])
+        async def handler(item_id):
+            return item_id
+
+
+class ItemModel:
+    """Stands in for a Pydantic response model."""
+    def __init__(self, item_id, tags):
+        self.item_id, self.tags = item_id, tags
+
+    def model_dump(self, mode="python"):
+        return {"item_id": str(self.item_id), "tags": list(self.tags)}
+
+
+def test_serializer_encodes_models_as_json_and_compresses_large_values():
+    serializer = CacheSerializer(OrjsonCodec(), compression="zlib", compression_threshold=256)
+    item_id = uuid.uuid4()
+
+    small = serializer.dumps({"v": ItemModel(item_id, ["a"]), "f": 1.5})
+    large = serializer.dumps({"v": [ItemModel(item_id, ["a"] * 50)] * 20, "f": 1.5})
+
+    assert serializer.loads(small) == {"v": {"item_id": str(item_id), "tags": ["a"]}, "f": 1.5}
+    assert small[1] == 0 and large[1] != 0
+    assert len(serializer.loads(large)["v"]) == 20
+
+
+def test_serializer_falls_back_for_unencodable_values_and_rejects_untrusted_codecs():
+    value = {"v": SimpleNamespace(name="orm-like"), "f": 1.0}
+    with_fallback = CacheSerializer(OrjsonCodec(), fallback=PickleCodec())
+    json_only = CacheSerializer(OrjsonCodec())
+
+    payload = with_fallback.dumps(value)
+    assert isinstance(with_fallback.loads(payload)["v"], SimpleNamespace)
+    with pytest.raises(CacheSerializationError):
+        json_only.dumps(value)
+    with pytest.raises(CacheSerializationError):
+        json_only.loads(payload)
+
+
+def test_unencodable_response_is_served_but_not_cached(fake_redis):
+    assert cache.cache_serializer.fallback is None  # pickle is opt-in
+    calls = []
+
+    @cache.cache_response(timeout=60, key_prefix="test")
+    async def handler(item_id):
+        calls.append(item_id)
+        return SimpleNamespace(name="orm-like")
+
+    assert asyncio.run(handler(item_id=1)).name == "orm-like"
+    assert asyncio.run(handler(item_id=1)).name == "orm-like"
+    assert calls == [1, 1]
+    assert fake_redis.store == {}
+
+
+def test_warmer_replays_hottest_calls_without_counting_them(fake_redis):
+    calls = []
+
+    @cache.cache_response(timeout=60, key_prefix="test")
+    async def get_item(item_id: uuid.UUID, service=None):
+        calls.append(item_id)
+        return {"id": str(item_id), "service": service.name}
+
+    hot, cold = uuid.uuid4(), uuid.uuid4()
+
+    async def record_traffic():
+        for _ in range(3):
+            await get_item(item_id=hot, service=SimpleNamespace(name="live"))
+        await get_item(item_id=cold, service=SimpleNamespace(name="live"))
+        await cache.flush_access_stats()
+
+    asyncio.run(record_traffic())
+    fake_redis.store.clear()
+    cache.local_cache.clear()
+    calls.clear()
+
+    warmer = CacheWarmer(concurrency=2, top_n=1, session_factory=lambda: SimpleNamespace(close=lambda: None))
+    warmer.register_endpoint(get_item, lambda db: {"service": SimpleNamespace(name="warmup")})
+
+    assert asyncio.run(warmer.warm()) == {"test:get_item": 1}
+    assert calls == [hot]
+    assert cache._access_counts == {}
+    assert asyncio.run(get_item(item_id=hot, service=SimpleNamespace(name="live")))["service"] == "warmup"
+
+
+def test_analytics_break_down_by_endpoint_and_prefix(fake_redis):
+    @cache.cache_response(timeout=60, key_prefix="test")
+    async def get_item(item_id):
+        return {"id": item_id, "payload": "x" * 100}
+
+    @cache.cache_response(timeout=60, key_prefix="test")
+    async def list_items():
+        return []
+
+    async def traffic():
+        for item_id in (1, 1, 1, 2):
+            await get_item(item_id=item_id)
+        await list_items()
+
+    asyncio.run(traffic())
+    report = cache.cache_analytics.report()
+
+    get_stats = report["endpoints"]["test:get_item"]
+    assert (get_stats["hits"], get_stats["misses"], get_stats["writes"]) == (2, 2, 2)
+    assert get_stats["hit_ratio"] == 0.5
+    assert get_stats["bytes_written"] > 200
+    assert report["prefixes"]["test"]["misses"] == 3
+
+
+def test_local_cache_reports_evictions():
+    evicted = []
+    local = LocalLRUCache(max_bytes=100, on_evict=evicted.append)
+    local.set("test:a:1", "A", 60, ttl=60)
+    local.set("test:b:2", "B", 60, ttl=60)
+
+    assert evicted == ["test:a:1"]
+
+
+def test_memory_backend_serves_the_cache_without_redis(monkeypatch):
+    backend = MemoryCacheBackend(cache.cache_serializer, max_bytes=1024 * 1024)
+    monkeypatch.setattr(cache, "cache_backend", backend)
+    monkeypatch.setattr(cache, "local_cache", backend.local_tier)
+    monkeypatch.setattr(cache, "cache_analytics", cache.CacheAnalytics())
+    calls = []
+
+    @cache.cache_response(timeout=60, key_prefix="test", tags=["item:{item_id}"])
+    async def handler(item_id):
+        calls.append(item_id)
+        return {"id": item_id}
+
+    async def scenario():
+        assert await handler(item_id=1) == {"id": 1}
+        assert await handler(item_id=1) == {"id": 1}
+        assert await cache.invalidate_tags("item:1") == 1
+        assert await handler(item_id=1) == {"id": 1}
+
+    asyncio.run(scenario())
+    assert calls == [1, 1]
+
+
+def test_memory_backend_tag_index_only_tracks_held_entries():
+    backend = MemoryCacheBackend(cache.cache_serializer, max_bytes=200)
+
+    async def scenario():
+        # Each entry is ~60 bytes, so only the last few fit
+        for item_id in range(10):
+            await backend.set(f"test:{item_id}", "x" * 50, ttl=60, tags=["test", f"not_found:{item_id}"])
+        held = {f"test:{item_id}" for item_id in range(10) if backend.entries.get(f"test:{item_id}") is not _MISS}
+        assert await backend.tag_members("test") == held
+        assert set(backend._tags) == {"test", *(f"not_found:{key.split(':')[1]}" for key in held)}
+
+        await backend.delete(*held)
+        assert backend._tags == {}
+
+        await backend.set("test:late", "x", ttl=0.01, tags=["late"])
+        await asyncio.sleep(0.02)
+        # Expired entries leave their tags when next looked at
+        assert await backend.get("test:late") is _MISS
+        assert backend._tags == {}
+
+    asyncio.run(scenario())
+
+
+def test_memory_backend_locks_and_counters():
+    backend = MemoryCacheBackend(cache.cache_serializer, max_bytes=1024)
+
+    async def scenario():
+        assert await backend.acquire_lock("lock", "a", ttl=10)
+        assert not await backend.acquire_lock("lock", "b", ttl=10)
+        await backend.release_lock("lock", "b")
+        assert not await backend.acquire_lock("lock", "b", ttl=10)
+        await backend.release_lock("lock", "a")
+        assert await backend.acquire_lock("lock", "b", ttl=10)
+
+        await backend.increment_counts("hits", {"x": 1, "y": 5, "z": 3}, keep=2, ttl=60)
+        await backend.increment_counts("hits", {"x": 10}, keep=2, ttl=60)
+        return await backend.top_counted("hits", 5)
+
+    assert asyncio.run(scenario()) == ["x", "y"]
+
+
+def test_create_cache_backend_follows_settings(monkeypatch):
+    from mcp.core.cache_backends import create_cache_backend
+
+    monkeypatch.setattr(cache.settings, "CACHE_BACKEND", "memory")
+    memory = create_cache_backend(cache.cache_serializer)
+    assert isinstance(memory, MemoryCacheBackend) and not memory.shared
+
+    monkeypatch.setattr(cache.settings, "CACHE_BACKEND", "tiered")
+    tiered = create_cache_backend(cache.cache_serializer)
+    assert isinstance(tiered, TieredCacheBackend) and tiered.shared
+
+    monkeypatch.setattr(cache.settings, "CACHE_BACKEND", "bogus")
+    with pytest.raises(ValueError):
+        create_cache_backend(cache.cache_serializer)
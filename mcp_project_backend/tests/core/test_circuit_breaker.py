@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+import pytest
+
+from mcp.core.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerOpenError,
+    CircuitBreakerRegistry,
+    CircuitState,
+)
+
+
+async def _ok():
+    return "ok"
+
+
+async def _fail():
+    raise ConnectionError("down")
+
+
+def _call(breaker, func):
+    return asyncio.run(breaker(func))
+
+
+def _breaker(**kwargs):
+    options = dict(failure_threshold=3, reset_timeout=0.05, error_rate_threshold=0.5,
+                   window_seconds=60, minimum_requests=10, half_open_max_calls=2)
+    options.update(kwargs)
+    return CircuitBreaker(**options)
+
+
+def test_opens_after_consecutive_failures_and_fails_fast():
+    breaker = _breaker()
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            _call(breaker, _fail)
+
+    assert breaker.state is CircuitState.OPEN
+    calls = []
+
+    async def tracked():
+        calls.append(1)
+
+    with pytest.raises(CircuitBreakerOpenError) as exc_info:
+        _call(breaker, tracked)
+    assert calls == []
+    assert 0 < exc_info.value.retry_after <= 0.05
+
+
+def test_half_open_probes_close_the_breaker():
+    breaker = _breaker()
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            _call(breaker, _fail)
+    time.sleep(0.06)
+
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert _call(breaker, _ok) == "ok"
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert _call(breaker, _ok) == "ok"
+    assert breaker.state is CircuitState.CLOSED
+
+
+def test_failed_probe_reopens_and_probes_are_limited():
+    breaker = _breaker(half_open_max_calls=1)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            _call(breaker, _fail)
+    time.sleep(0.06)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow_fail():
+            await release.wait()
+            raise ConnectionError("still down")
+
+        probe = asyncio.create_task(breaker(slow_fail))
+        await asyncio.sleep(0)
+        # The single probe slot is taken, so other calls still fail fast
+        with pytest.raises(CircuitBreakerOpenError):
+            await breaker(_ok)
+        release.set()
+        with pytest.raises(ConnectionError):
+            await probe
+
+    asyncio.run(scenario())
+    assert breaker.state is CircuitState.OPEN
+
+
+def test_error_rate_over_window_opens_breaker():
+    breaker = _breaker(failure_threshold=100)
+    for i in range(10):
+        func = _fail if i % 2 else _ok
+        try:
+            _call(breaker, func)
+        except ConnectionError:
+            pass
+
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.error_rate() == pytest.approx(0.5)
+
+
+def test_unexpected_and_excluded_errors_do_not_count():
+    breaker = _breaker(expected_exceptions=(ConnectionError,), excluded_exceptions=(ConnectionResetError,))
+
+    async def bad_request():
+        raise ValueError("bad input")
+
+    async def reset():
+        raise ConnectionResetError()
+
+    for func, error in [(bad_request, ValueError), (reset, ConnectionResetError)] * 3:
+        with pytest.raises(error):
+            _call(breaker, func)
+
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.get_failure_count() == 0
+
+
+def test_registry_keeps_dependencies_independent():
+    registry = CircuitBreakerRegistry()
+    redis = registry.get("redis", failure_threshold=1)
+    llm = registry.get("llm:m", failure_threshold=1)
+
+    with pytest.raises(ConnectionError):
+        _call(redis, _fail)
+
+    assert registry.get("redis") is redis
+    assert redis.is_circuit_open()
+    assert _call(llm, _ok) == "ok"
+    assert registry.get_stats()["llm:m"]["state"] == "closed"
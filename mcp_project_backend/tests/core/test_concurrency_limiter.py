@@ -0,0 +1,64 @@
+import asyncio
+
+from mcp.core.concurrency_limiter import AdaptiveConcurrencyLimiter
+
+
+def _run_batch(limiter, latency):
+    """Fills every slot, then releases them all with the given latency."""
+    async def batch():
+        held = limiter.limit
+        for _ in range(held):
+            await limiter.acquire()
+        for _ in range(held):
+            limiter.release(success=True, latency=latency)
+
+    asyncio.run(batch())
+
+
+def test_limit_grows_while_latency_holds_steady():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, min_limit=1, max_limit=64)
+    for _ in range(10):
+        _run_batch(limiter, latency=0.010)
+
+    assert limiter.limit > 4
+
+
+def test_limit_shrinks_when_latency_rises():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=32, min_limit=1, max_limit=64)
+    for _ in range(5):
+        _run_batch(limiter, latency=0.010)
+    settled = limiter.limit
+
+    for _ in range(2):
+        _run_batch(limiter, latency=0.100)
+
+    assert limiter.limit < settled
+
+
+def test_limit_does_not_grow_while_underused():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, min_limit=1, max_limit=64)
+
+    async def one_at_a_time():
+        for _ in range(50):
+            async with limiter.slot():
+                pass
+
+    asyncio.run(one_at_a_time())
+    assert limiter.limit == 16
+
+
+def test_waiters_are_admitted_in_order_as_slots_free():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, min_limit=1, max_limit=1, name="test")
+    order = []
+
+    async def worker(i):
+        async with limiter.slot():
+            order.append(i)
+            await asyncio.sleep(0)
+
+    async def scenario():
+        await asyncio.gather(*(worker(i) for i in range(5)))
+
+    asyncio.run(scenario())
+    assert order == [0, 1, 2, 3, 4]
+    assert limiter.get_stats() == {"limit": 1, "in_flight": 0, "queued": 0}
@@ -0,0 +1,53 @@
+import sys
+import pytest
+from mcp.core.executors.base_executor import BaseExecutor
+from mcp.core.executors.registry import ExecutorRegistry, UnknownExecutorTypeError
+
+
+class EchoExecutor(BaseExecutor):
+    async def execute(self, config, inputs):
+        return dict(inputs)
+
+
+def test_builtin_executor_module_is_imported_lazily():
+    sys.modules.pop("mcp.core.executors.streamlit_executor", None)
+    registry = ExecutorRegistry()
+    assert "mcp.core.executors.streamlit_executor" not in sys.modules
+
+    executor_class = registry.get_executor_class("Streamlit App")
+
+    assert executor_class.__name__ == "StreamlitExecutor"
+    assert "mcp.core.executors.streamlit_executor" in sys.modules
+    assert registry.get_executor_class("Streamlit App") is executor_class
+
+
+def test_register_executor_by_class_and_reference():
+    registry = ExecutorRegistry()
+    registry.register_executor("Echo", EchoExecutor)
+    registry.register_executor("Echo Ref", f"{__name__}:EchoExecutor")
+    assert registry.get_executor_class("Echo") is EchoExecutor
+    assert registry.get_executor_class("Echo Ref") is EchoExecutor
+
+
+def test_unknown_type_raises():
+    registry = ExecutorRegistry()
+    with pytest.raises(UnknownExecutorTypeError):
+        registry.get_executor_class("Does Not Exist")
+    assert not registry.is_registered("Does Not Exist")
+
+
+def test_engine_builds_an_executor_per_run_with_its_context(monkeypatch):
+    from mcp.core import workflow_engine_service
+    registry = ExecutorRegistry()
+    registry.register_executor("Echo", EchoExecutor)
+    monkeypatch.setattr(workflow_engine_service, "executor_registry", registry)
+    engine = workflow_engine_service.WorkflowEngineService(db_session=None)
+    streaming_service = object()
+
+    first = engine._get_executor("Echo", workflow_run_id=1, streaming_service=streaming_service)
+    second = engine._get_executor("Echo", workflow_run_id=2)
+
+    assert first is not second
+    assert (first.workflow_run_id, first.streaming_service) == (1, streaming_service)
+    assert second.workflow_run_id == 2
+    assert engine._get_executor("Does Not Exist", workflow_run_id=1) is None
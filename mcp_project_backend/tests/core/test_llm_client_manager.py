@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from mcp.core.circuit_breaker import CircuitBreakerOpenError, CircuitBreakerRegistry
+from mcp.core.llm import (
+    AdaptiveConcurrencyLimiter,
+    LLMClientManager,
+    LLMRateLimitError,
+    LLMRequest,
+    StubLatencyModel,
+    StubLLMClient,
+)
+from mcp.core.llm.base_client import LLMRetryableError
+
+
+def _manager(client, **kwargs):
+    kwargs.setdefault("breakers", CircuitBreakerRegistry())
+    manager = LLMClientManager(default_provider="stub", retry_base_delay=0.0, **kwargs)
+    manager.set_client("stub", client)
+    return manager
+
+
+def test_complete_batches_concurrent_requests():
+    client = StubLLMClient(StubLatencyModel(base_seconds=0.01))
+    manager = _manager(client, batch_max_size=8, batch_max_wait_ms=5)
+    requests = [LLMRequest(model_name="m", prompt=f"p{i}") for i in range(16)]
+
+    responses = asyncio.run(manager.complete_many(requests))
+
+    assert [r.text for r in responses] == [f"[m] p{i}" for i in range(16)]
+    assert client.calls == 2
+
+
+def test_missing_batch_results_fail_their_requests():
+    class ShortBatchClient(StubLLMClient):
+        async def complete_batch(self, requests):
+            return (await super().complete_batch(requests))[:-1]
+
+    manager = _manager(ShortBatchClient(StubLatencyModel(base_seconds=0.0)), batch_max_size=3, batch_max_wait_ms=5)
+
+    async def scenario():
+        requests = [LLMRequest(model_name="m", prompt=f"p{i}") for i in range(3)]
+        return await asyncio.wait_for(
+            asyncio.gather(*(manager.complete(r) for r in requests), return_exceptions=True), timeout=1)
+
+    results = asyncio.run(scenario())
+
+    assert [r.text for r in results[:2]] == ["[m] p0", "[m] p1"]
+    assert isinstance(results[2], RuntimeError)
+
+
+def test_in_flight_calls_bounded_per_model():
+    client = StubLLMClient(StubLatencyModel(base_seconds=0.01))
+    client.supports_batching = False
+    manager = _manager(client, initial_concurrency=3, max_concurrency=3)
+    requests = [LLMRequest(model_name="m", prompt="hi") for _ in range(20)]
+
+    asyncio.run(manager.complete_many(requests))
+
+    assert client.peak_in_flight <= 3
+
+
+def test_transient_errors_are_retried():
+    client = StubLLMClient(StubLatencyModel(base_seconds=0.0, error_rate=0.3, seed=7))
+    client.supports_batching = False
+    manager = _manager(client, max_retries=10)
+    requests = [LLMRequest(model_name="m", prompt="hi") for _ in range(20)]
+
+    responses = asyncio.run(manager.complete_many(requests))
+
+    assert len(responses) == 20
+    assert client.calls > 20
+
+
+def test_retries_exhausted_raises():
+    client = StubLLMClient(StubLatencyModel(base_seconds=0.0, rate_limit_rate=1.0))
+    client.supports_batching = False
+    manager = _manager(client, max_retries=2)
+
+    with pytest.raises(LLMRateLimitError):
+        asyncio.run(manager.complete(LLMRequest(model_name="m", prompt="hi")))
+    assert client.calls == 3
+
+
+def test_failing_model_fails_fast_without_blocking_others():
+    flaky = StubLLMClient(StubLatencyModel(base_seconds=0.0, error_rate=1.0))
+    flaky.supports_batching = False
+    manager = _manager(StubLLMClient(StubLatencyModel(base_seconds=0.0)), max_retries=0)
+    manager.set_client("flaky", flaky)
+    manager.route_model("bad", "flaky")
+
+    async def scenario():
+        for _ in range(5):
+            with pytest.raises(LLMRetryableError):
+                await manager.complete(LLMRequest(model_name="bad", prompt="hi"))
+        with pytest.raises(CircuitBreakerOpenError):
+            await manager.complete(LLMRequest(model_name="bad", prompt="hi"))
+        return await manager.complete(LLMRequest(model_name="good", prompt="hi"))
+
+    assert asyncio.run(scenario()).text == "[good] hi"
+    assert flaky.calls == 5
+
+
+def test_limiter_backs_off_on_throttling_and_recovers():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, min_limit=1, max_limit=16)
+
+    async def scenario():
+        await limiter.acquire()
+        limiter.release(success=False, throttled=True)
+        assert limiter.limit == 4
+        for _ in range(20):
+            await limiter.acquire()
+            limiter.release(success=True)
+
+    asyncio.run(scenario())
+    assert limiter.limit > 4
+
+
+def test_stream_yields_chunks_in_order():
+    client = StubLLMClient(StubLatencyModel(base_seconds=0.0), responder=lambda r: "un deux trois")
+    manager = _manager(client)
+
+    async def collect():
+        return [chunk async for chunk in manager.stream(LLMRequest(model_name="m", prompt="count"))]
+
+    assert asyncio.run(collect()) == ["un", " deux", " trois"]
+    assert manager.get_stats()["m"]["in_flight"] == 0
@@ -0,0 +1,64 @@
+import asyncio
+from mcp.core.llm import LLMRequest, LLMResponse, LLMResponseCache
+from mcp.core.llm.response_cache import build_cache_key, is_cacheable
+
+
+def _request(prompt="hello", temperature=0.0):
+    return LLMRequest(model_name="m", prompt=prompt, system_prompt="sys", temperature=temperature)
+
+
+def test_only_temperature_zero_is_cacheable():
+    assert is_cacheable(_request(temperature=0.0))
+    assert not is_cacheable(_request(temperature=0.7))
+
+
+def test_key_depends_on_prompt_and_system_prompt():
+    base = _request()
+    other_system = LLMRequest(model_name="m", prompt="hello", system_prompt="other", temperature=0.0)
+    assert build_cache_key(base) == build_cache_key(_request())
+    assert build_cache_key(base) != build_cache_key(_request(prompt="bye"))
+    assert build_cache_key(base) != build_cache_key(other_system)
+
+
+def test_hit_after_set_and_hit_ratio(tmp_path):
+    cache = LLMResponseCache(path=str(tmp_path / "cache.sqlite3"))
+    request = _request()
+
+    async def scenario():
+        assert await cache.get(request) is None
+        await cache.set(request, LLMResponse(text="Bonjour", model_name="m"))
+        return await cache.get(request)
+
+    cached = asyncio.run(scenario())
+    assert cached.text == "Bonjour"
+    assert cache.get_stats()["hit_ratio"] == 0.5
+
+
+def test_expired_entries_are_not_served(tmp_path):
+    cache = LLMResponseCache(path=str(tmp_path / "cache.sqlite3"))
+    request = _request()
+    cache._set_sync(build_cache_key(request), LLMResponse(text="x", model_name="m"), ttl=-1)
+    assert asyncio.run(cache.get(request)) is None
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    cache = LLMResponseCache(path=str(tmp_path / "cache.sqlite3"), max_bytes=400)
+    for i in range(10):
+        cache._set_sync(f"k{i}", LLMResponse(text="x" * 50, model_name="m"), ttl=60)
+    assert cache.get_stats()["size_bytes"] <= 400
+    assert cache.evictions > 0
+    assert cache._get_sync("k9") is not None
+    assert cache._get_sync("k0") is None
+
+
+def test_storage_errors_count_as_miss_and_skip_the_write(tmp_path):
+    # A directory is not a usable SQLite file
+    cache = LLMResponseCache(path=str(tmp_path))
+    request = _request()
+
+    async def scenario():
+        await cache.set(request, LLMResponse(text="Bonjour", model_name="m"))
+        return await cache.get(request)
+
+    assert asyncio.run(scenario()) is None
+    assert cache.get_stats()["misses"] == 1
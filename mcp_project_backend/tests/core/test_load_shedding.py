@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+from mcp.core.event_loop_monitor import EventLoopLagMonitor
+from mcp.core.security.middleware import LoadSheddingMiddleware
+
+
+class FixedLagMonitor:
+    def __init__(self, lag=0.0):
+        self.value = lag
+
+    def start(self):
+        pass
+
+    def lag(self):
+        return self.value
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def call(middleware, path="/api/v1/items", method="GET"):
+    messages = []
+    scope = {"type": "http", "method": method, "path": path, "headers": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    return messages[0]["status"], dict(messages[0]["headers"])
+
+
+def test_lag_sheds_by_route_priority_but_never_exempt_paths():
+    monitor = FixedLagMonitor(lag=0.3)
+    middleware = LoadSheddingMiddleware(
+        ok_app,
+        max_lag=0.2,
+        route_priorities={"/api/v1/runs": 1},
+        exempt_paths=["/health", "/metrics"],
+        monitor=monitor
+    )
+
+    async def scenario():
+        status, headers = await call(middleware)
+        assert status == 503
+        assert headers[b"retry-after"] == b"1"
+        assert (await call(middleware, path="/api/v1/runs/42"))[0] == 200
+        assert (await call(middleware, path="/health"))[0] == 200
+
+        monitor.value = 0.5
+        assert (await call(middleware, path="/api/v1/runs/42"))[0] == 503
+        assert (await call(middleware, path="/metrics"))[0] == 200
+
+        monitor.value = 0.0
+        assert (await call(middleware))[0] == 200
+
+    asyncio.run(scenario())
+
+
+def test_pending_requests_shed_until_responses_start():
+    release = asyncio.Event()
+
+    async def slow_then_stream(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        # A long-lived stream no longer counts once its response has started
+        await asyncio.sleep(0.01)
+        await send({"type": "http.response.body", "body": b"done"})
+
+    middleware = LoadSheddingMiddleware(slow_then_stream, max_lag=1.0, max_pending=2, monitor=FixedLagMonitor())
+
+    async def scenario():
+        held = [asyncio.create_task(call(middleware)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert middleware.pending == 2
+        release.set()
+        statuses = sorted([(await task)[0] for task in held])
+        assert statuses == [200, 200, 503]
+        assert middleware.pending == 0
+
+    asyncio.run(scenario())
+
+
+def test_monitor_reports_a_blocked_loop():
+    monitor = EventLoopLagMonitor(interval=0.01)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)  # Blocks the loop, as CPU-bound work in a handler would
+        lag = monitor.lag()
+        await monitor.stop()
+        return lag
+
+    assert asyncio.run(scenario()) >= 0.05
+
+
+def test_traffic_middleware_is_installed_once():
+    from mcp.core.security.middleware import RateLimitMiddleware, setup_security_middleware, setup_traffic_middleware
+
+    class RecordingApp:
+        def __init__(self):
+            self.middleware = []
+
+        def add_middleware(self, middleware_class, **options):
+            self.middleware.append(middleware_class)
+
+    app = RecordingApp()
+    setup_security_middleware(app)
+    setup_traffic_middleware(app)
+
+    assert app.middleware.count(RateLimitMiddleware) == 1
+    assert app.middleware.count(LoadSheddingMiddleware) == 1
+    # Added last, so it runs first
+    assert app.middleware[-1] is LoadSheddingMiddleware
@@ -0,0 +1,71 @@
+import os
+import pytest
+
+nbformat = pytest.importorskip("nbformat")
+pytest.importorskip("papermill")
+
+from mcp.core.executors import notebook_executor  # noqa: E402
+from mcp.core.executors.notebook_executor import materialize_notebook_cells  # noqa: E402
+
+CELLS = [
+    {"type": "markdown", "content": "# Title"},
+    {"type": "code", "content": "x = 1"},
+]
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(notebook_executor.settings, "NOTEBOOK_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(notebook_executor, "_materialized_notebooks", {})
+    return tmp_path
+
+
+def _count_writes(monkeypatch):
+    writes = []
+    real_write = nbformat.write
+
+    def counting_write(notebook, f):
+        writes.append(notebook)
+        real_write(notebook, f)
+
+    monkeypatch.setattr(nbformat, "write", counting_write)
+    return writes
+
+
+def test_identical_cells_reuse_the_cached_notebook(cache_dir, monkeypatch):
+    writes = _count_writes(monkeypatch)
+
+    first = materialize_notebook_cells(CELLS)
+    second = materialize_notebook_cells([dict(cell) for cell in CELLS])
+    # A new process (empty in-memory index) finds the file already on disk
+    notebook_executor._materialized_notebooks.clear()
+    third = materialize_notebook_cells(CELLS)
+
+    assert first == second == third
+    assert os.path.dirname(first) == str(cache_dir)
+    assert len(writes) == 1
+    with open(first, encoding="utf-8") as f:
+        notebook = nbformat.read(f, as_version=4)
+    assert [cell.source for cell in notebook.cells] == ["# Title", "x = 1"]
+
+
+def test_different_cells_produce_a_new_notebook(cache_dir):
+    first = materialize_notebook_cells(CELLS)
+    second = materialize_notebook_cells(CELLS + [{"type": "code", "content": "y = 2"}])
+
+    assert first != second
+    assert os.path.exists(first) and os.path.exists(second)
+
+
+def test_failed_write_leaves_no_partial_file(cache_dir, monkeypatch):
+    def failing_write(notebook, f):
+        f.write('{"cells": [')
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(nbformat, "write", failing_write)
+
+    with pytest.raises(OSError):
+        materialize_notebook_cells(CELLS)
+
+    assert os.listdir(cache_dir) == []
+    assert notebook_executor._materialized_notebooks == {}
@@ -0,0 +1,36 @@
+import pytest
+from mcp.core.prompt_templates import PromptTemplateError, build_prompt_context, compile_prompt_template
+
+
+def test_render_named_and_nested_placeholders():
+    template = compile_prompt_template("Hi {{ user.name }}, item {{items.1.title}} costs {{ price }}.")
+    rendered = template.render({"user": {"name": "Ada"}, "items": [{"title": "a"}, {"title": "b"}], "price": 3})
+    assert rendered == "Hi Ada, item b costs 3."
+    assert template.placeholders == ["user.name", "items.1.title", "price"]
+
+
+def test_compiled_template_is_cached():
+    assert compile_prompt_template("{{a}}") is compile_prompt_template("{{a}}")
+
+
+def test_missing_inputs_are_reported():
+    template = compile_prompt_template("{{ a }} {{ b.c }}")
+    with pytest.raises(PromptTemplateError, match="b.c"):
+        template.render({"a": 1, "b": {}})
+    assert template.missing_inputs({"a": 1}) == ["b.c"]
+
+
+def test_legacy_input_text_alias():
+    template = compile_prompt_template("Translate: {{inputText}}")
+    assert template.render(build_prompt_context({"prompt_input": "hello"})) == "Translate: hello"
+
+
+@pytest.mark.parametrize("source", ["{{ not valid }}", "Hello {{ name", "{{ a-b }}"])
+def test_malformed_templates_are_rejected(source):
+    with pytest.raises(PromptTemplateError):
+        compile_prompt_template(source)
+
+
+def test_literal_braces_are_preserved():
+    template = compile_prompt_template('Return JSON like {"a": {"b": 1}} for {{ x }}')
+    assert template.render({"x": "y"}) == 'Return JSON like {"a": {"b": 1}} for y'
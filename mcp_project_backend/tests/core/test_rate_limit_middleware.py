@@ -0,0 +1,123 @@
+import asyncio
+import pytest
+from mcp.core import rate_limiter
+from mcp.core.security.middleware import RateLimitMiddleware
+
+
+@pytest.fixture(autouse=True)
+def local_limits(monkeypatch):
+    monkeypatch.setattr(rate_limiter.settings, "RATE_LIMIT_BACKEND", "local")
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def call(middleware, path="/api/v1/items", method="GET", headers=(), client=("10.0.0.1", 5000), state=None):
+    messages = []
+    scope = {"type": "http", "method": method, "path": path, "headers": list(headers), "client": client, "state": {} if state is None else state}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return messages[0]["status"], dict(messages[0]["headers"])
+
+
+def test_limits_per_ip_and_sets_retry_after():
+    middleware = RateLimitMiddleware(ok_app, rate_limit=2, window=60)
+
+    statuses = [call(middleware)[0] for _ in range(2)]
+    status, headers = call(middleware)
+
+    assert statuses == [200, 200]
+    assert status == 429
+    assert headers[b"retry-after"] == b"30"
+    assert headers[b"x-ratelimit-remaining"] == b"0"
+    assert call(middleware, client=("10.0.0.2", 5000))[0] == 200
+
+
+def test_route_and_identity_quotas():
+    middleware = RateLimitMiddleware(
+        ok_app,
+        rate_limit=100,
+        window=60,
+        route_quotas={"POST /api/v1/workflows": 1},
+        identity_quotas={"api_key": 3},
+        exempt_paths=["/health"]
+    )
+
+    assert call(middleware, path="/api/v1/workflows/run", method="POST")[0] == 200
+    assert call(middleware, path="/api/v1/workflows/run", method="POST")[0] == 429
+    # Other methods on the same prefix use the default quota
+    assert call(middleware, path="/api/v1/workflows/run", method="GET")[0] == 200
+
+    # A key verified by the auth layer is its own identity
+    key = {"api_key_id": "key-1"}
+    assert [call(middleware, state=key)[0] for _ in range(4)] == [200, 200, 200, 429]
+    # A user id set by an earlier middleware is its own identity
+    assert call(middleware, state={"user_id": 7})[0] == 200
+
+    assert all(call(middleware, path="/health")[0] == 200 for _ in range(200))
+
+
+def test_unverified_api_keys_do_not_escape_the_ip_limit():
+    middleware = RateLimitMiddleware(ok_app, rate_limit=2, window=60)
+
+    statuses = [
+        call(middleware, headers=[(b"x-api-key", f"random-{i}".encode())])[0]
+        for i in range(3)
+    ]
+
+    assert statuses == [200, 200, 429]
+
+
+def test_verified_api_keys_get_their_own_quota_and_are_looked_up_once():
+    lookups = []
+
+    def verify(raw_key):
+        lookups.append(raw_key)
+        return "key-1" if raw_key == "good" else None
+
+    middleware = RateLimitMiddleware(ok_app, rate_limit=2, window=60, identity_quotas={"api_key": 5}, api_key_verifier=verify)
+    good = [(b"x-api-key", b"good")]
+    state = {}
+
+    assert [call(middleware, headers=good, state=state)[0] for _ in range(6)] == [200] * 5 + [429]
+    assert lookups == ["good"]
+    assert state["api_key_id"] == "key-1"
+    # The first lookup was paid for from the IP's quota, which still has one request left
+    assert [call(middleware)[0] for _ in range(2)] == [200, 429]
+
+
+def test_rotating_unknown_api_keys_are_limited_by_ip_before_any_lookup():
+    lookups = []
+
+    def verify(raw_key):
+        lookups.append(raw_key)
+        return None
+
+    middleware = RateLimitMiddleware(ok_app, rate_limit=2, window=60, api_key_verifier=verify)
+
+    statuses = [call(middleware, headers=[(b"x-api-key", f"random-{i}".encode())])[0] for i in range(5)]
+
+    assert statuses == [200, 200, 429, 429, 429]
+    assert lookups == ["random-0", "random-1"]
+
+
+def test_verified_bearer_tokens_are_limited_per_user():
+    middleware = RateLimitMiddleware(
+        ok_app, rate_limit=2, window=60,
+        token_verifier=lambda token: "user-7" if token == "signed" else None
+    )
+    state = {}
+
+    assert call(middleware, headers=[(b"authorization", b"Bearer signed")], state=state)[0] == 200
+    assert state["user_id"] == "user-7"
+    # Forged tokens fall back to the IP, which has its own quota
+    statuses = [call(middleware, headers=[(b"authorization", f"Bearer forged-{i}".encode())])[0] for i in range(3)]
+    assert statuses == [200, 200, 429]
@@ -0,0 +1,165 @@
+import asyncio
+import math
+import pytest
+from mcp.core.rate_limiter import DistributedRateLimiter, RateLimiter, RateLimitExceededError, RedisError
+
+
+class FakeGcraRedis:
+    """Evaluates the GCRA script's logic in Python, on a controllable clock (ms)."""
+    def __init__(self):
+        self.now = 1_000_000
+        self.tats = {}
+        self.eval_calls = []
+        self.registered_scripts = 0
+
+    def register_script(self, script):
+        self.registered_scripts += 1
+        return self._run_script
+
+    async def _run_script(self, keys, args):
+        interval, tolerance, costs = float(args[0]), float(args[1]), args[2:]
+        self.eval_calls.append(list(keys))
+        reply = []
+        for key, cost in zip(keys, costs):
+            tat = max(self.tats.get(key, self.now), self.now)
+            new_tat = tat + interval * cost
+            allowed = new_tat - self.now <= tolerance
+            if allowed:
+                self.tats[key] = math.ceil(new_tat)
+            else:
+                new_tat = tat
+            reply += [int(allowed), math.ceil(new_tat - self.now)]
+        return reply
+
+
+class BrokenRedis:
+    def __init__(self):
+        self.calls = 0
+
+    def register_script(self, script):
+        return self._run_script
+
+    async def _run_script(self, keys, args):
+        self.calls += 1
+        raise RedisError("connection refused")
+
+
+def test_allows_a_burst_then_one_request_per_interval():
+    limiter = RateLimiter(max_requests=5, window_seconds=10)
+
+    results = [limiter.check("a", now=100.0) for _ in range(6)]
+    assert [r.allowed for r in results] == [True] * 5 + [False]
+    assert [r.remaining for r in results[:5]] == [4, 3, 2, 1, 0]
+    assert results[-1].retry_after == pytest.approx(2.0)
+
+    assert not limiter.check("a", now=101.9).allowed
+    assert limiter.check("a", now=102.0).allowed
+    assert not limiter.check("a", now=102.0).allowed
+
+
+def test_clients_are_limited_independently():
+    limiter = RateLimiter(max_requests=1, window_seconds=60)
+
+    assert limiter.check("a", now=0.0).allowed
+    assert not limiter.check("a", now=1.0).allowed
+    assert limiter.check("b", now=1.0).allowed
+
+
+def test_a_request_that_exactly_fills_the_quota_is_allowed():
+    limiter = RateLimiter(max_requests=1, window_seconds=60)
+    # (now + 60) - now rounds to just over 60 at this clock value
+    now = 2031.876
+
+    assert limiter.check("a", now=now).allowed
+    assert not limiter.check("a", now=now).allowed
+
+
+def test_idle_clients_are_evicted():
+    limiter = RateLimiter(max_requests=10, window_seconds=10)
+    for i in range(100):
+        limiter.check(f"client-{i}", now=0.0)
+    assert len(limiter) == 100
+
+    # Each client's single request is fully paid back after one interval (1s)
+    limiter.check("late", now=5.0)
+    assert len(limiter) == 1
+
+
+def test_client_table_is_bounded():
+    limiter = RateLimiter(max_requests=10, window_seconds=60, max_clients=3)
+    for client_id in "abcd":
+        limiter.check(client_id, now=0.0)
+
+    assert len(limiter) == 3
+    assert limiter.peek("a", now=0.0).remaining == 10
+
+
+def test_call_raises_with_retry_after():
+    limiter = RateLimiter(max_requests=1, window_seconds=30)
+
+    async def scenario():
+        await limiter("a")
+        await limiter("a")
+
+    with pytest.raises(RateLimitExceededError) as exc_info:
+        asyncio.run(scenario())
+    assert 29 < exc_info.value.retry_after <= 30
+
+
+def test_distributed_limiter_shares_quota_and_batches_concurrent_checks():
+    client = FakeGcraRedis()
+    worker_a = DistributedRateLimiter(max_requests=3, window_seconds=30, key_prefix="rl", client=client)
+    worker_b = DistributedRateLimiter(max_requests=3, window_seconds=30, key_prefix="rl", client=client)
+
+    async def scenario():
+        first = await asyncio.gather(*(worker_a.consume("a") for _ in range(2)))
+        second = await asyncio.gather(worker_b.consume("a"), worker_b.consume("a"), worker_b.consume("b"))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert [r.allowed for r in first] == [True, True]
+    assert [r.allowed for r in second] == [True, False, True]
+    assert second[0].remaining == 0
+    assert second[1].retry_after == pytest.approx(10.0)
+    # One round trip per batch of concurrent checks
+    assert client.eval_calls == [["rl:a", "rl:a"], ["rl:a", "rl:a", "rl:b"]]
+    # The script is registered once per limiter and then invoked by its hash
+    assert client.registered_scripts == 2
+
+
+def test_distributed_limiter_keeps_batches_alive_until_delivered():
+    import gc
+
+    class SlowGcraRedis(FakeGcraRedis):
+        async def _run_script(self, keys, args):
+            await self.gate.wait()
+            return await super()._run_script(keys, args)
+
+    client = SlowGcraRedis()
+    limiter = DistributedRateLimiter(max_requests=3, window_seconds=30, key_prefix="rl", client=client)
+
+    async def scenario():
+        client.gate = asyncio.Event()
+        pending = asyncio.gather(limiter.consume("a"), limiter.consume("b"))
+        await asyncio.sleep(0.01)
+        # The batch is held by the limiter while it waits on Redis
+        assert len(limiter._flushes) == 1
+        gc.collect()
+        client.gate.set()
+        results = await pending
+        assert limiter._flushes == set()
+        return results
+
+    assert [r.allowed for r in asyncio.run(scenario())] == [True, True]
+
+
+def test_distributed_limiter_falls_back_to_local_limits():
+    client = BrokenRedis()
+    limiter = DistributedRateLimiter(max_requests=2, window_seconds=60, client=client, retry_interval=60)
+
+    async def scenario():
+        return [await limiter.consume("a") for _ in range(3)]
+
+    assert [r.allowed for r in asyncio.run(scenario())] == [True, True, False]
+    # Redis is not retried until retry_interval has passed
+    assert client.calls == 1
@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+from mcp.core.pubsub.redis_pubsub import RedisChannelMultiplexer, RedisPubSubManager
+
+
+class FakePubSub:
+    def __init__(self):
+        self.channels = set()
+        self.subscribe_calls = []
+        self.inbox = asyncio.Queue()
+
+    async def subscribe(self, *channels):
+        self.subscribe_calls.extend(channels)
+        self.channels.update(channels)
+
+    async def unsubscribe(self, *channels):
+        self.channels.difference_update(channels)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=None):
+        if self.inbox.empty():
+            await asyncio.sleep(0.001)
+            return None
+        return self.inbox.get_nowait()
+
+    async def reset(self):
+        pass
+
+    def deliver(self, channel, data):
+        if channel in self.channels:
+            self.inbox.put_nowait({"type": "message", "channel": channel.encode(), "data": json.dumps(data)})
+
+
+class FakeRedis:
+    def __init__(self):
+        self.connections = []
+
+    def pubsub(self):
+        self.connections.append(FakePubSub())
+        return self.connections[-1]
+
+    async def close(self):
+        pass
+
+
+async def _settle(mux):
+    """Lets pending (un)subscriptions run and the reader drain every delivered message."""
+    for _ in range(100):
+        await asyncio.sleep(0.001)
+        connection = mux._pubsub
+        if connection is None or connection.inbox.empty():
+            break
+    await asyncio.sleep(0.002)
+
+
+def test_subscribers_share_one_connection_with_ref_counted_channels():
+    redis = FakeRedis()
+    mux = RedisChannelMultiplexer("redis://test", client=redis)
+
+    async def scenario():
+        first = await mux.subscribe("run:1")
+        second = await mux.subscribe("run:1")
+        other = await mux.subscribe("run:2")
+        connection = redis.connections[0]
+
+        connection.deliver("run:1", {"n": 1})
+        connection.deliver("run:2", {"n": 2})
+        assert await first.get() == {"n": 1}
+        assert await second.get() == {"n": 1}
+        assert await other.get() == {"n": 2}
+
+        mux.unsubscribe("run:1", first)
+        await _settle(mux)
+        assert "run:1" in connection.channels
+        mux.unsubscribe("run:1", second)
+        await _settle(mux)
+        assert connection.channels == {"run:2"}
+
+        await mux.close()
+        return connection
+
+    connection = asyncio.run(scenario())
+    assert len(redis.connections) == 1
+    assert connection.subscribe_calls == ["run:1", "run:2"]
+
+
+def test_slow_subscriber_drops_oldest_messages():
+    redis = FakeRedis()
+    mux = RedisChannelMultiplexer("redis://test", queue_size=2, client=redis)
+
+    async def scenario():
+        slow = await mux.subscribe("run:1")
+        for n in range(5):
+            redis.connections[0].deliver("run:1", {"n": n})
+        await _settle(mux)
+        received = [slow.get_nowait(), slow.get_nowait()]
+        await mux.close()
+        return received
+
+    assert asyncio.run(scenario()) == [{"n": 3}, {"n": 4}]
+    assert mux.dropped_messages == 3
+
+
+def test_manager_generator_releases_its_subscription_when_closed():
+    manager = RedisPubSubManager("redis://test")
+    redis = FakeRedis()
+    manager._subscriber = RedisChannelMultiplexer("redis://test", client=redis)
+
+    async def scenario():
+        stream = manager.subscribe_to_channel("run:1")
+        next_message = asyncio.ensure_future(stream.__anext__())
+        await _settle(manager._subscriber)
+        redis.connections[0].deliver("run:1", {"event_type": "log"})
+        assert await next_message == {"event_type": "log"}
+        await stream.aclose()
+        await _settle(manager._subscriber)
+        assert manager._subscriber.subscriber_count == 0
+        assert redis.connections[0].channels == set()
+        await manager.disconnect_subscriber()
+
+    asyncio.run(scenario())
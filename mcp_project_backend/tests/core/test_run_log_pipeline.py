@@ -0,0 +1,153 @@
+import asyncio
+import threading
+from mcp.core.run_log_pipeline import RunLogPipeline
+
+
+class RecordingStreamingService:
+    def __init__(self):
+        self.events = []
+
+    async def publish_run_update(self, run_id, event_type, payload):
+        self.events.append((run_id, event_type, payload))
+
+
+def test_lines_are_published_in_batches():
+    service = RecordingStreamingService()
+
+    async def scenario():
+        pipeline = RunLogPipeline("run-1", streaming_service=service, flush_interval_ms=10)
+        for i in range(100):
+            pipeline.append("step-a", f"line {i}")
+        await asyncio.sleep(0.05)
+        await pipeline.close()
+
+    asyncio.run(scenario())
+    assert len(service.events) == 1
+    run_id, event_type, payload = service.events[0]
+    assert (run_id, event_type) == ("run-1", "log")
+    assert [e["message"] for e in payload["entries"]] == [f"line {i}" for i in range(100)]
+
+
+def test_ring_buffer_drops_oldest_lines_and_reports_them():
+    service = RecordingStreamingService()
+
+    async def scenario():
+        pipeline = RunLogPipeline("run-1", streaming_service=service, capacity=10, flush_interval_ms=10)
+        for i in range(25):
+            pipeline.append("step-a", f"line {i}")
+        await pipeline.close()
+
+    asyncio.run(scenario())
+    payload = service.events[-1][2]
+    assert payload["dropped"] == 15
+    assert payload["entries"][0]["message"] == "line 15"
+
+
+def test_close_flushes_pending_lines():
+    service = RecordingStreamingService()
+
+    async def scenario():
+        pipeline = RunLogPipeline("run-1", streaming_service=service, flush_interval_ms=1000)
+        pipeline.append("step-a", "last words")
+        await pipeline.close()
+
+    asyncio.run(scenario())
+    assert service.events[0][2]["entries"][0]["message"] == "last words"
+
+
+def test_close_while_publishing_loses_no_lines():
+    class SlowStreamingService(RecordingStreamingService):
+        async def publish_run_update(self, run_id, event_type, payload):
+            await asyncio.sleep(0.05)
+            await super().publish_run_update(run_id, event_type, payload)
+
+    service = SlowStreamingService()
+
+    async def scenario():
+        pipeline = RunLogPipeline("run-1", streaming_service=service, flush_interval_ms=1)
+        pipeline.append("step-a", "first")
+        await asyncio.sleep(0.02)  # the flusher is now inside publish_run_update
+        pipeline.append("step-a", "second")
+        await pipeline.close()
+
+    asyncio.run(scenario())
+    messages = [e["message"] for _, _, payload in service.events for e in payload["entries"]]
+    assert messages == ["first", "second"]
+
+
+class RecordingSession:
+    def __init__(self):
+        self.committed = False
+        self.closed = False
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class RecordingPipeline(RunLogPipeline):
+    """Records DB writes instead of issuing the UPDATE statements."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writes = []
+
+    def _append_logs(self, db, pending):
+        self.writes.append((threading.get_ident(), db, {step: list(lines) for step, lines in pending.items()}))
+
+
+def test_db_chunks_are_written_off_the_loop_in_their_own_session():
+    sessions = []
+
+    def session_factory():
+        sessions.append(RecordingSession())
+        return sessions[-1]
+
+    async def scenario():
+        pipeline = RecordingPipeline("run-1", session_factory=session_factory, flush_interval_ms=1)
+        pipeline.append("step-a", "hello")
+        await pipeline.close()
+        return pipeline
+
+    pipeline = asyncio.run(scenario())
+    [(thread_id, db, pending)] = pipeline.writes
+    assert thread_id != threading.get_ident()
+    assert db is sessions[0] and db.committed and db.closed
+    assert [line.endswith("[INFO] hello") for line in pending["step-a"]] == [True]
+
+
+def test_lines_reach_the_db_when_publishing_fails():
+    class FailingStreamingService:
+        async def publish_run_update(self, run_id, event_type, payload):
+            raise ConnectionError("redis went away")
+
+    async def scenario():
+        pipeline = RecordingPipeline(
+            "run-1", streaming_service=FailingStreamingService(), session_factory=RecordingSession, flush_interval_ms=1
+        )
+        pipeline.append("step-a", "first")
+        await asyncio.sleep(0.02)  # the flusher has tried and failed to publish
+        pipeline.append("step-a", "second")
+        await pipeline.close()
+        return pipeline
+
+    pipeline = asyncio.run(scenario())
+    lines = [line for _, _, pending in pipeline.writes for line in pending["step-a"]]
+    assert [line.rsplit(" ", 1)[1] for line in lines] == ["first", "second"]
+
+
+def test_executor_without_run_context_logs_to_the_logger(caplog):
+    from mcp.core.executors.base_executor import BaseExecutor
+
+    class QuietExecutor(BaseExecutor):
+        async def execute(self, config, inputs):
+            await self._log_message("step-a", "no run here", level="WARNING")
+            return {}
+
+    with caplog.at_level("INFO", logger="mcp.core.executors.base_executor"):
+        asyncio.run(QuietExecutor().execute(None, {}))
+    assert [(r.levelname, r.getMessage()) for r in caplog.records] == [("WARNING", "[step-a] no run here")]